@@ -0,0 +1,3 @@
+"""
+Benchmarks of the Emoji subsystem. Run with `python -m benchmarks`.
+"""
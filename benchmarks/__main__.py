@@ -0,0 +1,117 @@
+"""
+Run the benchmarks of the Emoji subsystem against synthetic data.
+
+    python -m benchmarks --guilds 10 --emojis 500 --users 200 --output results.json
+    python -m benchmarks --compare results.json
+
+Everything runs in a temporary directory, the configs and the data of the bot are not touched.
+"""
+import argparse
+import asyncio
+import fnmatch
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from fukurou.configs import add_config, get_config
+from fukurou.cogs.emoji.config import EmojiConfig
+from fukurou.cogs.emoji.database.sqlite import EmojiSqlite
+from fukurou.cogs.emoji.storage import get_emoji_storage
+from .cases import Environment, get_benchmarks
+from .datagen import DataSet
+from .runner import BenchmarkResult, compare_results, save_results
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='benchmarks', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--guilds', type=int, default=10, help='Number of the guilds.')
+    parser.add_argument('--emojis', type=int, default=500, help='Number of the Emojis per guild.')
+    parser.add_argument('--users', type=int, default=100, help='Number of the users per guild.')
+    parser.add_argument('--use-ratio', type=float, default=0.2,
+                        help='Ratio of the Emojis each user has used.')
+    parser.add_argument('--image-size', type=int, default=65536,
+                        help='Size of the image files in bytes.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the data generator.')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier of the number of the iterations.')
+    parser.add_argument('--warmup', type=int, default=100,
+                        help='Number of the untimed iterations before each benchmark.')
+    parser.add_argument('--filter', default='*', help='Glob pattern of the benchmarks to run.')
+    parser.add_argument('--output', default=None, help='Path to save the results as JSON.')
+    parser.add_argument('--compare', default=None, help='Path of the baseline results to compare.')
+
+    return parser.parse_args()
+
+async def main(args: argparse.Namespace) -> list[BenchmarkResult]:
+    # Pages of the list are views, which need a running event loop
+    config: EmojiConfig = get_config(config=EmojiConfig)
+    config.database.path = os.path.abspath(os.path.join('databases', 'emoji.db'))
+    config.storage.directory = './images'
+    config.database.slow_query_threshold = float('inf')
+
+    dataset = DataSet(
+        guilds=args.guilds,
+        emojis=args.emojis,
+        users=args.users,
+        use_ratio=args.use_ratio,
+        seed=args.seed
+    )
+
+    database = EmojiSqlite()
+    started = time.perf_counter()
+    emoji_count, use_count = dataset.populate(conn=database.conn)
+    print(f'Generated {emoji_count} emoji rows and {use_count} emoji_use rows '
+          f'in {time.perf_counter() - started:.1f}s.')
+
+    env = Environment(
+        dataset=dataset,
+        database=database,
+        storage=get_emoji_storage(sttype='local'),
+        scale=args.scale,
+        image_size=args.image_size
+    )
+
+    print(f'{"benchmark":<40} {"iters":>8} {"throughput":>14} '
+          f'{"p50(us)":>10} {"p95(us)":>10} {"p99(us)":>10} {"memory":>12}')
+
+    results = []
+    for benchmark in get_benchmarks(env):
+        if not fnmatch.fnmatch(benchmark.name, args.filter):
+            continue
+
+        result = benchmark.run(warmup=args.warmup)
+        results.append(result)
+        print(result)
+
+    return results
+
+def run() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    output = os.path.abspath(args.output) if args.output is not None else None
+    compare = os.path.abspath(args.compare) if args.compare is not None else None
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='fukurou-bench-') as workdir:
+        os.chdir(workdir)
+        try:
+            add_config(config=EmojiConfig)
+            results = asyncio.run(main(args))
+        finally:
+            os.chdir(cwd)
+
+    if output is not None:
+        params = {key: value for key, value in vars(args).items()
+                  if key not in ('output', 'compare')}
+        save_results(path=output, results=results, params=params)
+        print(f'Results are saved at {output}')
+
+    if compare is not None:
+        print(f'\nCompared with {compare} (p50):')
+        for line in compare_results(path=compare, results=results):
+            print(line)
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,179 @@
+from datetime import datetime, timezone
+import random
+
+from fukurou.cogs.emoji.data import EmojiList
+from fukurou.cogs.emoji.database import BaseEmojiDatabase
+from fukurou.cogs.emoji.emojipareser import EmojiParser
+from fukurou.cogs.emoji.storage import BaseEmojiStorage
+from fukurou.cogs.emoji.views import EmojiListPage
+from .datagen import WORDS, DataSet, make_image
+from .runner import Benchmark
+
+class FakeGuild:
+    """
+    Guild without any member, enough to build the pages of the list.
+    """
+    def __init__(self, guild_id: int) -> None:
+        self.id = guild_id
+
+    def get_member(self, user_id: int) -> None: # pylint: disable=unused-argument
+        return None
+
+class Environment:
+    """
+    Everything the benchmarks run against.
+    """
+    def __init__(self,
+                 dataset: DataSet,
+                 database: BaseEmojiDatabase,
+                 storage: BaseEmojiStorage,
+                 scale: float,
+                 image_size: int) -> None:
+        self.dataset = dataset
+        self.database = database
+        self.storage = storage
+        self.scale = scale
+        self.image_size = image_size
+
+    def iterations(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+def parser_benchmarks(env: Environment) -> list[Benchmark]:
+    def parse():
+        messages = env.dataset.messages(count=10000)
+        return lambda i: EmojiParser.parse(text=messages[i % len(messages)])
+
+    return [Benchmark('parser.parse', parse, env.iterations(100000))]
+
+def database_benchmarks(env: Environment) -> list[Benchmark]:
+    dataset, database = env.dataset, env.database
+
+    def keys(missing_ratio: float = 0.0):
+        rng = random.Random(dataset.seed)
+        pairs = []
+        for _ in range(1000):
+            emoji_name = rng.choice(dataset.emoji_names)
+            if rng.random() < missing_ratio:
+                emoji_name += '_missing'
+            pairs.append((rng.choice(dataset.guild_ids), emoji_name))
+
+        return pairs
+
+    def get():
+        pairs = keys()
+        return lambda i: database.get(*pairs[i % len(pairs)])
+
+    def exists():
+        pairs = keys(missing_ratio=0.5)
+        return lambda i: database.exists(*pairs[i % len(pairs)])
+
+    def count():
+        guild_ids = dataset.guild_ids
+        return lambda i: database.count(guild_id=guild_ids[i % len(guild_ids)])
+
+    def list_all():
+        rng = random.Random(dataset.seed)
+        args = [(rng.choice(dataset.user_ids), rng.choice(dataset.guild_ids)) for _ in range(100)]
+        return lambda i: database.list(*args[i % len(args)])
+
+    def list_keyword():
+        rng = random.Random(dataset.seed)
+        args = [(rng.choice(dataset.user_ids), rng.choice(dataset.guild_ids), rng.choice(WORDS))
+                for _ in range(100)]
+        return lambda i: database.list(*args[i % len(args)])
+
+    def increase_usecount():
+        rng = random.Random(dataset.seed)
+        args = [(rng.choice(dataset.guild_ids), rng.choice(dataset.user_ids),
+                 rng.choice(dataset.emoji_names)) for _ in range(1000)]
+        return lambda i: database.increase_usecount(*args[i % len(args)])
+
+    return [
+        Benchmark('database.get', get, env.iterations(20000)),
+        Benchmark('database.exists', exists, env.iterations(20000)),
+        Benchmark('database.count', count, env.iterations(20000)),
+        Benchmark('database.list', list_all, env.iterations(200)),
+        Benchmark('database.list.keyword', list_keyword, env.iterations(200)),
+        Benchmark('database.increase_usecount', increase_usecount, env.iterations(2000))
+    ]
+
+def data_benchmarks(env: Environment) -> list[Benchmark]:
+    rng = random.Random(env.dataset.seed)
+
+    # Rows as SQLite returns them, timestamps in ISO 8601 strings
+    rows = [
+        (f'emoji{i}', rng.choice(env.dataset.user_ids),
+         datetime(2023, 1, 1, tzinfo=timezone.utc).replace(second=i % 60).isoformat(),
+         rng.randint(0, 50), rng.randint(0, 5000))
+        for i in range(10000)
+    ]
+
+    def construct():
+        return lambda i: EmojiList(owner_id=0, entries=rows)
+
+    def iterate():
+        emoji_list = EmojiList(owner_id=0, entries=rows)
+        return lambda i: sum(item.guild_use_count for item in emoji_list)
+
+    def sort():
+        emoji_list = EmojiList(owner_id=0, entries=rows)
+        return lambda i: emoji_list.sort(key='guild_use_count', reverse=i % 2 == 0)
+
+    return [
+        Benchmark('data.EmojiList.construct.10k', construct, env.iterations(200), memory=True),
+        Benchmark('data.EmojiList.iterate.10k', iterate, env.iterations(200)),
+        Benchmark('data.EmojiList.sort.10k', sort, env.iterations(200))
+    ]
+
+def view_benchmarks(env: Environment) -> list[Benchmark]:
+    dataset = env.dataset
+
+    def list_page():
+        rng = random.Random(dataset.seed)
+        created_at = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        entries = [
+            (emoji_name, rng.choice(dataset.user_ids), created_at,
+             rng.randint(0, 50), rng.randint(0, 5000))
+            for emoji_name in dataset.emoji_names
+        ]
+        guild = FakeGuild(guild_id=dataset.guild_ids[0])
+
+        return lambda i: EmojiListPage(
+            guild=guild,
+            emoji_list=EmojiList(owner_id=dataset.user_ids[0], entries=entries)
+        )
+
+    return [Benchmark('views.EmojiListPage', list_page, env.iterations(200))]
+
+def storage_benchmarks(env: Environment) -> list[Benchmark]:
+    dataset, storage = env.dataset, env.storage
+    guild_id = dataset.guild_ids[0]
+
+    def save():
+        storage.register(guild_id=guild_id)
+        rng = random.Random(dataset.seed)
+        image = make_image(rng, size=env.image_size)
+        return lambda i: storage.save(guild_id=guild_id, file=image, file_name=f'save{i % 100}.png')
+
+    def read():
+        storage.register(guild_id=guild_id)
+        rng = random.Random(dataset.seed)
+        for i in range(100):
+            storage.save(guild_id=guild_id, file=make_image(rng, size=env.image_size),
+                         file_name=f'read{i}.png')
+
+        return lambda i: storage.read(guild_id=guild_id, file_name=f'read{i % 100}.png')
+
+    return [
+        Benchmark('storage.save', save, env.iterations(2000)),
+        Benchmark('storage.read', read, env.iterations(5000))
+    ]
+
+def get_benchmarks(env: Environment) -> list[Benchmark]:
+    return [
+        *parser_benchmarks(env),
+        *database_benchmarks(env),
+        *data_benchmarks(env),
+        *view_benchmarks(env),
+        *storage_benchmarks(env)
+    ]
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from hashlib import md5
+import random
+import sqlite3
+
+WORDS = (
+    'cat', 'dog', 'owl', 'happy', 'sad', 'angry', 'laugh', 'cry', 'wow', 'ok',
+    'no', 'yes', 'thumbs', 'heart', 'fire', 'party', 'sleep', 'think', 'wave', 'clap'
+)
+
+class DataSet:
+    """
+    Synthetic data of N guilds × M Emojis, used by U users in each guild.
+    Same parameters with the same seed always make the same data.
+    """
+    def __init__(self, guilds: int, emojis: int, users: int, use_ratio: float, seed: int) -> None:
+        self.guilds = guilds
+        self.emojis = emojis
+        self.users = users
+        self.use_ratio = use_ratio
+        self.seed = seed
+
+        self.guild_ids = [1000000000000000 + i for i in range(guilds)]
+        self.user_ids = [2000000000000000 + i for i in range(users)]
+
+        rng = random.Random(seed)
+        self.emoji_names = [make_name(rng, i) for i in range(emojis)]
+
+    def emoji_rows(self):
+        rng = random.Random(self.seed)
+        origin = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+        for guild_id in self.guild_ids:
+            for emoji_name in self.emoji_names:
+                file_name = md5(f'{guild_id}{emoji_name}'.encode()).hexdigest() + '.png'
+                created_at = origin + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                yield (guild_id, emoji_name, rng.choice(self.user_ids), file_name, created_at)
+
+    def use_rows(self):
+        rng = random.Random(self.seed + 1)
+        per_user = max(1, int(self.emojis * self.use_ratio))
+
+        # Popular Emojis are picked more often, like the real usage
+        weights = [1 / (rank + 1) for rank in range(self.emojis)]
+
+        for guild_id in self.guild_ids:
+            for user_id in self.user_ids:
+                used = set(rng.choices(self.emoji_names, weights=weights, k=per_user))
+                for emoji_name in used:
+                    yield (guild_id, user_id, emoji_name, rng.randint(1, 500))
+
+    def populate(self, conn: sqlite3.Connection) -> tuple[int, int]:
+        """
+        Insert the data into the Emoji tables in a single transaction.
+
+        :return: Number of the `emoji` rows and the `emoji_use` rows.
+        :rtype: tuple[int, int]
+        """
+        with conn:
+            emoji_count = conn.executemany(
+                'INSERT INTO emoji VALUES (?, ?, ?, ?, ?)', self.emoji_rows()
+            ).rowcount
+            use_count = conn.executemany(
+                'INSERT INTO emoji_use VALUES (?, ?, ?, ?)', self.use_rows()
+            ).rowcount
+
+        return emoji_count, use_count
+
+    def messages(self, count: int, hit_ratio: float = 0.3) -> list[str]:
+        """
+        Make messages, `hit_ratio` of them are Emoji expressions.
+        """
+        rng = random.Random(self.seed + 2)
+
+        messages = []
+        for _ in range(count):
+            if rng.random() < hit_ratio:
+                messages.append(f';{rng.choice(self.emoji_names)};')
+            else:
+                messages.append(' '.join(rng.choices(WORDS, k=rng.randint(1, 12))))
+
+        return messages
+
+def make_name(rng: random.Random, index: int) -> str:
+    name = '_'.join(rng.choices(WORDS, k=rng.randint(1, 3)))
+    return f'{name}{index}'
+
+def make_image(rng: random.Random, size: int) -> bytes:
+    """
+    Make bytes shaped like a PNG file, only the header is valid.
+    """
+    return b'\x89PNG\r\n\x1a\n' + rng.randbytes(max(0, size - 8))
@@ -0,0 +1,397 @@
+"""
+Replay synthetic gateway events against `EmojiCog` at a target rate.
+
+    python -m benchmarks.loadgen --rate 200 --duration 30 --latency 80 --rate-limit 0.01
+
+Messages go through `EmojiCog.on_emoji` and `/emoji list` through its handler,
+with a stubbed Discord HTTP layer simulating the latency and the 429 responses.
+Events are started on schedule whether or not the previous ones are finished,
+so the latencies include the time spent waiting for the event loop.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+import discord
+
+from fukurou.configs import add_config, get_config
+from fukurou.cogs.emoji.cog import EmojiCog
+from fukurou.cogs.emoji.config import EmojiConfig
+from fukurou.cogs.emoji.emojimanager import EmojiManager
+from fukurou.cogs.emoji.sender import EmojiSender
+from fukurou.cogs.emoji.views import EmojiListPage
+from .datagen import WORDS, DataSet, make_image
+from .runner import get_revision, percentile
+
+class FakeResponse:
+    """
+    Response of the stubbed HTTP layer, enough to build `discord.HTTPException`.
+    """
+    def __init__(self, status: int, reason: str) -> None:
+        self.status = status
+        self.reason = reason
+
+class FakeHTTP:
+    """
+    Stubbed Discord HTTP layer.
+
+    Every request waits for a log-normal latency around `latency` seconds. A request
+    is rate limited with the probability of `rate_limit`, then it's retried after
+    `retry_after` seconds up to 5 times, like the HTTP client of py-cord does.
+    """
+    def __init__(self,
+                 latency: float,
+                 rate_limit: float,
+                 retry_after: float,
+                 forbidden: float,
+                 seed: int) -> None:
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.forbidden = forbidden
+        self.rng = random.Random(seed)
+
+        self.requests: dict[str, int] = {}
+        self.rate_limited = 0
+
+    async def request(self, route: str, forbiddable: bool = False) -> None:
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+        for _ in range(5):
+            await asyncio.sleep(self.latency * self.rng.lognormvariate(0, 0.5))
+
+            if self.rng.random() >= self.rate_limit:
+                break
+
+            self.rate_limited += 1
+            await asyncio.sleep(self.retry_after)
+        else:
+            raise discord.HTTPException(FakeResponse(429, 'Too Many Requests'), 'Rate limited')
+
+        if forbiddable and self.rng.random() < self.forbidden:
+            raise discord.Forbidden(FakeResponse(403, 'Forbidden'), 'Missing Permissions')
+
+class FakeAsset:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def __str__(self) -> str:
+        return self.url
+
+class FakeUser:
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+        self.name = f'user{user_id}'
+        self.display_name = self.name
+        self.display_avatar = FakeAsset(f'https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png')
+        self.jump_url = f'https://discord.com/users/{user_id}'
+        self.mention = f'<@{user_id}>'
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.user = FakeUser(user_id=1)
+
+class FakeGuild:
+    def __init__(self, guild_id: int) -> None:
+        self.id = guild_id
+
+    def get_member(self, user_id: int) -> None: # pylint: disable=unused-argument
+        return None
+
+class FakeWebhook:
+    def __init__(self, http: FakeHTTP, webhook_id: int, user: FakeUser) -> None:
+        self.http = http
+        self.id = webhook_id
+        self.token = f'token{webhook_id}'
+        self.user = user
+
+    async def send(self, files: list[discord.File] | None = None, **kwargs) -> None: # pylint: disable=unused-argument
+        try:
+            await self.http.request('POST /webhooks/{webhook.id}/{webhook.token}')
+        finally:
+            for file in files or []:
+                file.close()
+
+    async def delete(self) -> None:
+        await self.http.request('DELETE /webhooks/{webhook.id}')
+
+class FakeChannel:
+    def __init__(self, http: FakeHTTP, channel_id: int) -> None:
+        self.http = http
+        self.id = channel_id
+
+    async def webhooks(self) -> list[FakeWebhook]:
+        await self.http.request('GET /channels/{channel.id}/webhooks', forbiddable=True)
+        return []
+
+    async def create_webhook(self, name: str) -> FakeWebhook: # pylint: disable=unused-argument
+        await self.http.request('POST /channels/{channel.id}/webhooks', forbiddable=True)
+        return FakeWebhook(http=self.http, webhook_id=self.id, user=FakeUser(user_id=1))
+
+    async def send(self, files: list[discord.File] | None = None, **kwargs) -> None: # pylint: disable=unused-argument
+        try:
+            await self.http.request('POST /channels/{channel.id}/messages')
+        finally:
+            for file in files or []:
+                file.close()
+
+class FakeMessage:
+    def __init__(self,
+                 http: FakeHTTP,
+                 content: str,
+                 author: FakeUser,
+                 guild: FakeGuild,
+                 channel_id: int) -> None:
+        self.http = http
+        self.content = content
+        self.author = author
+        self.guild = guild
+        self.channel = FakeChannel(http=http, channel_id=channel_id)
+
+    async def delete(self) -> None:
+        await self.http.request('DELETE /channels/{channel.id}/messages/{message.id}')
+
+class FakeInteractionResponse:
+    def __init__(self, http: FakeHTTP) -> None:
+        self.http = http
+
+    async def send_message(self, *args, **kwargs) -> None: # pylint: disable=unused-argument
+        await self.http.request('POST /interactions/{interaction.id}/{interaction.token}/callback')
+
+class FakeContext:
+    """
+    Synthetic `discord.ApplicationContext` of a slash command.
+    """
+    def __init__(self, http: FakeHTTP, author: FakeUser, guild: FakeGuild) -> None:
+        self.author = author
+        self.guild = guild
+        self.response = FakeInteractionResponse(http=http)
+        self.interaction = self
+
+    async def respond(self, *args, **kwargs) -> None:
+        await self.response.send_message(*args, **kwargs)
+
+async def respond_page(self: EmojiListPage, interaction: FakeContext, **kwargs) -> None: # pylint: disable=unused-argument
+    # Paginator only takes a real interaction, the pages are sent as a single response
+    await interaction.response.send_message(embeds=self.pages[:1])
+
+async def bind_webhook(self: EmojiSender, webhook: FakeWebhook) -> FakeWebhook: # pylint: disable=unused-argument
+    # Stubbed webhooks are already bound to the stubbed HTTP layer
+    return webhook
+
+class LoopMonitor:
+    """
+    Measure how late the event loop wakes up a sleeping task, in milliseconds.
+    """
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval) * 1000)
+
+class LoadGenerator:
+    """
+    Start the events at `rate` per second for `duration` seconds and record their latencies.
+    """
+    def __init__(self, args: argparse.Namespace, dataset: DataSet, http: FakeHTTP) -> None:
+        self.args = args
+        self.dataset = dataset
+        self.http = http
+        self.rng = random.Random(args.seed)
+
+        self.bot = FakeBot()
+        self.cog = EmojiCog(self.bot)
+
+        self.latencies: dict[str, list[float]] = {}
+        self.errors = 0
+
+    async def on_message(self, content: str) -> None:
+        guild_id = self.rng.choice(self.dataset.guild_ids)
+        message = FakeMessage(
+            http=self.http,
+            content=content,
+            author=FakeUser(self.rng.choice(self.dataset.user_ids)),
+            guild=FakeGuild(guild_id),
+            channel_id=guild_id * 100 + self.rng.randrange(self.args.channels)
+        )
+        await self.cog.on_emoji(message)
+
+    async def on_list(self, keyword: str | None) -> None:
+        ctx = FakeContext(
+            http=self.http,
+            author=FakeUser(self.rng.choice(self.dataset.user_ids)),
+            guild=FakeGuild(self.rng.choice(self.dataset.guild_ids))
+        )
+        await self.cog.list.callback(self.cog, ctx, keyword)
+
+    async def timed(self, kind: str, event) -> None:
+        started = time.perf_counter()
+        try:
+            await event
+        except Exception: # pylint: disable=broad-exception-caught
+            self.errors += 1
+            kind += '.error'
+
+        self.latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    def next_event(self, messages: list[str], index: int) -> tuple[str, object]:
+        if self.rng.random() < self.args.command_ratio:
+            keyword = self.rng.choice(WORDS) if self.rng.random() < 0.5 else None
+            return ('list' if keyword is None else 'list.keyword'), self.on_list(keyword)
+
+        content = messages[index % len(messages)]
+        kind = 'on_emoji.expression' if content.startswith(';') else 'on_emoji.other'
+        return kind, self.on_message(content)
+
+    async def run(self) -> dict:
+        messages = self.dataset.messages(count=10000, hit_ratio=self.args.hit_ratio)
+        monitor = LoopMonitor()
+        monitor_task = asyncio.create_task(monitor.run())
+
+        tasks = set()
+        total = int(self.args.rate * self.args.duration)
+        started = time.perf_counter()
+
+        for i in range(total):
+            delay = started + i / self.args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            kind, event = self.next_event(messages=messages, index=i)
+            task = asyncio.create_task(self.timed(kind, event))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.wait(tasks)
+
+        elapsed = time.perf_counter() - started
+        monitor_task.cancel()
+
+        return self.report(total=total, elapsed=elapsed, lags=monitor.samples)
+
+    def report(self, total: int, elapsed: float, lags: list[float]) -> dict:
+        def summarize(samples: list[float]) -> dict:
+            samples = sorted(samples)
+            return {
+                'count': len(samples),
+                'p50_ms': round(percentile(samples, 50), 3),
+                'p95_ms': round(percentile(samples, 95), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+                'max_ms': round(samples[-1], 3) if samples else 0.0
+            }
+
+        return {
+            'events': total,
+            'elapsed_s': round(elapsed, 3),
+            'throughput': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            'errors': self.errors,
+            'latency': {kind: summarize(samples) for kind, samples in sorted(self.latencies.items())},
+            'loop_lag': summarize(lags),
+            'http': {
+                'requests': sum(self.http.requests.values()),
+                'rate_limited': self.http.rate_limited,
+                'routes': dict(sorted(self.http.requests.items()))
+            }
+        }
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='benchmarks.loadgen',
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=float, default=100, help='Events per second.')
+    parser.add_argument('--duration', type=float, default=10, help='Duration in seconds.')
+    parser.add_argument('--guilds', type=int, default=10, help='Number of the guilds.')
+    parser.add_argument('--emojis', type=int, default=200, help='Number of the Emojis per guild.')
+    parser.add_argument('--users', type=int, default=50, help='Number of the users per guild.')
+    parser.add_argument('--channels', type=int, default=5,
+                        help='Number of the channels per guild.')
+    parser.add_argument('--image-size', type=int, default=16384,
+                        help='Size of the image files in bytes.')
+    parser.add_argument('--hit-ratio', type=float, default=0.3,
+                        help='Ratio of the messages with the Emoji expression.')
+    parser.add_argument('--command-ratio', type=float, default=0.02,
+                        help='Ratio of the events that are /emoji list commands.')
+    parser.add_argument('--latency', type=float, default=80,
+                        help='Median latency of the Discord API in milliseconds.')
+    parser.add_argument('--rate-limit', type=float, default=0.01,
+                        help='Probability of a request being rate limited (429).')
+    parser.add_argument('--retry-after', type=float, default=500,
+                        help='Retry-After of the 429 responses in milliseconds.')
+    parser.add_argument('--forbidden', type=float, default=0.0,
+                        help='Probability of missing the permission to create webhooks.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the generators.')
+    parser.add_argument('--output', default=None, help='Path to save the report as JSON.')
+
+    return parser.parse_args()
+
+def prepare(args: argparse.Namespace) -> DataSet:
+    config: EmojiConfig = get_config(config=EmojiConfig)
+    config.database.path = os.path.abspath(os.path.join('databases', 'emoji.db'))
+    config.storage.directory = './images'
+
+    dataset = DataSet(
+        guilds=args.guilds,
+        emojis=args.emojis,
+        users=args.users,
+        use_ratio=0.2,
+        seed=args.seed
+    )
+
+    manager = EmojiManager()
+    dataset.populate(conn=manager.database.conn)
+
+    rng = random.Random(args.seed)
+    for guild_id, _, _, file_name, _ in dataset.emoji_rows():
+        manager.register(guild_id=guild_id)
+        manager.storage.save(guild_id=guild_id, file=make_image(rng, size=args.image_size),
+                             file_name=file_name)
+
+    return dataset
+
+async def main(args: argparse.Namespace) -> dict:
+    dataset = prepare(args)
+    http = FakeHTTP(
+        latency=args.latency / 1000,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after / 1000,
+        forbidden=args.forbidden,
+        seed=args.seed
+    )
+
+    return await LoadGenerator(args=args, dataset=dataset, http=http).run()
+
+def run() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    EmojiListPage.respond = respond_page
+    EmojiSender._bind = bind_webhook # pylint: disable=protected-access
+
+    output = os.path.abspath(args.output) if args.output is not None else None
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='fukurou-loadgen-') as workdir:
+        os.chdir(workdir)
+        try:
+            add_config(config=EmojiConfig)
+            report = asyncio.run(main(args))
+        finally:
+            os.chdir(cwd)
+
+    report = {'meta': {'revision': get_revision(), 'params': vars(args)}, **report}
+    print(json.dumps(report, indent=4))
+
+    if output is not None:
+        with open(output, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=4)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+from typing import Callable
+import gc
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+
+Operation = Callable[[int], object]
+
+class BenchmarkResult:
+    """
+    Timings of a benchmark, in microseconds per operation.
+    """
+    def __init__(self,
+                 name: str,
+                 samples: list[float],
+                 total: float,
+                 memory: int | None = None) -> None:
+        samples = sorted(samples)
+
+        self.name = name
+        self.memory = memory
+        self.iterations = len(samples)
+        self.total = total
+        self.ops = self.iterations / total if total > 0 else 0.0
+        self.mean = sum(samples) / self.iterations if samples else 0.0
+        self.p50 = percentile(samples, 50)
+        self.p95 = percentile(samples, 95)
+        self.p99 = percentile(samples, 99)
+
+    def to_dict(self) -> dict:
+        result = {
+            'name': self.name,
+            'iterations': self.iterations,
+            'total_s': round(self.total, 6),
+            'ops_per_s': round(self.ops, 2),
+            'mean_us': round(self.mean, 3),
+            'p50_us': round(self.p50, 3),
+            'p95_us': round(self.p95, 3),
+            'p99_us': round(self.p99, 3)
+        }
+
+        if self.memory is not None:
+            result['memory_bytes'] = self.memory
+
+        return result
+
+    def __str__(self) -> str:
+        line = (f'{self.name:<40} {self.iterations:>8} {self.ops:>12.1f}/s '
+                f'{self.p50:>10.2f} {self.p95:>10.2f} {self.p99:>10.2f}')
+
+        if self.memory is not None:
+            line += f' {self.memory / 1024:>10.1f}KB'
+
+        return line
+
+class Benchmark:
+    """
+    A named operation, called with the index of the iteration.
+
+    `setup` is called once before the timing and returns the operation,
+    so preparing the inputs is not measured. If `memory` is set to True, the size
+    of the object returned by the operation is measured as well.
+    """
+    def __init__(self,
+                 name: str,
+                 setup: Callable[[], Operation],
+                 iterations: int,
+                 memory: bool = False) -> None:
+        self.name = name
+        self.setup = setup
+        self.iterations = iterations
+        self.memory = memory
+
+    def run(self, warmup: int) -> BenchmarkResult:
+        operation = self.setup()
+
+        for i in range(min(warmup, self.iterations)):
+            operation(i)
+
+        samples = []
+        # Collections would be charged to whichever iteration triggers them
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for i in range(self.iterations):
+                op_started = time.perf_counter_ns()
+                operation(i)
+                samples.append((time.perf_counter_ns() - op_started) / 1000)
+            total = time.perf_counter() - started
+        finally:
+            gc.enable()
+
+        memory = self.measure(operation) if self.memory else None
+
+        return BenchmarkResult(name=self.name, samples=samples, total=total, memory=memory)
+
+    def measure(self, operation: Operation) -> int:
+        """
+        Measure the memory still allocated by the result of the operation, in bytes.
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            kept = operation(0)
+            gc.collect()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+        del kept
+        return after - before
+
+def percentile(samples: list[float], rank: float) -> float:
+    """
+    Get the nearest-rank percentile of the sorted samples.
+    """
+    if not samples:
+        return 0.0
+
+    return samples[max(0, math.ceil(rank / 100 * len(samples)) - 1)]
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(path: str, results: list[BenchmarkResult], params: dict) -> None:
+    """
+    Save the results as JSON, together with what is needed to compare them later.
+    """
+    document = {
+        'meta': {
+            'revision': get_revision(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': params
+        },
+        'results': [result.to_dict() for result in results]
+    }
+
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(document, f, indent=4)
+
+def compare_results(path: str, results: list[BenchmarkResult]) -> list[str]:
+    """
+    Compare the p50 of each benchmark with the baseline saved at `path`.
+    """
+    with open(path, 'r', encoding='utf8') as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+
+    lines = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None or base['p50_us'] == 0:
+            continue
+
+        ratio = result.p50 / base['p50_us']
+        lines.append(f'{result.name:<40} {base["p50_us"]:>10.2f} -> {result.p50:>10.2f}us '
+                     f'({ratio:.2f}x)')
+
+    return lines
@@ -1,27 +1,59 @@
 import sys
+import argparse
 import logging
 import logging.config
 
 from .configs import add_config, get_config, NewConfigInterrupt
 from .config import BotConfig
-from .bot import FukurouBot
+from .bot import FukurouBot, FukurouShardedBot
+from .launcher import ShardLauncher
+from .profiler import StartupProfiler
 
 CONFIG_CREATED_MESSAGE = """ERROR: Config not found.
 
 New config has been created at "configs/fukurou.json".
 Run the program again after modifying it."""
 
+CONFIG_INVALID_MESSAGE = """ERROR: Config is invalid.
+
+{error}
+Fix "configs/fukurou.json" and run the program again."""
+
 if __name__ == '__main__':
+    profiler = StartupProfiler()
+
+    parser = argparse.ArgumentParser(prog='fukurou')
+    parser.add_argument('--sync-commands', action='store_true',
+                        help='Sync application commands even if they are unchanged.')
+    args = parser.parse_args()
+
     # Load system config
     try:
-        add_config(config=BotConfig, interrupt_new=True)
+        with profiler.phase('config load'):
+            add_config(config=BotConfig, interrupt_new=True)
     except NewConfigInterrupt:
         print(CONFIG_CREATED_MESSAGE)
         sys.exit()
+    except ValueError as e:
+        print(CONFIG_INVALID_MESSAGE.format(error=': '.join(str(arg) for arg in e.args)))
+        sys.exit(1)
 
     config: BotConfig = get_config(config=BotConfig)
 
+    if args.sync_commands is True:
+        config.command_sync.mode = 'always'
+
     # Load logging config
     logging.config.dictConfig(config.logging)
 
-    FukurouBot(config=config).run()
+    sharding = config.sharding
+    if sharding.processes > 1:
+        ShardLauncher(config=config).run()
+    elif sharding.enabled is True:
+        FukurouShardedBot(
+            config=config,
+            shard_ids=sharding.shard_ids,
+            shard_count=sharding.shard_count
+        ).run()
+    else:
+        FukurouBot(config=config).run()
@@ -1,19 +1,35 @@
+import asyncio
+import hashlib
+import json
 import logging
+import math
+import os
+import time
 from typing import Type
 import discord
-from discord.ext.commands import Bot
+from discord.ext.commands import AutoShardedBot, Bot
 
 from .config import BotConfig
-from .configs import add_config, get_config, Config
+from .configs import ConfigService, add_config, add_config_listener, get_config, Config
+from .metrics import MetricsServer, gauge
 from .patterns import Singleton
+from .profiler import StartupProfiler
+from .system import SystemCog
 
 class FukurouMeta(type(Bot), type(Singleton)):
     pass
 
-class FukurouBot(Bot, Singleton, metaclass=FukurouMeta):
-    def __init__(self, config: BotConfig):
+class FukurouMixin:
+    """
+    Common behavior of the Fukurou bots, regardless of sharding.
+    """
+    def __init__(self, config: BotConfig, **options):
         self.config = config
         self.logger = logging.getLogger('fukurou')
+        self.latency_task = None
+        self.watch_task = None
+        self.metrics_server = None
+        self.commands_synced = False
 
         intents = discord.Intents.default()
         intents.message_content = True
@@ -21,9 +37,33 @@ class FukurouBot(Bot, Singleton, metaclass=FukurouMeta):
 
         super().__init__(
             intents = intents,
-            command_prefix = '!'
+            command_prefix = '!',
+            auto_sync_commands = False,
+            **options
         )
 
+        add_config_listener(config=BotConfig, listener=self.on_config_reload)
+        self.add_cog(SystemCog(self))
+
+        gauge(
+            'fukurou_gateway_latency_seconds',
+            'Latency between a heartbeat and its acknowledgement.',
+            ('shard',),
+            collect=lambda: [
+                ({'shard': shard_id}, latency)
+                for shard_id, latency in self.shard_latencies if math.isfinite(latency)
+            ]
+        )
+
+    def on_config_reload(self, config: BotConfig) -> None:
+        """
+        Take the reloaded config. Token, extensions and sharding take effect on the next start.
+
+        :param config: Reloaded config.
+        :type config: BotConfig
+        """
+        self.config = config
+
     def add_config(self, config: Type[Config]) -> None:
         """
         Add config to the service.
@@ -36,11 +76,121 @@ class FukurouBot(Bot, Singleton, metaclass=FukurouMeta):
             get_config(config=config).file_name
         )
 
+    @property
+    def shard_latencies(self) -> list[tuple[int, float]]:
+        """
+        Latencies of the shards handled by this bot, in seconds.
+
+        :return: List of `(shard_id, latency)`.
+        :rtype: list[tuple[int, float]]
+        """
+        return [(self.shard_id or 0, self.latency)]
+
+    def get_commands_hash(self) -> str:
+        """
+        Get a stable hash of the application command payloads.
+
+        :return: Hash of the commands in hex.
+        :rtype: str
+        """
+        payloads = sorted(
+            json.dumps([cmd.to_dict(), cmd.guild_ids], sort_keys=True)
+            for cmd in self.pending_application_commands
+        )
+        payloads.insert(0, str(self.application_id))
+
+        return hashlib.sha256('\n'.join(payloads).encode()).hexdigest()
+
+    async def on_connect(self):
+        # on_connect fires again after each reconnect
+        if self.commands_synced:
+            return
+        self.commands_synced = True
+
+        mode = self.config.command_sync.mode
+        if mode == 'never':
+            return
+
+        hash_file = self.config.command_sync.hash_file
+        commands_hash = self.get_commands_hash()
+
+        if mode != 'always':
+            try:
+                with open(hash_file, mode='r', encoding='utf8') as file:
+                    if file.read().strip() == commands_hash:
+                        self.logger.info('Application commands are unchanged, skipping sync.')
+                        return
+            except FileNotFoundError:
+                pass
+
+        started = time.perf_counter()
+        with StartupProfiler().phase('sync_commands'):
+            await self.sync_commands()
+        self.logger.info('Application commands have been synced in %.1fms.',
+                         (time.perf_counter() - started) * 1000)
+
+        try:
+            os.makedirs(os.path.dirname(hash_file) or '.', exist_ok=True)
+            with open(hash_file, mode='w', encoding='utf8') as file:
+                file.write(commands_hash)
+        except OSError as e:
+            self.logger.warning('Cannot save the hash of application commands: %s', e.strerror)
+
+    async def start(self, token: str, *, reconnect: bool = True) -> None:
+        if self.config.metrics.enabled is True and self.metrics_server is None:
+            self.metrics_server = MetricsServer(
+                host=self.config.metrics.host,
+                port=self.config.metrics.port
+            )
+            await self.metrics_server.start()
+
+        await super().start(token, reconnect=reconnect)
+
+    async def close(self) -> None:
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+
+        await super().close()
+
+    async def login(self, token: str) -> None:
+        with StartupProfiler().phase('login'):
+            await super().login(token)
+
+    async def on_ready(self):
+        profiler = StartupProfiler()
+        if not profiler.reported:
+            profiler.mark('first ready')
+            profiler.report()
+
+        interval = self.config.sharding.latency_report_interval
+        if interval > 0 and self.latency_task is None:
+            self.latency_task = asyncio.create_task(self.report_latency(interval=interval))
+
+        interval = self.config.config_watch_interval
+        if interval > 0 and self.watch_task is None:
+            self.watch_task = asyncio.create_task(ConfigService().watch(interval=interval))
+
+    async def report_latency(self, interval: float) -> None:
+        """
+        Log the latencies of the shards periodically.
+
+        :param interval: Interval between the reports, in seconds.
+        :type interval: float
+        """
+        while not self.is_closed():
+            await asyncio.sleep(interval)
+
+            for shard_id, latency in self.shard_latencies:
+                # Latency is infinite until the first heartbeat is acknowledged
+                if math.isfinite(latency):
+                    self.logger.info('Shard(%d) latency: %.1fms', shard_id, latency * 1000)
+
     def run(self) -> None:
         loaded, failed = 0, 0
         for ext in self.config.extensions:
             try:
-                self.load_extension(ext)
+                with StartupProfiler().phase(f"load_extension '{ext}'"):
+                    self.load_extension(ext)
                 self.logger.info("Extension '%s' has been successfully loaded.", ext)
                 loaded += 1
             except (
@@ -58,3 +208,27 @@ class FukurouBot(Bot, Singleton, metaclass=FukurouMeta):
         )
 
         super().run(self.config.token)
+
+class FukurouBot(FukurouMixin, Bot, Singleton, metaclass=FukurouMeta):
+    pass
+
+class FukurouShardedBot(FukurouMixin, AutoShardedBot, Singleton, metaclass=FukurouMeta):
+    """
+    Fukurou bot running several shards in a single process.
+
+    If `shard_ids` is not given, it runs every shard, and the number of the shards
+    is taken from `shard_count` or recommended by Discord.
+    """
+    def __init__(self,
+                 config: BotConfig,
+                 shard_ids: list[int] | None = None,
+                 shard_count: int | None = None):
+        super().__init__(
+            config=config,
+            shard_ids=shard_ids,
+            shard_count=shard_count
+        )
+
+    @property
+    def shard_latencies(self) -> list[tuple[int, float]]:
+        return self.latencies
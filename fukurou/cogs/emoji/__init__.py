@@ -1,6 +1,14 @@
+from fukurou.configs import add_config_listener
 from .config import EmojiConfig
 from .cog import EmojiCog
+from .emojimanager import EmojiManager
+from .emojipareser import EmojiParser
 
 def setup(bot):
     bot.add_config(EmojiConfig)
+    add_config_listener(config=EmojiConfig, listener=EmojiParser.compile)
+
+    # Connect to the database and storage now, rather than on the first message
+    EmojiManager()
+
     bot.add_cog(EmojiCog(bot))
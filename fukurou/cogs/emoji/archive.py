@@ -0,0 +1,233 @@
+from datetime import datetime, timezone
+from typing import BinaryIO
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+from .downloader import sniff
+from .exceptions import EmojiFileTypeError
+
+# Bytes a zip archive takes for an entry besides its content and name, and for itself
+ENTRY_OVERHEAD = 100
+ARCHIVE_OVERHEAD = 22
+
+# Types of the Emoji files by their extensions in the archive
+ARCHIVE_FILETYPES = {
+    '.png': 'png',
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.gif': 'gif',
+    '.webp': 'webp',
+    '.bmp': 'bmp'
+}
+
+class ImportResult:
+    """
+    What happened to an entry of the archive.
+    """
+    __slots__ = ('entry', 'emoji_name', 'status', 'detail')
+
+    def __init__(self, entry: str, emoji_name: str | None, status: str, detail: str = '') -> None:
+        self.entry = entry
+        self.emoji_name = emoji_name
+        self.status = status
+        self.detail = detail
+
+    def __str__(self) -> str:
+        line = f'{self.status:<8} {self.entry}'
+        if self.detail:
+            line += f' ({self.detail})'
+
+        return line
+
+class ImportReport:
+    """
+    Results of an archive import, with its duration and throughput.
+    """
+    def __init__(self) -> None:
+        self.results: list[ImportResult] = []
+        self.elapsed = 0.0
+        self.bytes = 0
+
+    def add(self, entry: str, emoji_name: str | None, status: str, detail: str = '') -> None:
+        self.results.append(ImportResult(entry=entry, emoji_name=emoji_name, status=status, detail=detail))
+
+    @property
+    def imported(self) -> list[ImportResult]:
+        return [result for result in self.results if result.status == 'imported']
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.imported) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'Imported {len(self.imported)} of {len(self.results)} files '
+            f'in {self.elapsed:.1f} seconds '
+            f'({self.files_per_second:.1f} files/s, {self.bytes_per_second/1024:.1f}KB/s)'
+        )
+
+    def __str__(self) -> str:
+        return '\n'.join([self.summary(), '', *(str(result) for result in self.results)])
+
+def entry_name(info: zipfile.ZipInfo) -> tuple[str, str]:
+    """
+    Split the file name of the archive entry into the Emoji name and the extension,
+    ignoring the directories it's in.
+    """
+    emoji_name, extension = os.path.splitext(os.path.basename(info.filename))
+    return emoji_name, extension.lower()
+
+def read_entry(archive: zipfile.ZipFile,
+               info: zipfile.ZipInfo,
+               maxsize: int) -> tuple[bytes, str, str] | None:
+    """
+    Extract the entry and hash it, reading no more than `maxsize` bytes.
+    The type of the file is told from its content, as the extension can be anything.
+
+    :return: Content, its MD5 hash and its type, None if it's larger than `maxsize`.
+    :rtype: tuple[bytes, str, str] | None
+
+    :raises EmojiFileTypeError: If the entry is not a supported image.
+    """
+    # The size in the header can't be trusted, it's limited while reading
+    with archive.open(info) as f:
+        content = f.read(maxsize + 1)
+
+    if len(content) > maxsize:
+        return None
+
+    file_type = sniff(content)
+    if file_type is None:
+        raise EmojiFileTypeError(entry_name(info)[1].lstrip('.'))
+
+    return content, hashlib.md5(content).hexdigest(), file_type
+
+class ArchiveWriter:
+    """
+    Writer of zip archives split into parts of at most `part_size` bytes.
+
+    Each part is a complete archive in a temporary file, handed over once the next
+    entry doesn't fit in it. Only the entry being written is in memory, so it takes
+    the same memory no matter how many entries are written. An entry larger than
+    `part_size` gets a part of its own.
+
+    Images are compressed already, so they're stored as they are.
+    """
+    def __init__(self, part_size: int) -> None:
+        self.part_size = part_size
+        self.index = 0
+        self.file: BinaryIO | None = None
+        self.archive: zipfile.ZipFile | None = None
+        self.size = 0
+
+    def add(self, name: str, content: bytes | BinaryIO, compress: bool = False) -> BinaryIO | None:
+        """
+        Write an entry to the current part.
+        A file is copied from its start in chunks, not to read it into memory at once.
+
+        :return: The previous part, if it's finished to start a new one for the entry.
+        :rtype: BinaryIO | None
+        """
+        if isinstance(content, bytes):
+            size = len(content)
+        else:
+            size = content.seek(0, os.SEEK_END)
+            content.seek(0)
+
+        entry_size = size + 2 * len(name.encode('utf8')) + ENTRY_OVERHEAD
+
+        finished = None
+        if self.archive is not None and self.size + entry_size > self.part_size:
+            finished = self._finish()
+
+        if self.archive is None:
+            self._start()
+
+        compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        if isinstance(content, bytes):
+            self.archive.writestr(name, content, compress_type=compress_type)
+        else:
+            info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = compress_type
+            # Same permissions `writestr()` gives
+            info.external_attr = 0o600 << 16
+            with self.archive.open(info, 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as f:
+                shutil.copyfileobj(content, f)
+        self.size += entry_size
+
+        return finished
+
+    def close(self) -> BinaryIO | None:
+        """
+        Finish the current part.
+
+        :return: The last part, None if nothing has been written to it.
+        :rtype: BinaryIO | None
+        """
+        if self.archive is None:
+            return None
+
+        return self._finish()
+
+    def _start(self) -> None:
+        self.index += 1
+        self.file = tempfile.TemporaryFile()
+        self.archive = zipfile.ZipFile(self.file, 'w')
+        self.size = ARCHIVE_OVERHEAD
+
+    def _finish(self) -> BinaryIO:
+        self.archive.close()
+        self.file.seek(0)
+
+        finished = self.file
+        self.archive, self.file = None, None
+
+        return finished
+
+class ImportCheckpoint:
+    """
+    Progress of an import from the native Emojis of a guild, kept in a file.
+
+    Native Emojis are imported in the order of their ids, so the last id
+    imported is enough to resume from there.
+    """
+    def __init__(self, directory: str, guild_id: int) -> None:
+        self.logger = logging.getLogger('fukurou.emoji')
+        self.path = os.path.join(directory, f'native-{guild_id}.json')
+
+    def load(self) -> int:
+        """
+        Get the id of the last native Emoji imported, 0 if it's not been started.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf8') as f:
+                return int(json.load(f)['last_id'])
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning('Ignored the broken import checkpoint at %s: %s', self.path, e)
+            return 0
+
+    def save(self, last_id: int) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Replaced at once, so it's never left half written
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf8') as f:
+            json.dump({'last_id': last_id, 'updated_at': datetime.now(timezone.utc).isoformat()}, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,319 @@
+from datetime import datetime, timezone
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+
+from fukurou.configs import get_config
+from fukurou.metrics import histogram
+from .config import EmojiConfig
+from .database import BaseEmojiDatabase
+from .exceptions import EmojiError
+from .storage import BaseEmojiStorage
+
+BACKUP_SECONDS = histogram(
+    'fukurou_emoji_backup_seconds',
+    'Duration of the Emoji backups and restores.',
+    ('operation', 'result'),
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0)
+)
+
+DATABASE_FILE = 'emoji.db'
+IMAGES_DIRECTORY = 'images'
+MANIFEST_FILE = 'manifest.json'
+PARTIAL_SUFFIX = '.partial'
+
+class BackupReport:
+    """
+    What a backup or a restore has done, with its duration and size.
+    """
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.elapsed = 0.0
+        self.database_bytes = 0
+        self.copied = 0
+        self.copied_bytes = 0
+        self.linked = 0
+        self.linked_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.database_bytes + self.copied_bytes + self.linked_bytes
+
+    def summary(self) -> str:
+        return (
+            f'Snapshot {self.name} in {self.elapsed:.1f} seconds: '
+            f'database {self.database_bytes/1024:.1f}KB, '
+            f'{self.copied} files copied ({self.copied_bytes/1024:.1f}KB), '
+            f'{self.linked} unchanged ({self.linked_bytes/1024:.1f}KB), '
+            f'{self.total_bytes/1024:.1f}KB in total'
+        )
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'elapsed': self.elapsed,
+            'database_bytes': self.database_bytes,
+            'copied': self.copied,
+            'copied_bytes': self.copied_bytes,
+            'linked': self.linked,
+            'linked_bytes': self.linked_bytes
+        }
+
+class EmojiBackup:
+    """
+    Online backups of the Emoji database and the Emoji files.
+
+    Each backup is a snapshot directory named after the time it's started, with a
+    copy of the database, the files of each guild under `images/`, and `manifest.json`.
+    The database is copied by the database itself in a single read transaction, so
+    the copy is consistent. Writes made meanwhile don't wait for it, they're only
+    left out of the copy.
+
+    Files are named after their hashes, so a file in the previous snapshot is the same
+    as long as it's not been modified since. Those are hard-linked from the previous
+    snapshot and only the new ones are read from the storage. Every snapshot is still
+    complete on its own, so any of them can be deleted or restored.
+
+    The database is locked while it's restored, so `available` is cleared meanwhile
+    for the queries to wait on it.
+
+    A snapshot is written under a temporary name and renamed when it's finished.
+    Only `backup.retention` of the latest ones are kept.
+    """
+    def __init__(self, database: BaseEmojiDatabase | None, storage: BaseEmojiStorage | None) -> None:
+        self.logger = logging.getLogger('fukurou.emoji.backup')
+        self.database = database
+        self.storage = storage
+        self.last: BackupReport | None = None
+        # Snapshots are taken and restored one at a time
+        self.lock = asyncio.Lock()
+        # Cleared while the database is restored, as it's locked until it's finished
+        self.available = asyncio.Event()
+        self.available.set()
+
+    @property
+    def config(self) -> EmojiConfig.EmojiBackupConfig:
+        return get_config(config=EmojiConfig).backup
+
+    @property
+    def directory(self) -> str:
+        return os.path.abspath(self.config.directory)
+
+    def snapshots(self) -> list[str]:
+        """
+        Get the names of the finished snapshots, the oldest first.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        return sorted(name for name in names
+                      if os.path.isfile(os.path.join(self.directory, name, MANIFEST_FILE)))
+
+    async def backup(self, guild_ids: list[int]) -> BackupReport:
+        """
+        Take a snapshot of the database and the files of the guilds,
+        then delete the snapshots out of the retention.
+
+        :param guild_ids: Ids of the guilds to back the files up.
+        :type guild_ids: list[int]
+
+        :return: Report of the snapshot.
+        :rtype: BackupReport
+
+        :raises EmojiDatabaseError: If failed to copy the database.
+        :raises EmojiFileIOError: If failed to read the files.
+        :raises OSError: If failed to write the snapshot.
+        """
+        async with self.lock:
+            return await self._backup(guild_ids=guild_ids)
+
+    async def restore(self, name: str) -> tuple[BackupReport, list[int]]:
+        """
+        Replace the database with the snapshot, and save the files in the snapshot
+        that are missing in the storage. Files not in the snapshot are left as they are,
+        for the scrubber to quarantine.
+
+        :param name: Name of the snapshot.
+        :type name: str
+
+        :return: Report of the restore, and the ids of the guilds in the snapshot.
+        :rtype: tuple[BackupReport, list[int]]
+
+        :raises ValueError: If there's no such snapshot.
+        :raises EmojiDatabaseError: If failed to restore the database.
+        :raises EmojiFileIOError: If failed to save the files.
+        """
+        async with self.lock:
+            return await self._restore(name=name)
+
+    async def _backup(self, guild_ids: list[int]) -> BackupReport:
+        started = time.time()
+        name = datetime.fromtimestamp(started, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        report = BackupReport(name=name)
+
+        snapshots = self.snapshots()
+        previous = os.path.join(self.directory, snapshots[-1]) if snapshots else None
+        previous_started = self._started(previous) if previous is not None else 0.0
+
+        path = os.path.join(self.directory, name + PARTIAL_SUFFIX)
+        result = 'failed'
+        try:
+            await asyncio.to_thread(os.makedirs, os.path.join(path, IMAGES_DIRECTORY))
+
+            database_path = os.path.join(path, DATABASE_FILE)
+            await asyncio.to_thread(self.database.backup, path=database_path)
+            report.database_bytes = os.path.getsize(database_path)
+
+            for guild_id in guild_ids:
+                await asyncio.to_thread(self._snapshot_files,
+                                        guild_id=guild_id,
+                                        path=path,
+                                        previous=previous,
+                                        previous_started=previous_started,
+                                        report=report)
+
+            report.elapsed = time.time() - started
+            await asyncio.to_thread(self._finish, path=path, name=name, started=started, report=report)
+            result = 'ok'
+        finally:
+            BACKUP_SECONDS.observe(time.time() - started, operation='backup', result=result)
+            if result != 'ok':
+                await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+
+        self.last = report
+        self.logger.info('%s.', report.summary())
+
+        await asyncio.to_thread(self._expire)
+
+        return report
+
+    async def _restore(self, name: str) -> tuple[BackupReport, list[int]]:
+        if name not in self.snapshots():
+            raise ValueError('There is no such snapshot', name)
+
+        started = time.time()
+        path = os.path.join(self.directory, name)
+        report = BackupReport(name=name)
+
+        result = 'failed'
+        try:
+            database_path = os.path.join(path, DATABASE_FILE)
+            self.available.clear()
+            try:
+                await asyncio.to_thread(self.database.restore, path=database_path)
+            finally:
+                self.available.set()
+            report.database_bytes = os.path.getsize(database_path)
+
+            guild_ids = []
+            for guild_dir in os.listdir(os.path.join(path, IMAGES_DIRECTORY)):
+                guild_ids.append(int(guild_dir))
+                await asyncio.to_thread(self._restore_files,
+                                        guild_id=int(guild_dir),
+                                        path=path,
+                                        report=report)
+
+            result = 'ok'
+        finally:
+            BACKUP_SECONDS.observe(time.time() - started, operation='restore', result=result)
+
+        report.elapsed = time.time() - started
+        self.logger.warning('Restored the Emojis from the snapshot %s in %.1f seconds, %d files saved.',
+                            name, report.elapsed, report.copied)
+
+        return report, guild_ids
+
+    def _snapshot_files(self,
+                        guild_id: int,
+                        path: str,
+                        previous: str | None,
+                        previous_started: float,
+                        report: BackupReport) -> None:
+        files = self.storage.list_files(guild_id=guild_id)
+        if not files:
+            return
+
+        guild_dir = os.path.join(path, IMAGES_DIRECTORY, str(guild_id))
+        os.makedirs(guild_dir)
+
+        for file_name, modified in files.items():
+            target = os.path.join(guild_dir, file_name)
+
+            if previous is not None and modified < previous_started:
+                source = os.path.join(previous, IMAGES_DIRECTORY, str(guild_id), file_name)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    # Not in the previous snapshot, or links are not supported there
+                    pass
+                else:
+                    report.linked += 1
+                    report.linked_bytes += os.path.getsize(target)
+                    continue
+
+            try:
+                content = self.storage.read(guild_id=guild_id, file_name=file_name)
+            except EmojiError:
+                # Deleted since it's listed
+                continue
+
+            with open(target, 'wb') as f:
+                f.write(content)
+
+            report.copied += 1
+            report.copied_bytes += len(content)
+
+    def _restore_files(self, guild_id: int, path: str, report: BackupReport) -> None:
+        self.storage.register(guild_id=guild_id)
+        files = self.storage.list_files(guild_id=guild_id)
+
+        guild_dir = os.path.join(path, IMAGES_DIRECTORY, str(guild_id))
+        for file_name in os.listdir(guild_dir):
+            if file_name in files:
+                continue
+
+            with open(os.path.join(guild_dir, file_name), 'rb') as f:
+                content = f.read()
+
+            self.storage.save(guild_id=guild_id, file=content, file_name=file_name)
+            report.copied += 1
+            report.copied_bytes += len(content)
+
+    def _finish(self, path: str, name: str, started: float, report: BackupReport) -> None:
+        document = {
+            'started_at': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'started': started,
+            'report': report.to_json()
+        }
+        with open(os.path.join(path, MANIFEST_FILE), 'w', encoding='utf8') as f:
+            json.dump(document, f, indent=4)
+
+        os.replace(path, os.path.join(self.directory, name))
+
+    def _started(self, path: str) -> float:
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf8') as f:
+                return float(json.load(f)['started'])
+        except (OSError, ValueError, KeyError):
+            # Everything is copied again
+            return 0.0
+
+    def _expire(self) -> None:
+        for name in os.listdir(self.directory):
+            # Left over by a process stopped in the middle of a backup
+            if name.endswith(PARTIAL_SUFFIX):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+        retention = self.config.retention
+        if retention <= 0:
+            return
+
+        snapshots = self.snapshots()
+        for name in snapshots[:max(len(snapshots) - retention, 0)]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self.logger.info('Deleted the Emoji snapshot %s out of the retention.', name)
@@ -0,0 +1,8 @@
+from .base import BaseEmojiCache, MISSING
+from .factory import get_emoji_cache
+
+__all__ = [
+    'BaseEmojiCache',
+    'MISSING',
+    'get_emoji_cache'
+]
@@ -0,0 +1,270 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Final
+import logging
+import threading
+import time
+
+from fukurou.configs import get_config
+from fukurou.cogs.emoji.config import EmojiConfig
+
+MISSING: Final = object()
+"""
+Sentinel for a cache miss, as `None` is a valid cached value.
+"""
+
+class BaseEmojiCache(ABC):
+    """
+    Abstract class for caching Emoji metadata.
+
+    Every instance keeps a local copy of the entries, grouped by guild.
+    Entries of a guild are dropped all together by `invalidate()`, which is
+    also propagated to the other processes sharing the same cache.
+
+    Each invalidation of a guild moves it to the next generation, locally and in the
+    shared cache. A value loaded from the database is cached only if the generation
+    taken before the load is still the current one, so a value read before an
+    invalidation elsewhere is never cached after it.
+    """
+    def __init__(self) -> None:
+        self.logger = logging.getLogger('fukurou.emoji.cache')
+
+        self.local: OrderedDict[int, dict[str, tuple[Any, float]]] = OrderedDict()
+        self.local_size = 0
+        self.lock = threading.Lock()
+        self.listeners: list[Callable[[int], None]] = []
+        self.generations: dict[int, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connect()
+
+    @property
+    def config(self) -> EmojiConfig:
+        return get_config(config=EmojiConfig)
+
+    @abstractmethod
+    def _connect(self) -> None:
+        """
+        Make a connection to the shared cache.
+        This method will be called in `__init__()`.
+        """
+        raise NotImplementedError("BaseEmojiCache._connect() is not implemented!")
+
+    @abstractmethod
+    def _fetch(self, guild_id: int, key: str) -> Any:
+        """
+        Get the value from the shared cache.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param key: Key of the entry.
+        :type key: str
+
+        :return: Cached value, `MISSING` if there's no such.
+        :rtype: Any
+        """
+        raise NotImplementedError("BaseEmojiCache._fetch() is not implemented!")
+
+    @abstractmethod
+    def _generation(self, guild_id: int) -> Any:
+        """
+        Get the generation of the guild in the shared cache.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Anything `_store()` can compare with the generation it finds.
+        :rtype: Any
+        """
+        raise NotImplementedError("BaseEmojiCache._generation() is not implemented!")
+
+    @abstractmethod
+    def _store(self, guild_id: int, key: str, value: Any, generation: Any) -> bool:
+        """
+        Put the value to the shared cache, unless the guild is in another generation.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param key: Key of the entry.
+        :type key: str
+        :param value: Value to cache.
+        :type value: Any
+        :param generation: Generation from `_generation()` before the value is loaded.
+        :type generation: Any
+
+        :return: False if the guild has been invalidated since, True otherwise.
+        :rtype: bool
+        """
+        raise NotImplementedError("BaseEmojiCache._store() is not implemented!")
+
+    @abstractmethod
+    def _publish(self, guild_id: int) -> None:
+        """
+        Drop the entries of the guild from the shared cache,
+        and notify the other processes to drop their local entries.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        """
+        raise NotImplementedError("BaseEmojiCache._publish() is not implemented!")
+
+    def close(self) -> None:
+        """
+        Close the connection to the shared cache.
+        """
+
+    def get(self, guild_id: int, key: str) -> Any:
+        """
+        Get the cached value.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param key: Key of the entry.
+        :type key: str
+
+        :return: Cached value, `MISSING` if there's no such.
+        :rtype: Any
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            generation = self.generations.get(guild_id, 0)
+
+            entries = self.local.get(guild_id)
+            if entries is not None:
+                self.local.move_to_end(guild_id)
+
+                value, expires_at = entries.get(key, (MISSING, 0))
+                if value is not MISSING and expires_at > now:
+                    self.hits += 1
+                    return value
+
+        value = self._fetch(guild_id=guild_id, key=key)
+
+        with self.lock:
+            if value is MISSING:
+                self.misses += 1
+                return MISSING
+
+            self.hits += 1
+
+        self._put_local(guild_id=guild_id, key=key, value=value, generation=generation)
+
+        return value
+
+    def generation(self, guild_id: int) -> tuple[int, Any]:
+        """
+        Get the generation of the guild, to be taken before loading a value to `set()`.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Generation of the guild.
+        :rtype: tuple[int, Any]
+        """
+        with self.lock:
+            local = self.generations.get(guild_id, 0)
+
+        return local, self._generation(guild_id=guild_id)
+
+    def set(self, guild_id: int, key: str, value: Any, generation: tuple[int, Any]) -> None:
+        """
+        Put the value to the cache, unless the guild has been invalidated
+        since the generation was taken.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param key: Key of the entry.
+        :type key: str
+        :param value: Value to cache.
+        :type value: Any
+        :param generation: Generation from `generation()` before the value is loaded.
+        :type generation: tuple[int, Any]
+        """
+        local, shared = generation
+
+        if not self._store(guild_id=guild_id, key=key, value=value, generation=shared):
+            return
+
+        self._put_local(guild_id=guild_id, key=key, value=value, generation=local)
+
+    def invalidate(self, guild_id: int) -> None:
+        """
+        Drop every entry of the guild, in all processes.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        """
+        self._drop(guild_id=guild_id)
+        self._publish(guild_id=guild_id)
+
+    def guild_ids(self) -> list[int]:
+        """
+        Get the ids of the guilds with any local entry.
+
+        :return: Ids of the guilds.
+        :rtype: list[int]
+        """
+        with self.lock:
+            return list(self.local)
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Add a listener called with the guild id whenever its entries are invalidated,
+        either by this process or by the others.
+
+        :param listener: Callback function.
+        :type listener: Callable[[int], None]
+        """
+        self.listeners.append(listener)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def _put_local(self, guild_id: int, key: str, value: Any, generation: int | None = None) -> None:
+        expires_at = time.monotonic() + self.config.cache.ttl
+
+        with self.lock:
+            # Invalidated while the value was loaded
+            if generation is not None and generation != self.generations.get(guild_id, 0):
+                return
+
+            entries = self.local.setdefault(guild_id, {})
+            self.local.move_to_end(guild_id)
+
+            if key not in entries:
+                self.local_size += 1
+            entries[key] = (value, expires_at)
+
+            # Drop the least recently used guilds over the budget
+            while self.local_size > self.config.cache.max_entries and len(self.local) > 1:
+                _, dropped = self.local.popitem(last=False)
+                self.local_size -= len(dropped)
+
+    def _drop_all(self) -> None:
+        """
+        Drop every local entry, as if each guild is invalidated.
+        """
+        with self.lock:
+            guild_ids = set(self.local) | set(self.generations)
+
+        for guild_id in guild_ids:
+            self._drop(guild_id=guild_id)
+
+    def _drop(self, guild_id: int) -> None:
+        with self.lock:
+            self.generations[guild_id] = self.generations.get(guild_id, 0) + 1
+
+            dropped = self.local.pop(guild_id, None)
+            if dropped is not None:
+                self.local_size -= len(dropped)
+
+        for listener in self.listeners:
+            try:
+                listener(guild_id)
+            except Exception: # pylint: disable=broad-exception-caught
+                self.logger.error('Error occured in the Emoji cache listener.', exc_info=1)
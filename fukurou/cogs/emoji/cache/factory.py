@@ -0,0 +1,30 @@
+from .base import BaseEmojiCache
+from .memory import MemoryEmojiCache
+
+def get_emoji_cache(chtype: str) -> BaseEmojiCache | None:
+    """
+    Get a metadata cache for the Emoji.
+
+    :param chtype: Type of the cache in string. `none` disables the cache.
+    :type chtype: str
+
+    :return: Metadata cache, None if the cache is disabled.
+    :rtype: BaseEmojiCache | None
+
+    :raises ValueError: If the `chtype` is invalid cache, or its client is not installed.
+    """
+    match chtype:
+        case 'none':
+            return None
+        case 'memory':
+            return MemoryEmojiCache()
+        case 'redis':
+            # Client is optional, only required when Redis is in use
+            try:
+                from .rediscache import RedisEmojiCache
+            except ImportError as e:
+                raise ValueError('Cannot import client for the cache', e.name) from e
+
+            return RedisEmojiCache()
+
+    raise ValueError('There is no such cache', chtype)
@@ -0,0 +1,35 @@
+from typing import Any
+import weakref
+
+from .base import BaseEmojiCache, MISSING
+
+class MemoryEmojiCache(BaseEmojiCache):
+    """
+    In-process Emoji metadata cache.
+
+    There is no shared cache behind the local entries. Invalidations are
+    delivered to every other instance in the process, which lets a single
+    process stand in for several bot processes sharing a cache.
+    """
+    instances: weakref.WeakSet = weakref.WeakSet()
+
+    def _connect(self):
+        MemoryEmojiCache.instances.add(self)
+
+    def _fetch(self, guild_id: int, key: str) -> Any:
+        return MISSING
+
+    def _generation(self, guild_id: int) -> Any:
+        return None
+
+    def _store(self, guild_id: int, key: str, value: Any, generation: Any) -> bool:
+        # Invalidations are delivered right away, the local generation covers it
+        return True
+
+    def _publish(self, guild_id: int) -> None:
+        for instance in list(MemoryEmojiCache.instances):
+            if instance is not self:
+                instance._drop(guild_id=guild_id)
+
+    def close(self) -> None:
+        MemoryEmojiCache.instances.discard(self)
@@ -0,0 +1,179 @@
+from typing import Any
+import json
+import time
+import uuid
+import redis
+
+from fukurou.cogs.emoji.data import Emoji
+from .base import BaseEmojiCache, MISSING
+
+class RedisEmojiCache(BaseEmojiCache):
+    """
+    Emoji metadata cache shared through Redis.
+
+    Entries of a guild are stored in a single hash, so they can be dropped at once.
+    Invalidations are published on `cache.channel`, every subscribed process
+    drops its local entries of the guild as soon as the message arrives.
+
+    Every guild has a generation counter next to its hash, increased with each
+    invalidation. The counter never expires, so a value is written to the hash only
+    while the counter is the same as before the value was loaded from the database.
+
+    Redis errors are logged and treated as cache misses, the database is
+    always the source of truth.
+
+    Invalidations published while the subscription is lost are never delivered, so
+    the local entries are dropped when it's lost and again once it's back. The worker
+    tries to subscribe again every `cache.reconnect_interval` seconds.
+    """
+    def _connect(self):
+        self.origin = uuid.uuid4().hex
+        self.client = None
+        self.worker = None
+
+        cache_config = self.config.cache
+        try:
+            self.client = redis.Redis.from_url(cache_config.url,
+                                               socket_timeout=cache_config.socket_timeout,
+                                               socket_connect_timeout=cache_config.socket_connect_timeout)
+
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{cache_config.channel: self._on_message})
+            self.worker = pubsub.run_in_thread(sleep_time=1.0,
+                                               daemon=True,
+                                               exception_handler=self._on_error)
+        except redis.RedisError as e:
+            self.logger.error('Cannot connect to the Emoji cache: %s', e.args)
+
+            # Every operation is skipped as a miss from now on
+            if self.client is not None:
+                self.client.close()
+            self.client = None
+            return
+
+        self.logger.info('Connected to the Emoji cache.')
+
+    def _key(self, guild_id: int) -> str:
+        return f'{self.config.cache.channel}:{guild_id}'
+
+    def _generation_key(self, guild_id: int) -> str:
+        return f'{self.config.cache.channel}:{guild_id}:generation'
+
+    def _fetch(self, guild_id: int, key: str) -> Any:
+        if self.client is None:
+            return MISSING
+
+        try:
+            raw = self.client.hget(self._key(guild_id=guild_id), key)
+        except redis.RedisError:
+            self.logger.warning('Cannot read from the Emoji cache.', exc_info=1)
+            return MISSING
+
+        return MISSING if raw is None else self._decode(raw)
+
+    def _generation(self, guild_id: int) -> Any:
+        if self.client is None:
+            return None
+
+        try:
+            return self.client.get(self._generation_key(guild_id=guild_id))
+        except redis.RedisError:
+            self.logger.warning('Cannot read from the Emoji cache.', exc_info=1)
+            return None
+
+    def _store(self, guild_id: int, key: str, value: Any, generation: Any) -> bool:
+        if self.client is None:
+            return True
+
+        generation_key = self._generation_key(guild_id=guild_id)
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(generation_key)
+                if pipe.get(generation_key) != generation:
+                    return False
+
+                pipe.multi()
+                pipe.hset(self._key(guild_id=guild_id), key, self._encode(value))
+                pipe.expire(self._key(guild_id=guild_id), self.config.cache.ttl)
+                pipe.execute()
+        except redis.WatchError:
+            # Invalidated in the meantime
+            return False
+        except redis.RedisError:
+            self.logger.warning('Cannot write to the Emoji cache.', exc_info=1)
+
+        return True
+
+    def _publish(self, guild_id: int) -> None:
+        if self.client is None:
+            return
+
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.delete(self._key(guild_id=guild_id))
+                pipe.incr(self._generation_key(guild_id=guild_id))
+                pipe.publish(self.config.cache.channel, f'{self.origin}:{guild_id}')
+                pipe.execute()
+        except redis.RedisError:
+            self.logger.warning('Cannot publish invalidation to the Emoji cache.', exc_info=1)
+
+    def _on_message(self, message: dict) -> None:
+        origin, guild_id = message['data'].decode().split(':')
+
+        # Local entries are already dropped by `invalidate()`
+        if origin != self.origin:
+            self._drop(guild_id=int(guild_id))
+
+    def _on_error(self,
+                  error: BaseException,
+                  pubsub: redis.client.PubSub,
+                  worker: redis.client.PubSubWorkerThread) -> None:
+        if not isinstance(error, redis.RedisError):
+            # Error of the handler, the subscription itself is still alive
+            self.logger.error('Error occured in the Emoji cache subscription.', exc_info=error)
+            return
+
+        self.logger.warning('Lost the Emoji cache subscription: %s', error.args)
+        self._drop_all()
+
+        time.sleep(self.config.cache.reconnect_interval)
+        if self.worker is not worker:
+            # Closed meanwhile
+            return
+
+        try:
+            # Subscribed again to the channel on the new connection
+            pubsub.connection.connect()
+        except redis.RedisError:
+            # The next read fails again and calls this once more
+            return
+
+        # Entries loaded while the subscription was lost may be stale already
+        self._drop_all()
+        self.logger.info('Subscribed to the Emoji cache again.')
+
+    def close(self) -> None:
+        worker, self.worker = self.worker, None
+        if worker is not None:
+            worker.stop()
+
+        if self.client is not None:
+            self.client.close()
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if isinstance(value, Emoji):
+            entry = list(value.to_entry())
+            entry[4] = entry[4].isoformat()
+            return json.dumps({'emoji': entry})
+
+        return json.dumps({'value': value})
+
+    @staticmethod
+    def _decode(raw: bytes) -> Any:
+        obj = json.loads(raw)
+
+        if 'emoji' in obj:
+            return Emoji.from_entry(entry=tuple(obj['emoji']))
+
+        return obj['value']
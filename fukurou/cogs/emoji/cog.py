@@ -1,17 +1,43 @@
 # pylint: disable=C0114,C0115,C0116
 from typing import Any
+import asyncio
+import io
 import logging
+import time
 import discord
 from discord.ext import commands
 
+from fukurou.metrics import counter, gauge, histogram
+from .cooldown import EmojiCooldown
+from .downloader import EmojiDownloader
 from .emojimanager import EmojiManager
 from .emojipareser import EmojiParser
+from .sender import EmojiSender
 from .views import (
     EmojiEmbed,
     EmojiErrorEmbed,
     EmojiListPage
 )
 
+MESSAGES_SCANNED = counter(
+    'fukurou_emoji_messages_scanned_total',
+    'Messages scanned for the Emoji expression.'
+)
+MESSAGES_MATCHED = counter(
+    'fukurou_emoji_messages_matched_total',
+    'Messages matched with an existing Emoji.'
+)
+MESSAGES_LIMITED = counter(
+    'fukurou_emoji_messages_limited_total',
+    'Emoji expressions ignored by the cooldown.',
+    ('scope',)
+)
+ON_EMOJI_SECONDS = histogram(
+    'fukurou_emoji_on_emoji_seconds',
+    'End-to-end latency of sending a matched Emoji.',
+    ('result',)
+)
+
 # Decorator for checking permission
 def emoji_managable():
     def predicate(ctx: discord.ApplicationContext):
@@ -24,10 +50,31 @@ class EmojiCog(commands.Cog):
         description='Command group for managing custom emoji.',
         guild_only=True
     )
+    constraint_commands = emoji_commands.create_subgroup(
+        name='constraint',
+        description='Command group for managing Emoji constraints of the servers.'
+    )
+    database_commands = emoji_commands.create_subgroup(
+        name='database',
+        description='Command group for inspecting the Emoji database.'
+    )
 
     def __init__(self, bot):
         self.bot = bot
         self.logger = logging.getLogger('fukurou.emoji')
+        self.warmup_task = None
+        self.warmup_progress = (0, 0)
+        self.compact_task = None
+        self.scrub_task = None
+        self.backup_task = None
+        self.sender = EmojiSender(bot)
+        self.cooldown = EmojiCooldown()
+
+        gauge(
+            'fukurou_emoji_cooldown_buckets',
+            'Token buckets held by the Emoji cooldown.',
+            collect=lambda: [({}, len(self.cooldown))]
+        )
 
     @emoji_commands.command(
         name='add',
@@ -69,6 +116,141 @@ class EmojiCog(commands.Cog):
             )
         )
 
+    @emoji_commands.command(
+        name='add-url',
+        description='Add a custom emoji to the server from the URL of the image.'
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='name',
+        description='Name of the emoji.',
+        required=True
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='url',
+        description='URL of the image of the emoji.',
+        required=True
+    )
+    @emoji_managable()
+    async def add_url(self,
+                      ctx: discord.ApplicationContext,
+                      name: str,
+                      url: str):
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        await EmojiManager().add_url(
+            guild_id=ctx.guild.id,
+            uploader=ctx.author.id,
+            emoji_name=name,
+            url=url
+        )
+
+        emoji = await EmojiManager().run(EmojiManager().get, guild_id=ctx.guild.id, emoji_name=name)
+        # The file may be fetched into the storage cache first
+        file_loc = await asyncio.to_thread(EmojiManager().get_file_loc, guild_id=ctx.guild.id, emoji=emoji)
+
+        await ctx.followup.send(
+            file=discord.File(
+                fp=file_loc,
+                filename=emoji.file_name
+            ),
+            embed=EmojiEmbed(
+                description=f'**{name}** is uploaded!',
+                image_url=f'attachment://{emoji.file_name}',
+                author=ctx.author
+            )
+        )
+
+    @emoji_commands.command(
+        name='import',
+        description='Add the custom emojis in a zip archive to the server.'
+    )
+    @discord.commands.option(
+        input_type=discord.Attachment,
+        name='file',
+        description='Zip archive of the emoji images, named after the emojis.',
+        required=True
+    )
+    @emoji_managable()
+    async def import_archive(self,
+                             ctx: discord.ApplicationContext,
+                             file: discord.Attachment):
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        report = await EmojiManager().import_archive(
+            guild_id=ctx.guild.id,
+            uploader=ctx.author.id,
+            attachment=file
+        )
+
+        await ctx.followup.send(
+            file=discord.File(fp=io.BytesIO(str(report).encode('utf8')), filename='import.txt'),
+            embed=EmojiEmbed(
+                description=f'{report.summary()}!',
+                author=ctx.author
+            )
+        )
+
+    @emoji_commands.command(
+        name='import-native',
+        description='Add the custom emojis of the server as emojis.'
+    )
+    @emoji_managable()
+    async def import_native(self, ctx: discord.ApplicationContext):
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        message = await ctx.followup.send(
+            f'Importing {len(ctx.guild.emojis)} emojis...',
+            ephemeral=True,
+            wait=True
+        )
+
+        async def progress(done: int, total: int):
+            await message.edit(content=f'Importing emojis... `{done}/{total}`')
+
+        report = await EmojiManager().import_native(
+            guild_id=ctx.guild.id,
+            uploader=ctx.author.id,
+            emojis=list(ctx.guild.emojis),
+            progress=progress
+        )
+
+        await ctx.followup.send(
+            file=discord.File(fp=io.BytesIO(str(report).encode('utf8')), filename='import.txt'),
+            embed=EmojiEmbed(
+                description=f'{report.summary()}!',
+                author=ctx.author
+            ),
+            ephemeral=True
+        )
+
+    @emoji_commands.command(
+        name='export',
+        description='Export the custom emojis of the server as zip archives.'
+    )
+    @emoji_managable()
+    async def export_archive(self, ctx: discord.ApplicationContext):
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        parts = 0
+        async for part in EmojiManager().export_archive(guild_id=ctx.guild.id):
+            parts += 1
+            with part:
+                await ctx.followup.send(
+                    file=discord.File(fp=part, filename=f'emoji-{ctx.guild.id}-{parts}.zip'),
+                    ephemeral=True
+                )
+
+        await ctx.followup.send(
+            embed=EmojiEmbed(description=f'Emojis are exported in {parts} archives!'),
+            ephemeral=True
+        )
+
     @emoji_commands.command(
         name="delete",
         description="Delete the emoji from the server."
@@ -83,7 +265,7 @@ class EmojiCog(commands.Cog):
     async def delete(self,
                      ctx: discord.ApplicationContext,
                      name: str):
-        EmojiManager().delete(guild_id=ctx.guild.id, emoji_name=name)
+        await EmojiManager().run(EmojiManager().delete, guild_id=ctx.guild.id, emoji_name=name)
 
         await ctx.respond(
             embed=EmojiEmbed(description=f'**{name}** has been deleted!')
@@ -110,17 +292,20 @@ class EmojiCog(commands.Cog):
                      ctx: discord.ApplicationContext,
                      old_name: str,
                      new_name: str):
-        EmojiManager().rename(
+        await EmojiManager().run(
+            EmojiManager().rename,
             guild_id=ctx.guild.id,
             old_name=old_name,
             new_name=new_name
         )
 
-        emoji = EmojiManager().get(guild_id=ctx.guild.id, emoji_name=new_name)
+        emoji = await EmojiManager().run(EmojiManager().get, guild_id=ctx.guild.id, emoji_name=new_name)
+        # The file may be fetched into the storage cache first
+        file_loc = await asyncio.to_thread(EmojiManager().get_file_loc, guild_id=ctx.guild.id, emoji=emoji)
 
         await ctx.respond(
             file=discord.File(
-                fp=EmojiManager().get_file_loc(guild_id=ctx.guild.id, emoji=emoji),
+                fp=file_loc,
                 filename=emoji.file_name
             ),
             embed=EmojiEmbed(
@@ -181,7 +366,8 @@ class EmojiCog(commands.Cog):
         required=False
     )
     async def list(self, ctx: discord.ApplicationContext, keyword: str):
-        emoji_list = EmojiManager().list(
+        emoji_list = await EmojiManager().run(
+            EmojiManager().list,
             user_id=ctx.author.id,
             guild_id=ctx.guild.id,
             keyword=keyword
@@ -201,66 +387,396 @@ class EmojiCog(commands.Cog):
                 ephemeral=True
             )
 
+    @emoji_commands.command(
+        name='top',
+        description='Show the most used emojis in the server.'
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='period',
+        description='Period to rank the emojis over.',
+        required=False,
+        default='hot',
+        choices=['hot', 'day', 'week', 'month', 'all']
+    )
+    @discord.commands.option(
+        input_type=discord.Member,
+        name='user',
+        description='Rank the emojis used by this user only.',
+        required=False
+    )
+    async def top(self,
+                  ctx: discord.ApplicationContext,
+                  period: str,
+                  user: discord.Member):
+        if period == 'hot' and user is not None:
+            await ctx.respond('Hot ranking is not available for a user, choose a period!',
+                              ephemeral=True)
+            return
+
+        ranking = await EmojiManager().run(
+            EmojiManager().top,
+            guild_id=ctx.guild.id,
+            period=period,
+            user_id=None if user is None else user.id
+        )
+        if not ranking:
+            await ctx.respond('No emoji has been used in the period!', ephemeral=True)
+            return
+
+        if period == 'hot':
+            lines = [f'{i}. **{name}** `{score:.1f}`' for i, (name, score) in enumerate(ranking, 1)]
+        else:
+            lines = [f'{i}. **{name}** `{count}`' for i, (name, count) in enumerate(ranking, 1)]
+
+        await ctx.respond(
+            embed=EmojiEmbed(
+                title=f'Top emojis ({period})',
+                description='\n'.join(lines),
+                author=user
+            ),
+            ephemeral=True
+        )
+
+    @constraint_commands.command(
+        name='set',
+        description='Set the Emoji constraint of the server.'
+    )
+    @discord.commands.option(
+        input_type=int,
+        name='capacity',
+        description='Maximum number of the Emojis, -1 for unlimited.',
+        required=True,
+        min_value=-1
+    )
+    @discord.commands.option(
+        input_type=int,
+        name='maxsize',
+        description='Maximum size of the Emoji file in KB.',
+        required=True,
+        min_value=1
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='guild_id',
+        description='Id of the server, this server if not given.',
+        required=False
+    )
+    @commands.is_owner()
+    async def set_constraint(self,
+                             ctx: discord.ApplicationContext,
+                             capacity: int,
+                             maxsize: int,
+                             guild_id: str):
+        guild_id = ctx.guild.id if guild_id is None else int(guild_id)
+
+        await EmojiManager().run(EmojiManager().set_constraint,
+                                 guild_id=guild_id, capacity=capacity, maxsize=maxsize)
+
+        await ctx.respond(
+            embed=EmojiEmbed(
+                description=(
+                    f'Constraint of the server `{guild_id}` is set!\n'
+                    f'Capacity: `{capacity}`, Max size: `{maxsize}KB`'
+                )
+            ),
+            ephemeral=True
+        )
+
+    @constraint_commands.command(
+        name='reset',
+        description='Reset the Emoji constraint of the server to the default.'
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='guild_id',
+        description='Id of the server, this server if not given.',
+        required=False
+    )
+    @commands.is_owner()
+    async def reset_constraint(self, ctx: discord.ApplicationContext, guild_id: str):
+        guild_id = ctx.guild.id if guild_id is None else int(guild_id)
+
+        await EmojiManager().run(EmojiManager().reset_constraint, guild_id=guild_id)
+        constraint = EmojiManager().constraints[guild_id]
+
+        await ctx.respond(
+            embed=EmojiEmbed(
+                description=(
+                    f'Constraint of the server `{guild_id}` is reset!\n'
+                    f'Capacity: `{constraint.capacity}`, Max size: `{constraint.maxsize}KB`'
+                )
+            ),
+            ephemeral=True
+        )
+
+    @database_commands.command(
+        name='stats',
+        description='Show the latency percentiles of the Emoji database statements.'
+    )
+    @commands.is_owner()
+    async def database_stats(self, ctx: discord.ApplicationContext):
+        summary = EmojiManager().database.query_stats.summary()
+        if not summary:
+            await ctx.respond('No statement has been executed yet!', ephemeral=True)
+            return
+
+        width = max(len(item.method) for item in summary)
+        lines = [f'{"method":<{width}} {"count":>8} {"p50":>9} {"p95":>9} {"p99":>9}']
+        for item in summary:
+            lines.append(
+                f'{item.method:<{width}} {item.count:>8} '
+                f'{item.p50:>7.2f}ms {item.p95:>7.2f}ms {item.p99:>7.2f}ms'
+            )
+
+        await ctx.respond('```\n' + '\n'.join(lines) + '\n```', ephemeral=True)
+
+    @database_commands.command(
+        name='scrub',
+        description='Show the progress of the Emoji storage scrub.'
+    )
+    @commands.is_owner()
+    async def database_scrub(self, ctx: discord.ApplicationContext):
+        scrubber = EmojiManager().scrubber
+        if scrubber.started is None:
+            await ctx.respond('The Emoji storage has not been scrubbed yet!', ephemeral=True)
+            return
+
+        if scrubber.running:
+            status = f'Running for {time.time() - scrubber.started:.0f} seconds'
+        else:
+            status = f'Finished in {scrubber.finished - scrubber.started:.0f} seconds'
+
+        lines = [
+            f'{status}: {scrubber.guilds_done}/{scrubber.guilds_total} guilds, '
+            f'{scrubber.files_checked} files checked, {scrubber.quarantined} quarantined'
+        ]
+        for guild_id, names in scrubber.dangling.items():
+            lines.append(f'Guild({guild_id}) missing files: {", ".join(names)}')
+
+        # Long lists are cut, the full ones are in the log
+        await ctx.respond('```\n' + '\n'.join(lines)[:1900] + '\n```', ephemeral=True)
+
+    @database_commands.command(
+        name='backup',
+        description='Take a snapshot of the Emoji database and files now.'
+    )
+    @commands.is_owner()
+    async def database_backup(self, ctx: discord.ApplicationContext):
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        guild_ids = sorted(guild.id for guild in self.bot.guilds)
+        report = await EmojiManager().backup(guild_ids=guild_ids)
+
+        await ctx.followup.send(embed=EmojiEmbed(description=report.summary()), ephemeral=True)
+
+    @database_commands.command(
+        name='restore',
+        description='Restore the Emoji database and the missing files from a snapshot.'
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='snapshot',
+        description='Name of the snapshot, the latest one if not given.',
+        required=False
+    )
+    @commands.is_owner()
+    async def database_restore(self, ctx: discord.ApplicationContext, snapshot: str):
+        snapshots = EmojiManager().backups.snapshots()
+        if not snapshots:
+            await ctx.respond('There is no snapshot to restore!', ephemeral=True)
+            return
+
+        if snapshot is None:
+            snapshot = snapshots[-1]
+        elif snapshot not in snapshots:
+            await ctx.respond(
+                f'There is no snapshot `{snapshot}`! Snapshots: `{", ".join(snapshots)}`',
+                ephemeral=True
+            )
+            return
+
+        # This task can take longer than 3 seconds
+        await ctx.defer(ephemeral=True)
+
+        report = await EmojiManager().restore(name=snapshot)
+
+        await ctx.followup.send(
+            embed=EmojiEmbed(
+                description=(
+                    f'Restored from the snapshot `{snapshot}` in {report.elapsed:.1f} seconds, '
+                    f'{report.copied} missing files saved.'
+                )
+            ),
+            ephemeral=True
+        )
+
     @commands.Cog.listener('on_message')
     async def on_emoji(self, message: discord.Message):
         # Filter message from itself
         if message.author.id == self.bot.user.id:
             return
 
-        emoji_name = EmojiParser.parse(text=message.content)
-        if emoji_name is None:
+        started = time.perf_counter()
+        MESSAGES_SCANNED.inc()
+
+        config = EmojiManager().config.expression
+        if config.mode == 'inline':
+            tokens = EmojiParser.scan(text=message.content)[:config.max_emojis]
+        else:
+            emoji_name = EmojiParser.parse(text=message.content)
+            tokens = [] if emoji_name is None else [(message.content, emoji_name)]
+
+        if not tokens:
             return
 
-        emoji = EmojiManager().get(guild_id=message.guild.id, emoji_name=emoji_name)
-        if emoji is None:
+        scope = self.cooldown.acquire(
+            guild_id=message.guild.id,
+            channel_id=message.channel.id,
+            user_id=message.author.id
+        )
+        if scope is not None:
+            MESSAGES_LIMITED.inc(scope=scope)
             return
 
-        try:
-            await message.delete()
-
-            # Must have MANAGE_WEBHOOKS permission!
-            webhook = await message.channel.create_webhook(name=message.author.name)
-            await webhook.send(
-                username=message.author.display_name,
-                avatar_url=message.author.display_avatar.url,
-                file=discord.File(
-                    fp=EmojiManager().get_file_loc(guild_id=message.guild.id, emoji=emoji),
-                    filename=emoji.file_name
-                )
-            )
+        found = await EmojiManager().run(
+            EmojiManager().get_many,
+            guild_id=message.guild.id,
+            emoji_names=[emoji_name for _, emoji_name in tokens]
+        )
+        if not found:
+            return
 
-            await webhook.delete()
-        except discord.Forbidden:
-            # Send embedded Emoji when there's no permission to create webhook.
-            await message.channel.send(
-                file=discord.File(
-                    fp=EmojiManager().get_file_loc(guild_id=message.guild.id, emoji=emoji),
-                    filename=emoji.file_name
-                ),
-                embed=EmojiEmbed(
-                    image_url=f'attachment://{emoji.file_name}',
-                    author=message.author
-                )
-            )
-        except discord.DiscordException as e:
-            self.logger.error('Cannot send emoji to the user(%d): %s', message.author.id, e.args)
-        else:
+        MESSAGES_MATCHED.inc()
+
+        # Names differ only in the spaces can be the same Emoji
+        emojis = list({emoji.emoji_name: emoji for emoji in found.values()}.values())
+
+        # Expressions of the Emojis found are taken out, the others are sent as they are
+        content = message.content
+        for expression, emoji_name in tokens:
+            if emoji_name in found:
+                content = content.replace(expression, '')
+        content = content.strip() or None
+
+        result = await self.sender.send(message=message, emojis=emojis, content=content)
+        if result == 'webhook':
             # Increase usecount when sending emoji succeed
-            EmojiManager().increase_usecount(
-                guild_id=message.guild.id,
-                user_id=message.author.id,
-                emoji_name=emoji_name
-            )
+            for emoji in emojis:
+                await EmojiManager().run(
+                    EmojiManager().increase_usecount,
+                    guild_id=message.guild.id,
+                    user_id=message.author.id,
+                    emoji_name=emoji.emoji_name
+                )
+
+        ON_EMOJI_SECONDS.observe(time.perf_counter() - started, result=result)
 
     @commands.Cog.listener('on_ready')
     async def load_guild_emoji(self):
-        for guild in self.bot.guilds:
-            EmojiManager().register(guild_id=guild.id)
+        # Guilds are registered lazily on first use, warm-up only prepares them ahead.
+        # on_ready fires again after each reconnect, so it's started only once.
+        if self.warmup_task is not None or not EmojiManager().config.warmup.enabled:
+            return
+
+        self.warmup_task = asyncio.create_task(self.warmup())
+
+    async def warmup(self):
+        config = EmojiManager().config.warmup
+        guild_ids = [guild.id for guild in self.bot.guilds]
+        total = len(guild_ids)
+        started = time.perf_counter()
+        reported = 0
+
+        self.logger.info('Emoji warm-up started for %d guilds.', total)
+
+        for start in range(0, total, config.batch_size):
+            batch = guild_ids[start:start + config.batch_size]
+
+            # Keep file system calls off the event loop
+            await asyncio.to_thread(EmojiManager().warmup, guild_ids=batch)
+            # The SQLite connection may not be shared with the other threads
+            await EmojiManager().run(EmojiManager().warmup_usage, guild_ids=batch)
+
+            done = start + len(batch)
+            self.warmup_progress = (done, total)
+
+            # Report on every 10 percent
+            if done * 10 // total > reported:
+                reported = done * 10 // total
+                self.logger.info('Emoji warm-up progress: %d/%d guilds', done, total)
+
+            await asyncio.sleep(config.interval)
+
+        self.logger.info('Emoji warm-up finished for %d guilds in %.1f seconds.',
+                         total, time.perf_counter() - started)
+
+    @commands.Cog.listener('on_ready')
+    async def start_usage_compaction(self):
+        if self.compact_task is not None:
+            return
+
+        self.compact_task = asyncio.create_task(self.compact_usage())
+
+    async def compact_usage(self):
+        while True:
+            # Rolled up in a single transaction over the indexed buckets
+            try:
+                await EmojiManager().run(EmojiManager().compact_usage)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error('Failed to compact the Emoji usage history: %s', e.args)
+
+            await asyncio.sleep(EmojiManager().config.usage.compact_interval)
+
+    @commands.Cog.listener('on_ready')
+    async def start_scrub(self):
+        if self.scrub_task is not None or not EmojiManager().config.scrub.enabled:
+            return
+
+        self.scrub_task = asyncio.create_task(self.scrub())
+
+    async def scrub(self):
+        while True:
+            # In the order of the ids, guilds joined in the meantime wait for the next pass
+            guild_ids = sorted(guild.id for guild in self.bot.guilds)
+            await EmojiManager().scrubber.run(guild_ids=guild_ids)
+
+            await asyncio.sleep(EmojiManager().config.scrub.cycle_interval)
+
+    @commands.Cog.listener('on_ready')
+    async def start_backup(self):
+        if self.backup_task is not None or not EmojiManager().config.backup.enabled:
+            return
+
+        self.backup_task = asyncio.create_task(self.backup())
+
+    async def backup(self):
+        while True:
+            # Taken after the interval, not on start, so restarts don't pile them up
+            await asyncio.sleep(EmojiManager().config.backup.interval)
+
+            guild_ids = sorted(guild.id for guild in self.bot.guilds)
+            try:
+                await EmojiManager().backup(guild_ids=guild_ids)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error('Failed to back the Emojis up: %s', e.args)
 
     @commands.Cog.listener('on_guild_join')
     async def init_guild_emoji(self, guild: discord.Guild):
         EmojiManager().register(guild_id=guild.id)
 
+    def cog_unload(self):
+        if self.compact_task is not None:
+            self.compact_task.cancel()
+        if self.scrub_task is not None:
+            self.scrub_task.cancel()
+        if self.backup_task is not None:
+            self.backup_task.cancel()
+
+        asyncio.create_task(self.sender.close())
+        asyncio.create_task(EmojiDownloader().close())
+
     async def cog_command_error(self, ctx: discord.ApplicationContext, error: Any):
         try:
             await ctx.response.send_message(
@@ -1,5 +1,6 @@
 #pylint: disable=C0114,C0115
 import os
+import re
 from typing import Any
 
 from fukurou.configs import BaseConfig
@@ -14,6 +15,15 @@ class EmojiConfig(BaseConfig):
         self.constraints = None
         self.database = None
         self.storage = None
+        self.cache = None
+        self.warmup = None
+        self.sender = None
+        self.cooldown = None
+        self.usage = None
+        self.archive = None
+        self.download = None
+        self.scrub = None
+        self.backup = None
 
         super().__init__(defcon_dir=__file__)
 
@@ -22,6 +32,32 @@ class EmojiConfig(BaseConfig):
         self.constraints = self.EmojiConstraintsConfig(json_obj['constraints'])
         self.database = self.EmojiDatabaseConfig(json_obj['database'])
         self.storage = self.EmojiStorageConfig(json_obj['storage'])
+        self.cache = self.EmojiCacheConfig(json_obj.get('cache', {}))
+        self.warmup = self.EmojiWarmupConfig(json_obj.get('warmup', {}))
+        self.sender = self.EmojiSenderConfig(json_obj.get('sender', {}))
+        self.cooldown = self.EmojiCooldownConfig(json_obj.get('cooldown', {}))
+        self.usage = self.EmojiUsageConfig(json_obj.get('usage', {}))
+        self.archive = self.EmojiArchiveConfig(json_obj.get('archive', {}))
+        self.download = self.EmojiDownloadConfig(json_obj.get('download', {}))
+        self.scrub = self.EmojiScrubConfig(json_obj.get('scrub', {}))
+        self.backup = self.EmojiBackupConfig(json_obj.get('backup', {}))
+
+    def validate(self) -> None:
+        for pattern in (self.expression.name_pattern, self.expression.pattern):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError('Invalid expression pattern', pattern, e.msg) from e
+
+        if self.sender.burst_mode not in ('none', 'drop', 'collapse'):
+            raise ValueError('There is no such burst mode', self.sender.burst_mode)
+
+        if self.expression.mode not in ('whole', 'inline'):
+            raise ValueError('There is no such expression mode', self.expression.mode)
+
+        # Discord takes up to 10 attachments in a message
+        if not 1 <= self.expression.max_emojis <= 10:
+            raise ValueError('Invalid number of Emojis per message', self.expression.max_emojis)
 
     class EmojiExpressionConfig:
         def __init__(self, json_obj: dict[Any]):
@@ -30,6 +66,9 @@ class EmojiConfig(BaseConfig):
             self.closing = json_obj['closing']
             self.ignore_spaces = json_obj['ignore_spaces']
             self.pattern = f'^{self.opening}{self.name_pattern}{self.closing}$'
+            # `whole` for a message of an expression only, `inline` for any in a message
+            self.mode = json_obj.get('mode', 'whole')
+            self.max_emojis = json_obj.get('max_emojis', 4)
 
     class EmojiConstraintsConfig:
         class EmojiConstraintConfig:
@@ -48,7 +87,7 @@ class EmojiConfig(BaseConfig):
             try:
                 return self.__overrides[key]
             except KeyError:
-                return self.__default_value[key]
+                return self.__default_value
 
     class EmojiDatabaseConfig:
         def __init__(self, json_obj: dict[Any]):
@@ -56,8 +95,132 @@ class EmojiConfig(BaseConfig):
             self.file = json_obj['file']
             self.directory = json_obj['directory']
             self.path = os.path.abspath(os.path.join(self.directory, self.file))
+            self.dsn = json_obj.get('dsn', '')
+            self.pool_min_size = json_obj.get('pool_min_size', 1)
+            self.pool_max_size = json_obj.get('pool_max_size', 10)
+            self.slow_query_threshold = json_obj.get('slow_query_threshold', 100)
+            self.query_stats_window = json_obj.get('query_stats_window', 1000)
 
     class EmojiStorageConfig:
         def __init__(self, json_obj: dict[Any]):
             self.type = json_obj['type']
             self.directory = json_obj['directory']
+            self.cache = self.EmojiStorageCacheConfig(json_obj.get('cache', {}))
+
+        class EmojiStorageCacheConfig:
+            def __init__(self, json_obj: dict[Any]):
+                self.enabled = json_obj.get('enabled', False)
+                self.directory = json_obj.get('directory', './cache')
+                self.max_size = json_obj.get('max_size', 262144)
+
+    class EmojiCacheConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.type = json_obj.get('type', 'none')
+            self.url = json_obj.get('url', 'redis://localhost:6379/0')
+            self.channel = json_obj.get('channel', 'fukurou:emoji')
+            self.ttl = json_obj.get('ttl', 300)
+            self.max_entries = json_obj.get('max_entries', 100000)
+            # In seconds, a slow cache is a miss rather than a stall
+            self.socket_timeout = json_obj.get('socket_timeout', 1.0)
+            self.socket_connect_timeout = json_obj.get('socket_connect_timeout', 1.0)
+            # In seconds, between the attempts to subscribe again after a disconnection
+            self.reconnect_interval = json_obj.get('reconnect_interval', 5.0)
+
+    class EmojiWarmupConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled = json_obj.get('enabled', False)
+            self.batch_size = json_obj.get('batch_size', 50)
+            self.interval = json_obj.get('interval', 1.0)
+
+    class EmojiSenderConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.concurrency = json_obj.get('concurrency', 32)
+            self.burst_threshold = json_obj.get('burst_threshold', 20)
+            self.burst_mode = json_obj.get('burst_mode', 'none')
+            self.webhook_name = json_obj.get('webhook_name', 'Fukurou')
+
+    class EmojiCooldownConfig:
+        class EmojiCooldownLimitsConfig:
+            class EmojiCooldownLimitConfig:
+                def __init__(self, json_obj: dict[Any]):
+                    self.rate = json_obj['rate']
+                    self.burst = json_obj['burst']
+
+            def __init__(self, json_obj: dict[Any], default=None):
+                # Scopes missing in an override are taken from the default
+                self.user = self.__limit(json_obj, 'user', default, {'rate': 0.5, 'burst': 5})
+                self.channel = self.__limit(json_obj, 'channel', default, {'rate': 2, 'burst': 10})
+                self.guild = self.__limit(json_obj, 'guild', default, {'rate': 5, 'burst': 30})
+
+            def __limit(self, json_obj: dict[Any], scope: str, default, fallback: dict[Any]):
+                if scope in json_obj:
+                    return self.EmojiCooldownLimitConfig(json_obj[scope])
+                if default is not None:
+                    return getattr(default, scope)
+
+                return self.EmojiCooldownLimitConfig(fallback)
+
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled = json_obj.get('enabled', False)
+            self.expire_interval = json_obj.get('expire_interval', 60)
+
+            self.__default_value = self.EmojiCooldownLimitsConfig(json_obj)
+            self.__overrides: dict[int, self.EmojiCooldownLimitsConfig] = {}
+
+            for o in json_obj.get('overrides', []):
+                self.__overrides[o['guild_id']] = self.EmojiCooldownLimitsConfig(
+                    o, default=self.__default_value
+                )
+
+        def __getitem__(self, key: int) -> EmojiCooldownLimitsConfig:
+            try:
+                return self.__overrides[key]
+            except KeyError:
+                return self.__default_value
+
+    class EmojiUsageConfig:
+        def __init__(self, json_obj: dict[Any]):
+            # In seconds, the monthly buckets are kept forever with 0
+            self.hourly_retention = json_obj.get('hourly_retention', 172800)
+            self.daily_retention = json_obj.get('daily_retention', 7776000)
+            self.monthly_retention = json_obj.get('monthly_retention', 0)
+            self.compact_interval = json_obj.get('compact_interval', 3600)
+            self.hot_half_life = json_obj.get('hot_half_life', 86400)
+            self.leaderboard_size = json_obj.get('leaderboard_size', 500)
+
+    class EmojiArchiveConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.concurrency = json_obj.get('concurrency', 8)
+            self.max_entries = json_obj.get('max_entries', 1000)
+            # In KB, of the archive to import
+            self.max_size = json_obj.get('max_size', 51200)
+            # In bytes, to fit in a Discord attachment
+            self.part_size = json_obj.get('part_size', 8388608)
+            self.batch_size = json_obj.get('batch_size', 50)
+            self.checkpoint_directory = json_obj.get('checkpoint_directory', './checkpoints')
+
+    class EmojiDownloadConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.pool_size = json_obj.get('pool_size', 16)
+            # In seconds
+            self.connect_timeout = json_obj.get('connect_timeout', 5)
+            self.read_timeout = json_obj.get('read_timeout', 10)
+            self.retries = json_obj.get('retries', 3)
+            self.backoff = json_obj.get('backoff', 0.5)
+
+    class EmojiScrubConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled = json_obj.get('enabled', False)
+            # In seconds
+            self.interval = json_obj.get('interval', 5.0)
+            self.grace_period = json_obj.get('grace_period', 3600)
+            self.cycle_interval = json_obj.get('cycle_interval', 86400)
+            self.files_per_second = json_obj.get('files_per_second', 200)
+
+    class EmojiBackupConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled = json_obj.get('enabled', False)
+            self.directory = json_obj.get('directory', './backups')
+            # In seconds
+            self.interval = json_obj.get('interval', 86400)
+            self.retention = json_obj.get('retention', 7)
@@ -0,0 +1,80 @@
+import logging
+
+from fukurou.configs import get_config
+from .config import EmojiConfig
+from .database import BaseEmojiDatabase
+
+EmojiConstraint = EmojiConfig.EmojiConstraintsConfig.EmojiConstraintConfig
+
+class EmojiConstraints:
+    """
+    Per-guild constraints of the Emoji.
+
+    A constraint stored in the database takes precedence over the overrides
+    in the config, which take precedence over the default. Database lookups
+    are cached per guild, including the guilds without any constraint, so
+    every lookup after the first one is a single dict access.
+    """
+    def __init__(self, database: BaseEmojiDatabase | None) -> None:
+        self.logger = logging.getLogger('fukurou.emoji')
+        self.database = database
+        self.entries: dict[int, EmojiConstraint | None] = {}
+
+    def __getitem__(self, guild_id: int) -> EmojiConstraint:
+        try:
+            constraint = self.entries[guild_id]
+        except KeyError:
+            constraint = self.entries[guild_id] = self._load(guild_id=guild_id)
+
+        if constraint is None:
+            config: EmojiConfig = get_config(config=EmojiConfig)
+            return config.constraints[guild_id]
+
+        return constraint
+
+    def set(self, guild_id: int, capacity: int, maxsize: int) -> None:
+        """
+        Set the constraint of the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param capacity: Maximum number of the Emojis, -1 for unlimited.
+        :type capacity: int
+        :param maxsize: Maximum size of the Emoji file in KB.
+        :type maxsize: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.database.set_constraint(guild_id=guild_id, capacity=capacity, maxsize=maxsize)
+        self.entries[guild_id] = EmojiConstraint({'capacity': capacity, 'maxsize': maxsize})
+
+    def reset(self, guild_id: int) -> None:
+        """
+        Delete the constraint of the guild, so the config applies again.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.database.delete_constraint(guild_id=guild_id)
+        self.entries[guild_id] = None
+
+    def invalidate(self, guild_id: int) -> None:
+        """
+        Drop the cached constraint of the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        """
+        self.entries.pop(guild_id, None)
+
+    def _load(self, guild_id: int) -> EmojiConstraint | None:
+        if self.database is None:
+            return None
+
+        row = self.database.get_constraint(guild_id=guild_id)
+        if row is None:
+            return None
+
+        return EmojiConstraint({'capacity': row[0], 'maxsize': row[1]})
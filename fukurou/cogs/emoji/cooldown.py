@@ -0,0 +1,142 @@
+import time
+
+from fukurou.configs import get_config
+from .config import EmojiConfig
+
+EmojiCooldownLimit = EmojiConfig.EmojiCooldownConfig.EmojiCooldownLimitsConfig.EmojiCooldownLimitConfig
+
+class TokenBucket:
+    """
+    Tokens left, when they were counted and when the bucket will be full again.
+    Refilled lazily when it's taken from.
+    """
+    __slots__ = ('tokens', 'updated', 'full_at')
+
+    def __init__(self, tokens: float, updated: float, full_at: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+        self.full_at = full_at
+
+class CooldownBuckets:
+    """
+    Token buckets of a scope, such as the users or the channels.
+
+    A bucket refilled to the full is the same as a new one, so it's dropped
+    by `expire()` and only the recently active keys take memory.
+    """
+    def __init__(self) -> None:
+        self.buckets: dict[int | tuple[int, int], TokenBucket] = {}
+
+    def peek(self, key, limit: EmojiCooldownLimit, now: float) -> bool:
+        """
+        Refill the bucket and check if a token can be taken, without taking it.
+        """
+        if limit.burst <= 0:
+            return True
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return True
+
+        bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+        bucket.updated = now
+
+        return bucket.tokens >= 1
+
+    def take(self, key, limit: EmojiCooldownLimit, now: float) -> None:
+        """
+        Take a token from the bucket. It must be checked with `peek()` in advance.
+        """
+        if limit.burst <= 0:
+            return
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(tokens=limit.burst, updated=now, full_at=now)
+
+        bucket.tokens -= 1
+        if limit.rate > 0:
+            bucket.full_at = now + (limit.burst - bucket.tokens) / limit.rate
+        else:
+            bucket.full_at = float('inf')
+
+    def expire(self, now: float) -> None:
+        """
+        Drop the buckets which are full again.
+        """
+        expired = [key for key, bucket in self.buckets.items() if bucket.full_at <= now]
+        for key in expired:
+            del self.buckets[key]
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+class EmojiCooldown:
+    """
+    Per-user, per-channel and per-guild token bucket limits of the Emoji expressions.
+
+    Limits are read from `cooldown` of the config on each check, overridden per guild,
+    so a reloaded config applies to the existing buckets right away. Everything is
+    in memory and checked on the event loop, without any I/O.
+    """
+    def __init__(self) -> None:
+        self.users = CooldownBuckets()
+        self.channels = CooldownBuckets()
+        self.guilds = CooldownBuckets()
+        self.expired_at = time.monotonic()
+
+    @property
+    def config(self) -> EmojiConfig.EmojiCooldownConfig:
+        return get_config(config=EmojiConfig).cooldown
+
+    def acquire(self, guild_id: int, channel_id: int, user_id: int) -> str | None:
+        """
+        Take a token from each bucket of the user, the channel and the guild.
+        Nothing is taken unless all of them have one.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param channel_id: Id of the channel.
+        :type channel_id: int
+        :param user_id: Id of the user.
+        :type user_id: int
+
+        :return: Scope of the limit reached, one of `user`, `channel` and `guild`.
+        None if the tokens are taken.
+        :rtype: str | None
+        """
+        config = self.config
+        if not config.enabled:
+            return None
+
+        now = time.monotonic()
+        if now - self.expired_at > config.expire_interval:
+            self.expire(now=now)
+
+        limits = config[guild_id]
+        scopes = (
+            ('user', self.users, (guild_id, user_id), limits.user),
+            ('channel', self.channels, channel_id, limits.channel),
+            ('guild', self.guilds, guild_id, limits.guild)
+        )
+
+        for scope, buckets, key, limit in scopes:
+            if not buckets.peek(key, limit, now):
+                return scope
+
+        for _, buckets, key, limit in scopes:
+            buckets.take(key, limit, now)
+
+        return None
+
+    def expire(self, now: float) -> None:
+        """
+        Drop the buckets which are full again.
+        """
+        self.expired_at = now
+
+        for buckets in (self.users, self.channels, self.guilds):
+            buckets.expire(now=now)
+
+    def __len__(self) -> int:
+        return len(self.users) + len(self.channels) + len(self.guilds)
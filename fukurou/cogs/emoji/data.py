@@ -1,8 +1,21 @@
 from __future__ import annotations
+from array import array
 from datetime import datetime, timezone
-from typing import Tuple
+from typing import Iterator, Tuple
+
+def to_datetime(value: datetime | str) -> datetime:
+    """
+    Convert a database value into `datetime`.
+    Some drivers return `datetime` as is, while others return ISO 8601 string.
+    """
+    if isinstance(value, datetime):
+        return value
+
+    return datetime.fromisoformat(value)
 
 class Emoji:
+    __slots__ = ('__guild_id', '__emoji_name', '__uploader_id', '__file_name', '__created_at')
+
     @property
     def guild_id(self) -> int:
         return self.__guild_id
@@ -28,12 +41,12 @@ class Emoji:
                  emoji_name: str,
                  uploader_id: int,
                  file_name: str,
-                 created_at: datetime = datetime.now(timezone.utc)) -> None:
+                 created_at: datetime | None = None) -> None:
         self.__guild_id = guild_id
         self.__emoji_name = emoji_name
         self.__uploader_id = uploader_id
         self.__file_name = file_name
-        self.__created_at = created_at
+        self.__created_at = created_at if created_at is not None else datetime.now(timezone.utc)
 
     @classmethod
     def from_entry(cls, entry: Tuple) -> Emoji | None:
@@ -46,7 +59,7 @@ class Emoji:
                 emoji_name=entry[1],
                 uploader_id=int(entry[2]),
                 file_name=entry[3],
-                created_at=datetime.fromisoformat(entry[4])
+                created_at=to_datetime(entry[4])
             )
         except ValueError:
             return None
@@ -57,6 +70,9 @@ class Emoji:
         return (self.guild_id, self.emoji_name, self.uploader_id, self.file_name, self.created_at)
 
 class EmojiListItem:
+    __slots__ = ('__emoji_name', '__uploader_id', '__created_at', '__user_use_count',
+                 '__guild_use_count')
+
     @property
     def emoji_name(self) -> str:
         return self.__emoji_name
@@ -67,7 +83,8 @@ class EmojiListItem:
 
     @property
     def created_at(self) -> datetime:
-        return self.__created_at
+        # Kept as the database returned it, most of the items are never displayed
+        return to_datetime(self.__created_at)
 
     @property
     def user_use_count(self) -> int:
@@ -78,46 +95,98 @@ class EmojiListItem:
         return self.__guild_use_count
 
     def __init__(self, entry: Tuple) -> None:
-        if not isinstance(entry, Tuple):
-            return
-
-        try:
-            self.__emoji_name = entry[0]
-            self.__uploader_id = int(entry[1])
-            self.__created_at = datetime.fromisoformat(entry[2])
-            self.__user_use_count = int(entry[3])
-            self.__guild_use_count = int(entry[4])
-        except ValueError:
-            return
-        except TypeError:
-            return
+        self.__emoji_name = entry[0]
+        self.__uploader_id = int(entry[1])
+        self.__created_at = entry[2]
+        self.__user_use_count = int(entry[3])
+        self.__guild_use_count = int(entry[4])
 
 class EmojiList:
+    """
+    List of the Emojis in the guild, with the use counts of the owner and the guild.
+
+    Rows are stored by column, the ids and the counts in arrays of 64-bit integers,
+    and an `EmojiListItem` is made only when the row is accessed. It can be iterated
+    any number of times, sorted by a column and sliced into a new `EmojiList`.
+    """
+    COLUMNS = ('emoji_name', 'uploader_id', 'created_at', 'user_use_count', 'guild_use_count')
+
     @property
     def owner_id(self) -> int:
         return self.__owner_id
 
     def __init__(self, owner_id: int, entries: list[Tuple]) -> None:
         self.__owner_id = owner_id
-        self.__cur = -1
-        self.__data = []
-
-        for e in entries:
-            self.__data.append(EmojiListItem(entry=e))
-
-    def __len__(self):
-        return len(self.__data)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self) -> EmojiListItem:
-        self.__cur += 1
-
-        if self.__cur < len(self.__data):
-            return self.__data[self.__cur]
-
-        raise StopIteration
 
-    def __getitem__(self, key) -> EmojiListItem:
-        return self.__data[key]
+        columns = tuple(zip(*entries)) or ((), (), (), (), ())
+        self.__names: list[str] = list(columns[0])
+        self.__uploader_ids = array('q', map(int, columns[1]))
+        self.__created_at: list[datetime | str] = list(columns[2])
+        self.__user_use_counts = array('q', map(int, columns[3]))
+        self.__guild_use_counts = array('q', map(int, columns[4]))
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __iter__(self) -> Iterator[EmojiListItem]:
+        for index in range(len(self.__names)):
+            yield self.__row(index)
+
+    def __getitem__(self, key: int | slice) -> EmojiListItem | EmojiList:
+        if isinstance(key, slice):
+            return self.__take(range(len(self.__names))[key])
+
+        return self.__row(range(len(self.__names))[key])
+
+    def sort(self, key: str = 'emoji_name', reverse: bool = False) -> None:
+        """
+        Sort the rows in place by a column.
+
+        :param key: Name of the column, one of `EmojiList.COLUMNS`.
+        :type key: str
+        :param reverse: If it's set to True, sort in descending order.
+        :type reverse: bool
+
+        :raises ValueError: If there is no such column.
+        """
+        match key:
+            case 'emoji_name':
+                column = self.__names
+            case 'uploader_id':
+                column = self.__uploader_ids
+            case 'created_at':
+                column = [to_datetime(value) for value in self.__created_at]
+            case 'user_use_count':
+                column = self.__user_use_counts
+            case 'guild_use_count':
+                column = self.__guild_use_counts
+            case _:
+                raise ValueError('There is no such column', key)
+
+        order = sorted(range(len(column)), key=column.__getitem__, reverse=reverse)
+        sorted_list = self.__take(order)
+
+        self.__names = sorted_list.__names
+        self.__uploader_ids = sorted_list.__uploader_ids
+        self.__created_at = sorted_list.__created_at
+        self.__user_use_counts = sorted_list.__user_use_counts
+        self.__guild_use_counts = sorted_list.__guild_use_counts
+
+    def __row(self, index: int) -> EmojiListItem:
+        return EmojiListItem(entry=(
+            self.__names[index],
+            self.__uploader_ids[index],
+            self.__created_at[index],
+            self.__user_use_counts[index],
+            self.__guild_use_counts[index]
+        ))
+
+    def __take(self, indices) -> EmojiList:
+        taken = EmojiList(owner_id=self.__owner_id, entries=[])
+        taken.__names = [self.__names[i] for i in indices]
+        taken.__uploader_ids = array('q', (self.__uploader_ids[i] for i in indices))
+        taken.__created_at = [self.__created_at[i] for i in indices]
+        taken.__user_use_counts = array('q', (self.__user_use_counts[i] for i in indices))
+        taken.__guild_use_counts = array('q', (self.__guild_use_counts[i] for i in indices))
+
+        return taken
@@ -1,7 +1,10 @@
 from .base import BaseEmojiDatabase
 from .factory import get_emoji_database
+from .querystats import QueryStats, QueryStatsItem
 
 __all__ = [
     'BaseEmojiDatabase',
-    'get_emoji_database'
+    'get_emoji_database',
+    'QueryStats',
+    'QueryStatsItem'
 ]
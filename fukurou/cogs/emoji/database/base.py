@@ -1,19 +1,70 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from functools import wraps
 import logging
+import time
 
 from fukurou.configs import get_config
+from fukurou.metrics import histogram
+from fukurou.profiler import StartupProfiler
 from fukurou.cogs.emoji.data import Emoji, EmojiList
 from fukurou.cogs.emoji.config import EmojiConfig
+from .querystats import QueryStats
+
+QUERY_SECONDS = histogram(
+    'fukurou_emoji_database_query_seconds',
+    'Latency of the Emoji database operations.',
+    ('backend', 'method')
+)
+
+# Length of the usage history buckets, in seconds
+HOUR = 3600
+DAY = 86400
+
+# Name of the database method being executed, statements are keyed by it
+current_method: ContextVar[str | None] = ContextVar('current_method', default=None)
+
+def timed_query(func):
+    """
+    Observe the latency of the database operation.
+    It can be used as a decorator `@timed_query` to the method.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        token = current_method.set(func.__name__)
+        started = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - started,
+                                  backend=type(self).__name__, method=func.__name__)
+            current_method.reset(token)
+    return wrapper
 
 class BaseEmojiDatabase(ABC):
     """
     Abstract class to communicate with the Emoji database.
     """
+    threadsafe: bool = False
+    """
+    Whether the database can be called from any thread. If it can, the Emoji manager
+    calls it from the worker threads, not to block the event loop with the queries.
+    """
+
     def __init__(self) -> None:
         self.logger = logging.getLogger('fukurou.emoji.database')
-        self.config: EmojiConfig = get_config(config=EmojiConfig)
-        self._connect()
-        self._init_tables()
+        self.query_stats = QueryStats(window=self.config.database.query_stats_window)
+
+        profiler = StartupProfiler()
+        with profiler.phase(f'{type(self).__name__}._connect'):
+            self._connect()
+        with profiler.phase(f'{type(self).__name__}._init_tables'):
+            self._init_tables()
+
+    @property
+    def config(self) -> EmojiConfig:
+        return get_config(config=EmojiConfig)
 
     @abstractmethod
     def _connect(self) -> None:
@@ -76,6 +127,21 @@ class BaseEmojiDatabase(ABC):
         """
         raise NotImplementedError("BaseEmojiDatabase.get() is not implemented!")
 
+    @abstractmethod
+    def get_many(self, guild_id: int, emoji_names: list[str]) -> list[Emoji]:
+        """
+        Get Emoji objects of the names within the database, in a single query.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_names: Names of the Emojis.
+        :type emoji_names: list[str]
+
+        :return: Emoji objects found, in no particular order.
+        :rtype: list[Emoji]
+        """
+        raise NotImplementedError("BaseEmojiDatabase.get_many() is not implemented!")
+
     @abstractmethod
     def add(self, guild_id: int, uploader_id: int, emoji_name: str, file_name: str) -> None:
         """
@@ -94,6 +160,23 @@ class BaseEmojiDatabase(ABC):
         """
         raise NotImplementedError("BaseEmojiDatabase.add() is not implemented!")
 
+    @abstractmethod
+    def add_many(self, guild_id: int, uploader_id: int, entries: list[tuple[str, str]]) -> None:
+        """
+        Add Emoji data to the database in a single transaction.
+        Nothing is added if any of them fails.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param uploader_id: Id of the uploader.
+        :type uploader_id: int
+        :param entries: List of `(emoji_name, file_name)`.
+        :type entries: list[tuple[str, str]]
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.add_many() is not implemented!")
+
     @abstractmethod
     def delete(self, guild_id: int, emoji_name: str) -> None:
         """
@@ -176,6 +259,24 @@ class BaseEmojiDatabase(ABC):
         """
         raise NotImplementedError("BaseEmojiDatabase.count() is not implemented!")
 
+    @abstractmethod
+    def export(self, guild_id: int, after: str | None = None, limit: int | None = None) -> list[tuple[Emoji, int]]:
+        """
+        Get the Emojis in the guild with their use counts, in the order of the names.
+        A large guild can be read in pages, each one after the last name of the previous.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param after: Name to get the Emojis after, None from the first.
+        :type after: str | None
+        :param limit: Maximum number of the Emojis, None for all of them.
+        :type limit: int | None
+
+        :return: List of `(emoji, use_count)`.
+        :rtype: list[tuple[Emoji, int]]
+        """
+        raise NotImplementedError("BaseEmojiDatabase.export() is not implemented!")
+
     @abstractmethod
     def increase_usecount(self, guild_id: int, user_id: int, emoji_name: str) -> None:
         """
@@ -191,3 +292,125 @@ class BaseEmojiDatabase(ABC):
         :raises EmojiDatabaseError: If database operation failed.
         """
         raise NotImplementedError("BaseEmojiDatabase.increase_usecount() is not implemented!")
+
+    @abstractmethod
+    def get_constraint(self, guild_id: int) -> tuple[int, int] | None:
+        """
+        Get the constraint overriding the default for the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Tuple of `(capacity, maxsize)`, None if there's no such.
+        :rtype: tuple[int, int] | None
+        """
+        raise NotImplementedError("BaseEmojiDatabase.get_constraint() is not implemented!")
+
+    @abstractmethod
+    def set_constraint(self, guild_id: int, capacity: int, maxsize: int) -> None:
+        """
+        Set the constraint overriding the default for the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param capacity: Maximum number of the Emojis, -1 for unlimited.
+        :type capacity: int
+        :param maxsize: Maximum size of the Emoji file in KB.
+        :type maxsize: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.set_constraint() is not implemented!")
+
+    @abstractmethod
+    def delete_constraint(self, guild_id: int) -> None:
+        """
+        Delete the constraint of the guild, so the default applies again.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.delete_constraint() is not implemented!")
+
+    @abstractmethod
+    def top_usage(self,
+                  guild_id: int,
+                  since: int | None,
+                  user_id: int | None = None,
+                  limit: int = 10) -> list[tuple[str, int]]:
+        """
+        Get the most used Emojis in the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param since: Epoch seconds to count the usage from, None for all time.
+        :type since: int | None
+        :param user_id: Id of the user to count the usage of, None for everyone.
+        :type user_id: int | None
+        :param limit: Maximum number of the Emojis.
+        :type limit: int
+
+        :return: List of `(emoji_name, use_count)`, the most used first.
+        :rtype: list[tuple[str, int]]
+        """
+        raise NotImplementedError("BaseEmojiDatabase.top_usage() is not implemented!")
+
+    @abstractmethod
+    def usage_history(self, guild_id: int, since: int) -> list[tuple[str, int, int]]:
+        """
+        Get the usage of the Emojis in the guild per time bucket.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param since: Epoch seconds to get the buckets from.
+        :type since: int
+
+        :return: List of `(emoji_name, bucket, use_count)`.
+        :rtype: list[tuple[str, int, int]]
+        """
+        raise NotImplementedError("BaseEmojiDatabase.usage_history() is not implemented!")
+
+    @abstractmethod
+    def compact_usage(self, hourly_before: int, daily_before: int, monthly_before: int | None) -> None:
+        """
+        Roll the hourly buckets up into the daily ones, and the daily ones into the monthly ones.
+
+        :param hourly_before: Hourly buckets before this epoch seconds are rolled up.
+        :type hourly_before: int
+        :param daily_before: Daily buckets before this epoch seconds are rolled up.
+        :type daily_before: int
+        :param monthly_before: Monthly buckets before this epoch seconds are deleted,
+        None to keep them forever.
+        :type monthly_before: int | None
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.compact_usage() is not implemented!")
+
+    @abstractmethod
+    def backup(self, path: str) -> None:
+        """
+        Copy the database to the file while it's in use.
+        It may be called from the other threads.
+
+        :param path: Path of the backup file.
+        :type path: str
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.backup() is not implemented!")
+
+    @abstractmethod
+    def restore(self, path: str) -> None:
+        """
+        Replace the contents of the database with the backup file.
+        It may be called from the other threads.
+
+        :param path: Path of the backup file.
+        :type path: str
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        raise NotImplementedError("BaseEmojiDatabase.restore() is not implemented!")
@@ -11,10 +11,18 @@ def get_emoji_database(dbtype: str) -> BaseEmojiDatabase:
     :return: Database connector.
     :rtype: BaseEmojiDatabase
 
-    :raises ValueError: If the `dbtype` is invalid database.
+    :raises ValueError: If the `dbtype` is invalid database, or its driver is not installed.
     """
     match dbtype:
         case 'sqlite':
             return EmojiSqlite()
+        case 'postgresql':
+            # Driver is optional, only required when PostgreSQL is in use
+            try:
+                from .postgres import EmojiPostgres
+            except ImportError as e:
+                raise ValueError('Cannot import driver for the database', e.name) from e
+
+            return EmojiPostgres()
 
     raise ValueError('There is no such database', dbtype)
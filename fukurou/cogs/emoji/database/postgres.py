@@ -0,0 +1,432 @@
+from __future__ import annotations
+import os
+import time
+import psycopg
+from psycopg_pool import ConnectionPool
+
+from fukurou.cogs.emoji.data import Emoji, EmojiList
+from fukurou.cogs.emoji.exceptions import EmojiDatabaseError
+from .base import DAY, HOUR, BaseEmojiDatabase, timed_query
+from .sqlite import WILDCARDS
+
+class EmojiPostgres(BaseEmojiDatabase):
+    """
+    PostgreSQL backend for the Emoji database.
+
+    Connections are drawn from a thread-safe pool sized by `database.pool_min_size`
+    and `database.pool_max_size`, so the database can be shared by several processes.
+    Every statement is prepared on the server side.
+
+    Queries are round trips to the server, so they're called from the worker threads.
+    """
+    threadsafe = True
+
+    def _connect(self):
+        self.pool = None
+
+        pool = ConnectionPool(
+            conninfo=self.config.database.dsn,
+            min_size=self.config.database.pool_min_size,
+            max_size=self.config.database.pool_max_size,
+            open=False
+        )
+        try:
+            pool.open()
+            pool.wait()
+        except psycopg.Error as e:
+            # Including `PoolTimeout` if the server cannot be reached
+            self.logger.error('Cannot connect to the Emoji database: %s', e.args)
+            # Or it keeps trying to connect in the background
+            pool.close()
+            return
+
+        self.pool = pool
+
+        self.logger.info('Connected to the Emoji database.')
+
+    def _init_tables(self):
+        if self.pool is None:
+            return
+
+        script_relpath = os.path.join('script', 'postgres_table_init.sql')
+        script_path = os.path.join(os.path.dirname(__file__), script_relpath)
+        self.logger.debug('Emoji table initialization script found at: %s', script_path)
+
+        try:
+            with open(script_path, 'r', encoding='utf8') as file:
+                script = file.read()
+
+            with self.pool.connection() as conn:
+                conn.execute(script)
+        except IOError as e:
+            self.logger.error('Error occured while reading initialization script for Emoji databse: %s',
+                              e.strerror)
+        except psycopg.Error as e:
+            self.logger.error('Error occured while executing script for Emoji databse: %s',
+                              e.args)
+        else:
+            self.logger.info('Successfully initialized Emoji database.')
+
+    def _fetchone(self, query: str, param: tuple) -> tuple | None:
+        with self.pool.connection() as conn:
+            return conn.execute(query, param, prepare=True).fetchone()
+
+    def _fetchall(self, query: str, param: tuple) -> list[tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute(query, param, prepare=True).fetchall()
+
+    def _update(self, query: str, param: tuple) -> None:
+        # The connection commits on exit, or rolls back if an error is raised
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(query, param, prepare=True)
+        except psycopg.Error as e:
+            raise EmojiDatabaseError(*e.args) from e
+
+    def _update_all(self, statements: list[tuple[str, tuple]]) -> None:
+        # Statements share the connection, so they are committed together
+        try:
+            with self.pool.connection() as conn:
+                for query, param in statements:
+                    conn.execute(query, param, prepare=True)
+        except psycopg.Error as e:
+            raise EmojiDatabaseError(*e.args) from e
+
+    @timed_query
+    def exists(self, guild_id: int, emoji_name: str) -> bool:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_name = emoji_name.replace(' ', '')
+
+        query = f'SELECT 1 FROM emoji WHERE guild_id=%s AND {param_emoji_name}=%s'
+
+        return self._fetchone(query, (guild_id, emoji_name)) is not None
+
+    @timed_query
+    def file_exists(self, guild_id: int, file_name: str) -> str | None:
+        query = 'SELECT emoji_name FROM emoji WHERE guild_id=%s AND file_name=%s'
+
+        data = self._fetchone(query, (guild_id, file_name))
+
+        return None if data is None else data[0]
+
+    @timed_query
+    def get(self, guild_id: int, emoji_name: str) -> Emoji | None:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_name = emoji_name.replace(' ', '')
+
+        query = f"""
+            SELECT guild_id, emoji_name, uploader_id, file_name, created_at
+            FROM emoji WHERE guild_id=%s AND {param_emoji_name}=%s"""
+
+        data = self._fetchone(query, (guild_id, emoji_name))
+
+        return Emoji.from_entry(entry=data)
+
+    @timed_query
+    def get_many(self, guild_id: int, emoji_names: list[str]) -> list[Emoji]:
+        if not emoji_names:
+            return []
+
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_names = [emoji_name.replace(' ', '') for emoji_name in emoji_names]
+
+        # A single array parameter, so it's prepared once for any number of names
+        query = f"""
+            SELECT guild_id, emoji_name, uploader_id, file_name, created_at
+            FROM emoji WHERE guild_id=%s AND {param_emoji_name}=ANY(%s)"""
+
+        data = self._fetchall(query, (guild_id, emoji_names))
+
+        return [Emoji.from_entry(entry=entry) for entry in data]
+
+    @timed_query
+    def add(self, guild_id: int, uploader_id: int, emoji_name: str, file_name: str):
+        query = """
+            INSERT INTO emoji (guild_id, emoji_name, uploader_id, file_name, created_at)
+            VALUES (%s, %s, %s, %s, %s)"""
+
+        emoji = Emoji(
+            guild_id=guild_id,
+            emoji_name=emoji_name,
+            uploader_id=uploader_id,
+            file_name=file_name
+        )
+
+        self._update(query, emoji.to_entry())
+
+    @timed_query
+    def add_many(self, guild_id: int, uploader_id: int, entries: list[tuple[str, str]]) -> None:
+        query = """
+            INSERT INTO emoji (guild_id, emoji_name, uploader_id, file_name, created_at)
+            VALUES (%s, %s, %s, %s, %s)"""
+
+        params = [
+            Emoji(
+                guild_id=guild_id,
+                emoji_name=emoji_name,
+                uploader_id=uploader_id,
+                file_name=file_name
+            ).to_entry()
+            for emoji_name, file_name in entries
+        ]
+
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.executemany(query, params)
+        except psycopg.Error as e:
+            raise EmojiDatabaseError(*e.args) from e
+
+    @timed_query
+    def delete(self, guild_id: int, emoji_name: str) -> None:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_name = emoji_name.replace(' ', '')
+
+        query = f'DELETE FROM emoji WHERE guild_id=%s AND {param_emoji_name}=%s'
+
+        self._update(query, (guild_id, emoji_name))
+
+    @timed_query
+    def rename(self, guild_id: int, old_name: str, new_name: str) -> None:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            old_name = old_name.replace(' ', '')
+
+        query = f'UPDATE emoji SET emoji_name=%s WHERE guild_id=%s AND {param_emoji_name}=%s'
+
+        self._update(query, (new_name, guild_id, old_name))
+
+    @timed_query
+    def replace(self, guild_id: int, uploader_id: int, emoji_name: str, file_name: str) -> None:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_name = emoji_name.replace(' ', '')
+
+        query = f"""
+            UPDATE emoji SET uploader_id=%s, file_name=%s
+            WHERE guild_id=%s AND {param_emoji_name}=%s"""
+
+        self._update(query, (uploader_id, file_name, guild_id, emoji_name))
+
+    @timed_query
+    def list(self, user_id: int, guild_id: int, keyword: str = None) -> EmojiList:
+        param = (user_id, guild_id,)
+
+        keyword_clause = ''
+        if keyword is not None:
+            # Escape wildcards
+            for key, value in WILDCARDS.items():
+                keyword = keyword.replace(key, value)
+
+            keyword = f'%{keyword}%'
+
+            keyword_clause = r"AND e.emoji_name LIKE %s ESCAPE '\'"
+            param += (keyword,)
+
+        query = f"""
+            SELECT
+                e.emoji_name,
+                e.uploader_id,
+                e.created_at,
+                COALESCE(SUM(u.use_count) FILTER (WHERE u.user_id=%s), 0) AS user_use_count,
+                COALESCE(SUM(u.use_count), 0) AS use_count
+            FROM emoji AS e
+            LEFT OUTER JOIN emoji_use AS u
+                ON e.guild_id=u.guild_id AND e.emoji_name=u.emoji_name
+            WHERE e.guild_id=%s {keyword_clause}
+            GROUP BY e.guild_id, e.emoji_name
+            ORDER BY e.emoji_name ASC, use_count DESC, e.created_at ASC
+        """
+
+        self.logger.debug('EmojiPostgres.list() query built: %s', query)
+
+        data = self._fetchall(query, param)
+
+        return EmojiList(owner_id=user_id, entries=data)
+
+    @timed_query
+    def count(self, guild_id: int) -> int:
+        query = 'SELECT COUNT(1) FROM emoji WHERE guild_id=%s'
+
+        return int(self._fetchone(query, (guild_id,))[0])
+
+    @timed_query
+    def export(self, guild_id: int, after: str | None = None, limit: int | None = None) -> list[tuple[Emoji, int]]:
+        param = (guild_id,)
+
+        after_clause = ''
+        if after is not None:
+            after_clause = 'AND e.emoji_name > %s'
+            param += (after,)
+
+        limit_clause = ''
+        if limit is not None:
+            limit_clause = 'LIMIT %s'
+            param += (limit,)
+
+        query = f"""
+            SELECT
+                e.guild_id,
+                e.emoji_name,
+                e.uploader_id,
+                e.file_name,
+                e.created_at,
+                COALESCE(SUM(u.use_count), 0) AS use_count
+            FROM emoji AS e
+            LEFT OUTER JOIN emoji_use AS u
+                ON e.guild_id=u.guild_id AND e.emoji_name=u.emoji_name
+            WHERE e.guild_id=%s {after_clause}
+            GROUP BY e.guild_id, e.emoji_name
+            ORDER BY e.emoji_name ASC
+            {limit_clause}
+        """
+
+        data = self._fetchall(query, param)
+
+        return [(Emoji.from_entry(entry=row[:5]), int(row[5])) for row in data]
+
+    @timed_query
+    def increase_usecount(self, guild_id: int, user_id: int, emoji_name: str) -> None:
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_name = emoji_name.replace(' ', '')
+
+        # Resolve the stored name and upsert in a single statement
+        query = f"""
+            INSERT INTO emoji_use (guild_id, user_id, emoji_name, use_count)
+            SELECT guild_id, %s, emoji_name, 1 FROM emoji
+            WHERE guild_id=%s AND {param_emoji_name}=%s
+            ON CONFLICT (guild_id, user_id, emoji_name)
+            DO UPDATE SET use_count=emoji_use.use_count + 1
+        """
+        history_query = f"""
+            INSERT INTO emoji_use_history
+                (guild_id, bucket, granularity, emoji_name, user_id, use_count)
+            SELECT guild_id, %s, 'hour', emoji_name, %s, 1 FROM emoji
+            WHERE guild_id=%s AND {param_emoji_name}=%s
+            ON CONFLICT (guild_id, bucket, granularity, emoji_name, user_id)
+            DO UPDATE SET use_count=emoji_use_history.use_count + 1
+        """
+
+        self.logger.debug('EmojiPostgres.increase_usecount() query built: %s', query)
+
+        now = int(time.time())
+
+        self._update_all([
+            (query, (user_id, guild_id, emoji_name)),
+            (history_query, (now - now % HOUR, user_id, guild_id, emoji_name))
+        ])
+
+    @timed_query
+    def get_constraint(self, guild_id: int) -> tuple[int, int] | None:
+        query = 'SELECT capacity, maxsize FROM emoji_constraint WHERE guild_id=%s'
+
+        data = self._fetchone(query, (guild_id,))
+
+        return None if data is None else (int(data[0]), int(data[1]))
+
+    @timed_query
+    def set_constraint(self, guild_id: int, capacity: int, maxsize: int) -> None:
+        query = """
+            INSERT INTO emoji_constraint (guild_id, capacity, maxsize) VALUES (%s, %s, %s)
+            ON CONFLICT (guild_id)
+            DO UPDATE SET capacity=excluded.capacity, maxsize=excluded.maxsize
+        """
+
+        self._update(query, (guild_id, capacity, maxsize))
+
+    @timed_query
+    def delete_constraint(self, guild_id: int) -> None:
+        query = 'DELETE FROM emoji_constraint WHERE guild_id=%s'
+
+        self._update(query, (guild_id,))
+
+    @timed_query
+    def top_usage(self,
+                  guild_id: int,
+                  since: int | None,
+                  user_id: int | None = None,
+                  limit: int = 10) -> list[tuple[str, int]]:
+        param = (guild_id,)
+
+        # Lifetime counts are kept in `emoji_use`, the history may have been expired
+        if since is None:
+            table_clause, since_clause = 'emoji_use', ''
+        else:
+            table_clause, since_clause = 'emoji_use_history', 'AND bucket>=%s'
+            param += (since,)
+
+        user_clause = ''
+        if user_id is not None:
+            user_clause = 'AND user_id=%s'
+            param += (user_id,)
+
+        query = f"""
+            SELECT emoji_name, SUM(use_count) AS total
+            FROM {table_clause}
+            WHERE guild_id=%s {since_clause} {user_clause}
+            GROUP BY emoji_name
+            ORDER BY total DESC, emoji_name ASC
+            LIMIT %s
+        """
+
+        data = self._fetchall(query, param + (limit,))
+
+        return [(row[0], int(row[1])) for row in data]
+
+    @timed_query
+    def usage_history(self, guild_id: int, since: int) -> list[tuple[str, int, int]]:
+        query = """
+            SELECT emoji_name, bucket, SUM(use_count)
+            FROM emoji_use_history
+            WHERE guild_id=%s AND bucket>=%s
+            GROUP BY emoji_name, bucket
+        """
+
+        data = self._fetchall(query, (guild_id, since))
+
+        return [(row[0], int(row[1]), int(row[2])) for row in data]
+
+    @timed_query
+    def compact_usage(self, hourly_before: int, daily_before: int, monthly_before: int | None) -> None:
+        rollup_query = """
+            INSERT INTO emoji_use_history
+                (guild_id, bucket, granularity, emoji_name, user_id, use_count)
+            SELECT guild_id, {bucket}, %s, emoji_name, user_id, SUM(use_count)
+            FROM emoji_use_history
+            WHERE granularity=%s AND bucket<%s
+            GROUP BY guild_id, {bucket}, emoji_name, user_id
+            ON CONFLICT (guild_id, bucket, granularity, emoji_name, user_id)
+            DO UPDATE SET use_count=emoji_use_history.use_count + excluded.use_count
+        """
+        delete_query = 'DELETE FROM emoji_use_history WHERE granularity=%s AND bucket<%s'
+
+        statements = [
+            (rollup_query.format(bucket=f'bucket / {DAY} * {DAY}'), ('day', 'hour', hourly_before)),
+            (delete_query, ('hour', hourly_before)),
+            (rollup_query.format(bucket="extract(epoch FROM date_trunc('month', to_timestamp(bucket), 'UTC'))::bigint"),
+             ('month', 'day', daily_before)),
+            (delete_query, ('day', daily_before))
+        ]
+        if monthly_before is not None:
+            statements.append((delete_query, ('month', monthly_before)))
+
+        self._update_all(statements)
+
+    def backup(self, path: str) -> None:
+        # The server may be shared and is backed up on its own, with pg_dump or the like
+        raise EmojiDatabaseError('Online backups are only available for sqlite', path)
+
+    def restore(self, path: str) -> None:
+        raise EmojiDatabaseError('Online backups are only available for sqlite', path)
@@ -0,0 +1,85 @@
+from collections import deque
+import math
+import threading
+
+class QueryStatsItem:
+    """
+    Percentiles of the statement latencies of a method, in milliseconds.
+    """
+    def __init__(self, method: str, count: int, p50: float, p95: float, p99: float) -> None:
+        self.method = method
+        self.count = count
+        self.p50 = p50
+        self.p95 = p95
+        self.p99 = p99
+
+    def __str__(self) -> str:
+        return (f'{self.method}: {self.count} statements, '
+                f'p50 {self.p50:.2f}ms, p95 {self.p95:.2f}ms, p99 {self.p99:.2f}ms')
+
+class QueryStats:
+    """
+    Latencies of the statements per method of the database.
+
+    Only the latest `window` samples of each method are kept for the percentiles,
+    so the memory use stays bounded however long the bot runs.
+    """
+    def __init__(self, window: int = 1000) -> None:
+        self.window = window
+        self.samples: dict[str, deque[float]] = {}
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def record(self, method: str, elapsed: float) -> None:
+        """
+        Record the latency of a statement.
+
+        :param method: Name of the method executed the statement.
+        :type method: str
+        :param elapsed: Latency of the statement in milliseconds.
+        :type elapsed: float
+        """
+        with self.lock:
+            samples = self.samples.get(method)
+            if samples is None:
+                samples = self.samples[method] = deque(maxlen=self.window)
+
+            samples.append(elapsed)
+            self.counts[method] = self.counts.get(method, 0) + 1
+
+    def summary(self) -> list[QueryStatsItem]:
+        """
+        Summarize the latencies of every method, sorted by the name of the method.
+
+        :return: List of the percentiles per method.
+        :rtype: list[QueryStatsItem]
+        """
+        with self.lock:
+            items = [(method, self.counts[method], sorted(samples))
+                     for method, samples in self.samples.items()]
+
+        return [
+            QueryStatsItem(
+                method=method,
+                count=count,
+                p50=percentile(samples, 50),
+                p95=percentile(samples, 95),
+                p99=percentile(samples, 99)
+            )
+            for method, count, samples in sorted(items)
+        ]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+def percentile(samples: list[float], rank: float) -> float:
+    """
+    Get the nearest-rank percentile of the sorted samples.
+    """
+    if not samples:
+        return 0.0
+
+    index = max(0, math.ceil(rank / 100 * len(samples)) - 1)
+    return samples[index]
@@ -0,0 +1,55 @@
+CREATE TABLE IF NOT EXISTS emoji (
+    guild_id BIGINT,
+    emoji_name TEXT,
+    uploader_id BIGINT NOT NULL,
+    file_name TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (guild_id, emoji_name)
+);
+
+CREATE TABLE IF NOT EXISTS emoji_use (
+    guild_id BIGINT,
+    user_id BIGINT,
+    emoji_name TEXT,
+    use_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, user_id, emoji_name),
+    FOREIGN KEY (guild_id, emoji_name) REFERENCES emoji(guild_id, emoji_name)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS emoji_constraint (
+    guild_id BIGINT PRIMARY KEY,
+    capacity INT NOT NULL,
+    maxsize INT NOT NULL
+);
+
+-- Usage per time bucket, `bucket` is the start of the hour, the day or the month in epoch
+CREATE TABLE IF NOT EXISTS emoji_use_history (
+    guild_id BIGINT,
+    bucket BIGINT,
+    granularity TEXT,
+    emoji_name TEXT,
+    user_id BIGINT,
+    use_count INT NOT NULL,
+    PRIMARY KEY (guild_id, bucket, granularity, emoji_name, user_id),
+    FOREIGN KEY (guild_id, emoji_name) REFERENCES emoji(guild_id, emoji_name)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+-- Lookups with `ignore_spaces` compare names without spaces
+CREATE INDEX IF NOT EXISTS emoji_name_nospace_idx
+    ON emoji (guild_id, replace(emoji_name, ' ', ''));
+
+-- Duplicate file check on upload
+CREATE INDEX IF NOT EXISTS emoji_file_name_idx
+    ON emoji (guild_id, file_name);
+
+-- Aggregation of use counts per Emoji in `list`
+CREATE INDEX IF NOT EXISTS emoji_use_emoji_idx
+    ON emoji_use (guild_id, emoji_name);
+
+-- Compaction of the expired buckets
+CREATE INDEX IF NOT EXISTS emoji_use_history_compact_idx
+    ON emoji_use_history (granularity, bucket);
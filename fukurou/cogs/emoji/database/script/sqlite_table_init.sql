@@ -20,4 +20,26 @@ CREATE TABLE IF NOT EXISTS emoji_use (
         ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS emoji_constraint (
+    guild_id INTEGER PRIMARY KEY,
+    capacity INT NOT NULL,
+    maxsize INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS emoji_use_history (
+    guild_id INTEGER,
+    bucket INTEGER,
+    granularity TEXT,
+    emoji_name TEXT,
+    user_id INTEGER,
+    use_count INT NOT NULL,
+    PRIMARY KEY (guild_id, bucket, granularity, emoji_name, user_id),
+    FOREIGN KEY (guild_id, emoji_name) REFERENCES emoji(guild_id, emoji_name)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS emoji_use_history_compact_idx
+    ON emoji_use_history (granularity, bucket);
+
 COMMIT;
\ No newline at end of file
@@ -1,18 +1,26 @@
+from __future__ import annotations
 import os
 from contextlib import closing
 import sqlite3
+import time
 
 from fukurou.cogs.emoji.data import Emoji, EmojiList
 from fukurou.cogs.emoji.exceptions import EmojiDatabaseError
-from .base import BaseEmojiDatabase
+from .base import DAY, HOUR, BaseEmojiDatabase, current_method, timed_query
 
+# The escape character goes first, not to escape the ones added for the others
 WILDCARDS = {
+    '\\': r'\\',
     '%': r'\%',
-    '_': r'\_',
-    '\\': r'\\'
+    '_': r'\_'
 }
 
 class EmojiSqlite(BaseEmojiDatabase):
+    def __init__(self) -> None:
+        self.plans: dict[str, str] = {}
+
+        super().__init__()
+
     def _connect(self):
         db_path = self.config.database.path
         db_dir = os.path.dirname(db_path)
@@ -28,6 +36,8 @@ class EmojiSqlite(BaseEmojiDatabase):
 
         self.conn = sqlite3.connect(database=db_path)
         self.conn.execute('PRAGMA FOREIGN_KEYS = ON')
+        # Readers don't block the writer in WAL mode, so a backup doesn't hold off the writes
+        self.conn.execute('PRAGMA journal_mode = WAL')
 
         self.logger.info('Connected to the Emoji database.')
 
@@ -51,6 +61,7 @@ class EmojiSqlite(BaseEmojiDatabase):
         else:
             self.logger.info('Successfully initialized Emoji database.')
 
+    @timed_query
     def exists(self, guild_id: int, emoji_name: str) -> bool:
         param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
@@ -60,21 +71,23 @@ class EmojiSqlite(BaseEmojiDatabase):
         query = f'SELECT (1) FROM emoji WHERE guild_id=? AND {param_emoji_name}=?'
 
         with closing(self.conn.cursor()) as cursor:
-            result = cursor.execute(query, (guild_id, emoji_name))
+            result = self._execute(cursor, query, (guild_id, emoji_name))
             exists = result.fetchone() is not None
 
         return exists
 
+    @timed_query
     def file_exists(self, guild_id: int, file_name: str) -> bool:
         query = 'SELECT emoji_name FROM emoji WHERE guild_id=? AND file_name=?'
 
         with closing(self.conn.cursor()) as cursor:
-            result = cursor.execute(query, (guild_id, file_name))
+            result = self._execute(cursor, query, (guild_id, file_name))
             data = result.fetchone()
             emoji_name = None if data is None else data[0]
 
         return emoji_name
 
+    @timed_query
     def get(self, guild_id: int, emoji_name: str) -> Emoji | None:
         param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
@@ -84,11 +97,31 @@ class EmojiSqlite(BaseEmojiDatabase):
         query = f'SELECT * FROM emoji WHERE guild_id=? AND {param_emoji_name}=?'
 
         with closing(self.conn.cursor()) as cursor:
-            result = cursor.execute(query, (guild_id, emoji_name))
+            result = self._execute(cursor, query, (guild_id, emoji_name))
             data = result.fetchone()
 
         return Emoji.from_entry(entry=data)
 
+    @timed_query
+    def get_many(self, guild_id: int, emoji_names: list[str]) -> list[Emoji]:
+        if not emoji_names:
+            return []
+
+        param_emoji_name = 'emoji_name'
+        if self.config.expression.ignore_spaces is True:
+            param_emoji_name = "replace(emoji_name, ' ', '')"
+            emoji_names = [emoji_name.replace(' ', '') for emoji_name in emoji_names]
+
+        placeholders = ', '.join('?' * len(emoji_names))
+        query = f'SELECT * FROM emoji WHERE guild_id=? AND {param_emoji_name} IN ({placeholders})'
+
+        with closing(self.conn.cursor()) as cursor:
+            result = self._execute(cursor, query, (guild_id, *emoji_names))
+            data = result.fetchall()
+
+        return [Emoji.from_entry(entry=entry) for entry in data]
+
+    @timed_query
     def add(self, guild_id: int, uploader_id: int, emoji_name: str, file_name: str):
         query = 'INSERT INTO emoji VALUES (?, ?, ?, ?, ?)'
 
@@ -101,13 +134,34 @@ class EmojiSqlite(BaseEmojiDatabase):
 
         try:
             with closing(self.conn.cursor()) as cursor:
-                cursor.execute(query, emoji.to_entry())
+                self._execute(cursor, query, emoji.to_entry())
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise EmojiDatabaseError(*e.args) from e
+
+        self.conn.commit()
+
+    @timed_query
+    def add_many(self, guild_id: int, uploader_id: int, entries: list[tuple[str, str]]) -> None:
+        query = 'INSERT INTO emoji VALUES (?, ?, ?, ?, ?)'
+
+        try:
+            with closing(self.conn.cursor()) as cursor:
+                for emoji_name, file_name in entries:
+                    emoji = Emoji(
+                        guild_id=guild_id,
+                        emoji_name=emoji_name,
+                        uploader_id=uploader_id,
+                        file_name=file_name
+                    )
+                    self._execute(cursor, query, emoji.to_entry())
         except sqlite3.Error as e:
             self.conn.rollback()
             raise EmojiDatabaseError(*e.args) from e
 
         self.conn.commit()
 
+    @timed_query
     def delete(self, guild_id: int, emoji_name: str) -> None:
         param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
@@ -118,13 +172,14 @@ class EmojiSqlite(BaseEmojiDatabase):
 
         try:
             with closing(self.conn.cursor()) as cursor:
-                cursor.execute(query, (guild_id, emoji_name))
+                self._execute(cursor, query, (guild_id, emoji_name))
         except sqlite3.Error as e:
             self.conn.rollback()
             raise EmojiDatabaseError(*e.args) from e
 
         self.conn.commit()
 
+    @timed_query
     def rename(self, guild_id: int, old_name: str, new_name: str) -> None:
         param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
@@ -135,13 +190,14 @@ class EmojiSqlite(BaseEmojiDatabase):
 
         try:
             with closing(self.conn.cursor()) as cursor:
-                cursor.execute(query, (new_name, guild_id, old_name))
+                self._execute(cursor, query, (new_name, guild_id, old_name))
         except sqlite3.Error as e:
             self.conn.rollback()
             raise EmojiDatabaseError(*e.args) from e
 
         self.conn.commit()
 
+    @timed_query
     def replace(self, guild_id: int, uploader_id: int, emoji_name: str, file_name: str) -> None:
         param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
@@ -154,13 +210,14 @@ class EmojiSqlite(BaseEmojiDatabase):
 
         try:
             with closing(self.conn.cursor()) as cursor:
-                cursor.execute(query, (uploader_id, file_name, guild_id, emoji_name))
+                self._execute(cursor, query, (uploader_id, file_name, guild_id, emoji_name))
         except sqlite3.Error as e:
             self.conn.rollback()
             raise EmojiDatabaseError(*e.args) from e
 
         self.conn.commit()
 
+    @timed_query
     def list(self, user_id: int, guild_id: int, keyword: str = None) -> EmojiList:
         param = (user_id, guild_id,)
 
@@ -197,41 +254,293 @@ class EmojiSqlite(BaseEmojiDatabase):
         self.logger.debug('EmojiSqlite.list() query built: %s', query)
 
         with closing(self.conn.cursor()) as cursor:
-            result = cursor.execute(query, param)
+            result = self._execute(cursor, query, param)
             data = result.fetchall()
 
         return EmojiList(owner_id=user_id, entries=data)
 
+    @timed_query
     def count(self, guild_id: int) -> int:
         query = 'SELECT COUNT(1) FROM emoji WHERE guild_id=?;'
 
         with closing(self.conn.cursor()) as cursor:
-            result = cursor.execute(query, (guild_id,))
+            result = self._execute(cursor, query, (guild_id,))
             count = int(result.fetchone()[0])
 
         return count
 
+    @timed_query
+    def export(self, guild_id: int, after: str | None = None, limit: int | None = None) -> list[tuple[Emoji, int]]:
+        param = (guild_id,)
+
+        after_clause = ''
+        if after is not None:
+            after_clause = 'AND e.emoji_name > ?'
+            param += (after,)
+
+        limit_clause = ''
+        if limit is not None:
+            limit_clause = 'LIMIT ?'
+            param += (limit,)
+
+        query = f"""
+            SELECT
+                e.guild_id,
+                e.emoji_name,
+                e.uploader_id,
+                e.file_name,
+                e.created_at,
+                COALESCE(SUM(u.use_count), 0) AS use_count
+            FROM emoji AS e
+            LEFT OUTER JOIN emoji_use AS u
+                ON e.guild_id=u.guild_id AND e.emoji_name=u.emoji_name
+            WHERE e.guild_id=? {after_clause}
+            GROUP BY e.guild_id, e.emoji_name
+            ORDER BY e.emoji_name ASC
+            {limit_clause};
+        """
+
+        with closing(self.conn.cursor()) as cursor:
+            result = self._execute(cursor, query, param)
+            data = result.fetchall()
+
+        return [(Emoji.from_entry(entry=row[:5]), int(row[5])) for row in data]
+
+    @timed_query
     def increase_usecount(self, guild_id: int, user_id: int, emoji_name: str) -> None:
-        subquery_emoji_name = '?'
+        param_emoji_name = 'emoji_name'
         if self.config.expression.ignore_spaces is True:
-            subquery_emoji_name = """(
-                SELECT emoji_name FROM emoji WHERE replace(emoji_name, ' ', '')=?
-            )"""
+            param_emoji_name = "replace(emoji_name, ' ', '')"
             emoji_name = emoji_name.replace(' ', '')
 
+        # Resolve the stored name within the guild, nothing is inserted if there's no such
         query = f"""
-            INSERT OR IGNORE INTO emoji_use VALUES (?, ?, {subquery_emoji_name}, ?)
+            INSERT INTO emoji_use (guild_id, user_id, emoji_name, use_count)
+            SELECT guild_id, ?, emoji_name, 1 FROM emoji
+            WHERE guild_id=? AND {param_emoji_name}=?
             ON CONFLICT(guild_id, user_id, emoji_name)
             DO UPDATE SET use_count=use_count + 1;
         """
+        history_query = f"""
+            INSERT INTO emoji_use_history
+                (guild_id, bucket, granularity, emoji_name, user_id, use_count)
+            SELECT guild_id, ?, 'hour', emoji_name, ?, 1 FROM emoji
+            WHERE guild_id=? AND {param_emoji_name}=?
+            ON CONFLICT(guild_id, bucket, granularity, emoji_name, user_id)
+            DO UPDATE SET use_count=use_count + 1;
+        """
 
         self.logger.debug('EmojiSqlite.increase_usecount() query built: %s', query)
 
+        now = int(time.time())
+
         try:
             with closing(self.conn.cursor()) as cursor:
-                cursor.execute(query, (guild_id, user_id, emoji_name, 1))
+                self._execute(cursor, query, (user_id, guild_id, emoji_name))
+                self._execute(cursor, history_query,
+                              (now - now % HOUR, user_id, guild_id, emoji_name))
         except sqlite3.Error as e:
             self.conn.rollback()
             raise EmojiDatabaseError(*e.args) from e
 
         self.conn.commit()
+
+    @timed_query
+    def get_constraint(self, guild_id: int) -> tuple[int, int] | None:
+        query = 'SELECT capacity, maxsize FROM emoji_constraint WHERE guild_id=?'
+
+        with closing(self.conn.cursor()) as cursor:
+            result = self._execute(cursor, query, (guild_id,))
+            data = result.fetchone()
+
+        return None if data is None else (int(data[0]), int(data[1]))
+
+    @timed_query
+    def set_constraint(self, guild_id: int, capacity: int, maxsize: int) -> None:
+        query = """
+            INSERT INTO emoji_constraint VALUES (?, ?, ?)
+            ON CONFLICT(guild_id)
+            DO UPDATE SET capacity=excluded.capacity, maxsize=excluded.maxsize;
+        """
+
+        try:
+            with closing(self.conn.cursor()) as cursor:
+                self._execute(cursor, query, (guild_id, capacity, maxsize))
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise EmojiDatabaseError(*e.args) from e
+
+        self.conn.commit()
+
+    @timed_query
+    def delete_constraint(self, guild_id: int) -> None:
+        query = 'DELETE FROM emoji_constraint WHERE guild_id=?'
+
+        try:
+            with closing(self.conn.cursor()) as cursor:
+                self._execute(cursor, query, (guild_id,))
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise EmojiDatabaseError(*e.args) from e
+
+        self.conn.commit()
+
+    @timed_query
+    def top_usage(self,
+                  guild_id: int,
+                  since: int | None,
+                  user_id: int | None = None,
+                  limit: int = 10) -> list[tuple[str, int]]:
+        param = (guild_id,)
+
+        # Lifetime counts are kept in `emoji_use`, the history may have been expired
+        if since is None:
+            table_clause, since_clause = 'emoji_use', ''
+        else:
+            table_clause, since_clause = 'emoji_use_history', 'AND bucket>=?'
+            param += (since,)
+
+        user_clause = ''
+        if user_id is not None:
+            user_clause = 'AND user_id=?'
+            param += (user_id,)
+
+        query = f"""
+            SELECT emoji_name, SUM(use_count) AS total
+            FROM {table_clause}
+            WHERE guild_id=? {since_clause} {user_clause}
+            GROUP BY emoji_name
+            ORDER BY total DESC, emoji_name ASC
+            LIMIT ?;
+        """
+
+        with closing(self.conn.cursor()) as cursor:
+            result = self._execute(cursor, query, param + (limit,))
+            data = result.fetchall()
+
+        return [(row[0], int(row[1])) for row in data]
+
+    @timed_query
+    def usage_history(self, guild_id: int, since: int) -> list[tuple[str, int, int]]:
+        query = """
+            SELECT emoji_name, bucket, SUM(use_count)
+            FROM emoji_use_history
+            WHERE guild_id=? AND bucket>=?
+            GROUP BY emoji_name, bucket;
+        """
+
+        with closing(self.conn.cursor()) as cursor:
+            result = self._execute(cursor, query, (guild_id, since))
+            data = result.fetchall()
+
+        return [(row[0], int(row[1]), int(row[2])) for row in data]
+
+    @timed_query
+    def compact_usage(self, hourly_before: int, daily_before: int, monthly_before: int | None) -> None:
+        rollup_query = """
+            INSERT INTO emoji_use_history
+                (guild_id, bucket, granularity, emoji_name, user_id, use_count)
+            SELECT guild_id, {bucket}, ?, emoji_name, user_id, SUM(use_count)
+            FROM emoji_use_history
+            WHERE granularity=? AND bucket<?
+            GROUP BY guild_id, {bucket}, emoji_name, user_id
+            ON CONFLICT(guild_id, bucket, granularity, emoji_name, user_id)
+            DO UPDATE SET use_count=use_count + excluded.use_count;
+        """
+        delete_query = 'DELETE FROM emoji_use_history WHERE granularity=? AND bucket<?;'
+
+        statements = [
+            (rollup_query.format(bucket=f'bucket - bucket % {DAY}'), ('day', 'hour', hourly_before)),
+            (delete_query, ('hour', hourly_before)),
+            (rollup_query.format(bucket="CAST(strftime('%s', bucket, 'unixepoch', 'start of month') AS INTEGER)"),
+             ('month', 'day', daily_before)),
+            (delete_query, ('day', daily_before))
+        ]
+        if monthly_before is not None:
+            statements.append((delete_query, ('month', monthly_before)))
+
+        try:
+            with closing(self.conn.cursor()) as cursor:
+                for query, param in statements:
+                    self._execute(cursor, query, param)
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise EmojiDatabaseError(*e.args) from e
+
+        self.conn.commit()
+
+    def _execute(self, cursor: sqlite3.Cursor, query: str, param: tuple) -> sqlite3.Cursor:
+        method = current_method.get() or 'unknown'
+
+        started = time.perf_counter()
+        try:
+            return cursor.execute(query, param)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.query_stats.record(method=method, elapsed=elapsed)
+
+            if elapsed >= self.config.database.slow_query_threshold:
+                self.logger.warning(
+                    'Slow query in EmojiSqlite.%s() took %.1fms: %s\n'
+                    'Parameters: %s\nQuery plan:\n%s',
+                    method, elapsed, ' '.join(query.split()),
+                    param_shapes(param), self._explain(query=query, param=param)
+                )
+
+    def _explain(self, query: str, param: tuple) -> str:
+        # Plans depend on the query and the schema only, so one per query is enough
+        plan = self.plans.get(query)
+        if plan is not None:
+            return plan
+
+        try:
+            with closing(self.conn.cursor()) as cursor:
+                rows = cursor.execute(f'EXPLAIN QUERY PLAN {query}', param).fetchall()
+        except sqlite3.Error as e:
+            return f'(unavailable: {e})'
+
+        # Rows are (id, parent, notused, detail), indent the detail by its depth
+        depths = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth = depths[node_id] = depths.get(parent, 0) + 1
+            lines.append(f'{"  " * depth}{detail}')
+
+        plan = self.plans[query] = '\n'.join(lines) or '  (none)'
+        return plan
+
+    def backup(self, path: str) -> None:
+        # Connections can't be shared across threads, so it's opened here.
+        # The copy is read in a single transaction, a paged copy would start over
+        # on every write in between. The database is in WAL mode, so the writers
+        # go on meanwhile and the copy is as of its start.
+        try:
+            with closing(sqlite3.connect(database=self.config.database.path)) as source:
+                source.execute('VACUUM INTO ?', (path,))
+        except sqlite3.Error as e:
+            raise EmojiDatabaseError(*e.args) from e
+
+    def restore(self, path: str) -> None:
+        try:
+            with closing(sqlite3.connect(database=path)) as source, \
+                 closing(sqlite3.connect(database=self.config.database.path)) as target:
+                # All pages in a single step. The target is locked until the backup is
+                # finished, paged or not, so the manager holds the queries off meanwhile.
+                source.backup(target)
+        except sqlite3.Error as e:
+            raise EmojiDatabaseError(*e.args) from e
+
+def param_shapes(param: tuple) -> str:
+    """
+    Describe the bound parameters without their values, e.g. `(int, str[12])`.
+    Values can be made by the users, so they are kept out of the log.
+    """
+    shapes = []
+    for value in param:
+        shape = type(value).__name__
+        if isinstance(value, (str, bytes)):
+            shape += f'[{len(value)}]'
+
+        shapes.append(shape)
+
+    return f'({", ".join(shapes)})'
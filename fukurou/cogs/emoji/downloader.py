@@ -0,0 +1,279 @@
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import time
+from typing import Any
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from yarl import URL
+
+from fukurou.configs import get_config
+from fukurou.metrics import histogram
+from fukurou.patterns import SingletonMeta
+from .config import EmojiConfig
+from .exceptions import EmojiFileDownloadError, EmojiFileTooLargeError, EmojiFileTypeError
+
+DOWNLOAD_SECONDS = histogram(
+    'fukurou_emoji_download_seconds',
+    'Latency of the Emoji file downloads, including the retries.',
+    ('result',)
+)
+
+# Leading bytes of the supported images, WebP is checked separately
+MAGIC_NUMBERS = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp')
+)
+
+CHUNK_SIZE = 65536
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+def sniff(content: bytes) -> str | None:
+    """
+    Get the type of the image from its leading bytes.
+
+    :param content: Content of the file, at least the first 12 bytes of it.
+    :type content: bytes
+
+    :return: One of `png`, `jpeg`, `gif`, `webp` and `bmp`, None if it's none of them.
+    :rtype: str | None
+    """
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'webp'
+
+    for magic, file_type in MAGIC_NUMBERS:
+        if content.startswith(magic):
+            return file_type
+
+    return None
+
+def public_address(host: str) -> bool:
+    """
+    Check if the IP address is reachable on the internet, and not one of
+    the private, loopback, link-local or reserved addresses.
+
+    :param host: IP address.
+    :type host: str
+
+    :return: True if it's a public address.
+    :rtype: bool
+    """
+    address = ipaddress.ip_address(host.split('%', 1)[0])
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+
+    return address.is_global and not address.is_multicast
+
+def check_url(url: str) -> None:
+    """
+    Check if the URL can be downloaded. Host names are checked once they're resolved.
+
+    :param url: URL to download.
+    :type url: str
+
+    :raises EmojiFileDownloadError: If it's not an http(s) URL, or the host is not a public address.
+    """
+    try:
+        parsed = URL(url)
+    except ValueError as e:
+        raise EmojiFileDownloadError('Unsupported URL', url) from e
+
+    if parsed.scheme not in ('http', 'https') or not parsed.host:
+        raise EmojiFileDownloadError('Unsupported URL', url)
+
+    try:
+        public = public_address(parsed.host)
+    except ValueError:
+        # Not an IP address
+        return
+
+    if not public:
+        raise EmojiFileDownloadError('Blocked address', parsed.host)
+
+class BlockedAddressError(OSError):
+    """
+    Raise if a host name resolves to none but the addresses not to be downloaded from.
+    """
+
+class PublicResolver(AbstractResolver):
+    """
+    Resolver leaving out the addresses that are not public, so a URL or its redirects
+    cannot reach the bot's own host or network. The addresses are checked as they're
+    connected to, so a host name resolved again to another address is checked again.
+    """
+    def __init__(self) -> None:
+        self.resolver = aiohttp.DefaultResolver()
+
+    async def resolve(self,
+                      host: str,
+                      port: int = 0,
+                      family: int = socket.AF_INET) -> list[dict[str, Any]]:
+        results = [result for result in await self.resolver.resolve(host, port, family)
+                   if public_address(result['host'])]
+        if not results:
+            raise BlockedAddressError(host)
+
+        return results
+
+    async def close(self) -> None:
+        await self.resolver.close()
+
+class EmojiDownloader(metaclass=SingletonMeta):
+    """
+    Downloader of the Emoji files, attachments and URLs alike.
+
+    Every download goes through a single session, so the connections are pooled up to
+    `download.pool_size`. A response is read in chunks and given up as soon as it's
+    larger than the limit, so a large file is never read as a whole. Connection errors,
+    timeouts, 429 and 5xx responses are retried up to `download.retries` times,
+    waiting longer each time.
+
+    The type of the file is told from its content, not from what the server says.
+
+    Only public addresses are downloaded from. Host names are resolved by
+    `PublicResolver`, and redirects are followed one by one to check each of them.
+    """
+    def __init__(self) -> None:
+        self.logger = logging.getLogger('fukurou.emoji.downloader')
+        self.session: aiohttp.ClientSession | None = None
+
+    @property
+    def config(self) -> EmojiConfig.EmojiDownloadConfig:
+        return get_config(config=EmojiConfig).download
+
+    async def fetch(self, url: str, maxsize: int) -> tuple[bytes, str]:
+        """
+        Download the image.
+
+        :param url: URL of the image, either http or https.
+        :type url: str
+        :param maxsize: Size limit in bytes.
+        :type maxsize: int
+
+        :return: Content of the image and its type.
+        :rtype: tuple[bytes, str]
+
+        :raises EmojiFileDownloadError: If failed to download file.
+        :raises EmojiFileTooLargeError: If the file is larger than `maxsize`.
+        :raises EmojiFileTypeError: If the file is not a supported image.
+        """
+        return await self._timed(url=url, maxsize=maxsize, image=True)
+
+    async def download(self, url: str, maxsize: int) -> bytes:
+        """
+        Download the file as it is, whatever it is.
+
+        :param url: URL of the file, either http or https.
+        :type url: str
+        :param maxsize: Size limit in bytes.
+        :type maxsize: int
+
+        :return: Content of the file.
+        :rtype: bytes
+
+        :raises EmojiFileDownloadError: If failed to download file.
+        :raises EmojiFileTooLargeError: If the file is larger than `maxsize`.
+        """
+        return await self._timed(url=url, maxsize=maxsize, image=False)
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _timed(self, url: str, maxsize: int, image: bool) -> tuple[bytes, str] | bytes:
+        check_url(url)
+
+        started = time.perf_counter()
+        result = 'failed'
+        try:
+            content = await self._fetch(url=url, maxsize=maxsize)
+            if not image:
+                result = 'ok'
+                return content
+
+            file_type = sniff(content)
+            if file_type is None:
+                result = 'invalid'
+                raise EmojiFileTypeError('unknown')
+
+            result = 'ok'
+            return content, file_type
+        except EmojiFileTooLargeError:
+            result = 'too_large'
+            raise
+        finally:
+            DOWNLOAD_SECONDS.observe(time.perf_counter() - started, result=result)
+
+    async def _fetch(self, url: str, maxsize: int) -> bytes:
+        config = self.config
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=config.pool_size, resolver=PublicResolver()),
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    connect=config.connect_timeout,
+                    sock_read=config.read_timeout
+                )
+            )
+
+        for attempt in range(config.retries + 1):
+            delay = config.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+
+            try:
+                target = url
+                for _ in range(MAX_REDIRECTS + 1):
+                    async with self.session.get(target, allow_redirects=False) as response:
+                        location = response.headers.get('Location')
+                        if response.status in REDIRECT_STATUSES and location is not None:
+                            # Checked just as the URL given
+                            target = str(response.url.join(URL(location)))
+                            check_url(target)
+                            continue
+
+                        if response.status == 429 or response.status >= 500:
+                            retry_after = response.headers.get('Retry-After', '')
+                            if retry_after.isdigit():
+                                delay = max(delay, float(retry_after))
+                            error = EmojiFileDownloadError(response.status, response.reason)
+                            break
+
+                        if response.status >= 400:
+                            raise EmojiFileDownloadError(response.status, response.reason)
+
+                        return await self._read(response=response, maxsize=maxsize)
+                else:
+                    raise EmojiFileDownloadError('Too many redirects', url)
+            except aiohttp.ClientConnectorError as e:
+                if isinstance(e.os_error, BlockedAddressError):
+                    raise EmojiFileDownloadError('Blocked address', *e.os_error.args) from e
+                error = EmojiFileDownloadError(*e.args)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = EmojiFileDownloadError(*e.args)
+
+            if attempt < config.retries:
+                self.logger.debug('Retrying the download of %s in %.1f seconds: %s',
+                                  url, delay, error.args)
+                await asyncio.sleep(delay)
+
+        raise error
+
+    async def _read(self, response: aiohttp.ClientResponse, maxsize: int) -> bytes:
+        if response.content_length is not None and response.content_length > maxsize:
+            raise EmojiFileTooLargeError(response.content_length/1024, maxsize // 1024)
+
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            buffer += chunk
+            if len(buffer) > maxsize:
+                raise EmojiFileTooLargeError(len(buffer)/1024, maxsize // 1024)
+
+        return bytes(buffer)
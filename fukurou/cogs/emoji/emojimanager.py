@@ -1,21 +1,42 @@
 from __future__ import annotations
-import os
+import asyncio
+from datetime import datetime, timezone
 import io
+import os
+import json
 import logging
 import re
 import hashlib
-from typing import Final
+import tempfile
+import time
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Final, TypeVar
 from functools import wraps
 from inspect import signature
-import requests
 from discord import Attachment
+from discord import Emoji as GuildEmoji
 
 from fukurou.configs import get_config
+from fukurou.metrics import gauge
 from fukurou.patterns import SingletonMeta
+from .archive import (
+    ARCHIVE_FILETYPES,
+    ArchiveWriter,
+    ImportCheckpoint,
+    ImportReport,
+    entry_name,
+    read_entry,
+)
+from .backup import BackupReport, EmojiBackup
+from .cache import MISSING, get_emoji_cache
 from .database import BaseEmojiDatabase, get_emoji_database
-from .storage import BaseEmojiStorage, get_emoji_storage
+from .storage import BaseEmojiStorage, CachedEmojiStorage, get_emoji_storage
 from .config import EmojiConfig
+from .constraints import EmojiConstraints
 from .data import Emoji, EmojiList
+from .downloader import EmojiDownloader
+from .scrubber import EmojiScrubber
+from .usage import EmojiUsage
 from .exceptions import (
     EmojiCapacityExceededError,
     EmojiDatabaseError,
@@ -38,6 +59,17 @@ ALLOWED_FILETYPES: Final = {
     'image/bmp',
 }
 
+# Types of the Emoji files, as they're named after
+FILE_TYPES: Final = {content_type.removeprefix('image/') for content_type in ALLOWED_FILETYPES}
+
+# Emojis read from the database at once on export
+EXPORT_PAGE_SIZE: Final = 500
+
+# Bytes of the manifest kept in memory on export, the rest goes to a file
+MANIFEST_SPOOL_SIZE: Final = 1024 * 1024
+
+T = TypeVar('T')
+
 def connected(func):
     """
     Check if database and storage are connected. 
@@ -63,13 +95,8 @@ def check_emoji_name(argname: str):
         def wrapper(*args, **kwargs):
             params = signature(func).bind(*args, **kwargs).arguments
             self: EmojiManager = params['self']
-            emoji_name = params[argname]
 
-            pattern = self.config.expression.name_pattern
-            logging.getLogger('').debug(pattern)
-
-            if not re.match(pattern=pattern, string=emoji_name):
-                raise EmojiInvalidNameError(emoji_name, pattern)
+            self.validate(guild_id=params['guild_id'], emoji_name=params[argname])
 
             return func(*args, **kwargs)
         return wrapper
@@ -84,7 +111,7 @@ def check_emoji_isnew(argname: str):
             guild_id = params['guild_id']
             emoji_name = params[argname]
 
-            if self.database.exists(guild_id=guild_id, emoji_name=emoji_name):
+            if self.exists(guild_id=guild_id, emoji_name=emoji_name):
                 raise EmojiExistsError(emoji_name)
 
             return func(*args, **kwargs)
@@ -100,7 +127,7 @@ def check_emoji_exists(argname: str):
             guild_id = params['guild_id']
             emoji_name = params[argname]
 
-            if not self.database.exists(guild_id=guild_id, emoji_name=emoji_name):
+            if not self.exists(guild_id=guild_id, emoji_name=emoji_name):
                 raise EmojiNotFoundError(emoji_name)
 
             return func(*args, **kwargs)
@@ -112,12 +139,11 @@ def check_file_type(argname: str):
         @wraps(func)
         def wrapper(*args, **kwargs):
             params = signature(func).bind(*args, **kwargs).arguments
-            attachment = params[argname]
-
-            if attachment.content_type not in ALLOWED_FILETYPES:
-                raise EmojiFileTypeError(attachment.content_type)
+            self: EmojiManager = params['self']
+            file_type = (params[argname].content_type or '').removeprefix('image/')
 
-            kwargs['file_type'] = attachment.content_type.removeprefix('image/')
+            self.validate(guild_id=params['guild_id'], file_type=file_type)
+            kwargs['file_type'] = file_type
 
             return func(*args, **kwargs)
         return wrapper
@@ -129,12 +155,8 @@ def check_file_size(argname: str):
         def wrapper(*args, **kwargs):
             params = signature(func).bind(*args, **kwargs).arguments
             self: EmojiManager = params['self']
-            guild_id = params['guild_id']
-            attachment = params[argname]
-            maxsize = self.config.constraints[guild_id].maxsize
 
-            if attachment.size > maxsize*1024:
-                raise EmojiFileTooLargeError(attachment.size/1024, maxsize)
+            self.validate(guild_id=params['guild_id'], size=params[argname].size)
 
             return func(*args, **kwargs)
         return wrapper
@@ -147,19 +169,19 @@ def check_file_isnew(argname: str):
             params = signature(func).bind(*args, **kwargs).arguments
             self: EmojiManager = params['self']
             guild_id = params['guild_id']
-            attachment: Attachment = params[argname]
+            source: Attachment | str = params[argname]
 
-            buffer = io.BytesIO()
-            try:
-                await attachment.save(fp=buffer)
-            except requests.exceptions.RequestException as e:
-                raise EmojiFileDownloadError(*e.args) from e
+            url = source if isinstance(source, str) else source.url
+            maxsize = self.constraints[guild_id].maxsize * 1024
 
-            kwargs['file_byte'] = buffer.read()
+            # The type declared by the uploader is replaced with the one told from the content
+            kwargs['file_byte'], kwargs['file_type'] = await EmojiDownloader().fetch(url=url, maxsize=maxsize)
             kwargs['file_hash'] = hashlib.md5(kwargs['file_byte']).hexdigest()
             kwargs['file_name'] = f"{kwargs['file_hash']}.{kwargs['file_type']}"
 
-            emoji_name = self.database.file_exists(guild_id=guild_id, file_name=kwargs['file_name'])
+            emoji_name = await self.run(self.database.file_exists,
+                                        guild_id=guild_id,
+                                        file_name=kwargs['file_name'])
             if emoji_name is not None:
                 raise EmojiFileExistsError(emoji_name)
 
@@ -174,12 +196,12 @@ def check_capacity_limit():
             params = signature(func).bind(*args, **kwargs).arguments
             self: EmojiManager = params['self']
             guild_id = params['guild_id']
-            capacity = self.config.constraints[guild_id].capacity
+            capacity = self.constraints[guild_id].capacity
 
             if capacity == -1:
-                return
+                return func(*args, **kwargs)
 
-            if self.database.count(guild_id=guild_id) >= capacity:
+            if self.count(guild_id=guild_id) >= capacity:
                 raise EmojiCapacityExceededError(capacity)
 
             return func(*args, **kwargs)
@@ -193,7 +215,6 @@ class EmojiManager(metaclass=SingletonMeta):
     """
     def __init__(self) -> None:
         self.logger = logging.getLogger('fukurou.emoji')
-        self.config: EmojiConfig = get_config(config=EmojiConfig)
 
         self.database = None
         try:
@@ -206,23 +227,163 @@ class EmojiManager(metaclass=SingletonMeta):
 
         self.storage = None
         try:
-            self.storage = get_emoji_storage(sttype=self.config.storage.type)
+            self.storage = get_emoji_storage(
+                sttype=self.config.storage.type,
+                cached=self.config.storage.cache.enabled
+            )
         except ValueError as e:
             self.logger.error(
                 'Failed to assign storage for Emoji (%s %s)',
                 e.args[0], e.args[1]
             )
 
+        self.registered: set[int] = set()
+
+        self.cache = None
+        try:
+            self.cache = get_emoji_cache(chtype=self.config.cache.type)
+        except ValueError as e:
+            self.logger.error(
+                'Failed to assign cache for Emoji (%s %s)',
+                e.args[0], e.args[1]
+            )
+
+        self.constraints = EmojiConstraints(database=self.database)
+        if self.cache is not None:
+            # Constraints set by the other processes
+            self.cache.add_listener(self.constraints.invalidate)
+
+        self.usage = EmojiUsage(database=self.database)
+        self.scrubber = EmojiScrubber(database=self.database, storage=self.storage)
+        self.backups = EmojiBackup(database=self.database, storage=self.storage)
+
+        gauge(
+            'fukurou_emoji_cache_hit_ratio',
+            'Hit ratio of the Emoji caches.',
+            ('cache',),
+            collect=self._collect_hit_ratios
+        )
+        gauge(
+            'fukurou_emoji_dangling_rows',
+            'Emoji rows whose file is missing, as of the last scrub of each guild.',
+            collect=lambda: [({}, sum(len(names) for names in self.scrubber.dangling.values()))]
+        )
+        gauge(
+            'fukurou_emoji_backup_bytes',
+            'Size of the last Emoji snapshot, and the part of it copied rather than linked.',
+            ('part',),
+            collect=self._collect_backup_sizes
+        )
+        if isinstance(self.storage, CachedEmojiStorage):
+            gauge(
+                'fukurou_emoji_storage_cache_bytes',
+                'Total size of the files in the Emoji storage cache.',
+                collect=lambda: [({}, self.storage.stats().size)]
+            )
+            gauge(
+                'fukurou_emoji_storage_cache_evictions',
+                'Number of the files evicted from the Emoji storage cache.',
+                collect=lambda: [({}, self.storage.stats().evictions)]
+            )
+
+    @property
+    def config(self) -> EmojiConfig:
+        # Always the latest one, the config can be reloaded at any time
+        return get_config(config=EmojiConfig)
+
     def register(self, guild_id: int) -> None:
         """
         Register a guild for Emoji features.
+        A guild is registered only once in the process, the later calls do nothing.
 
         :param guild_id: Id of the guild.
         :type guild_id: int
         """
+        if guild_id in self.registered:
+            return
+
         self.storage.register(guild_id=guild_id)
+        self.registered.add(guild_id)
+
+        self.logger.debug('Guild(%d) is now ready for Emoji.', guild_id)
+
+    def validate(self,
+                 guild_id: int,
+                 emoji_name: str | None = None,
+                 file_type: str | None = None,
+                 size: int | None = None) -> None:
+        """
+        Check the name, the type and the size of a new Emoji, the ones given.
+        The commands and the imports are both checked here, so they accept the same Emojis.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_name: Name of the Emoji, which must match `expression.name_pattern` as a whole.
+        :type emoji_name: str | None
+        :param file_type: Type of the file, such as `png`.
+        :type file_type: str | None
+        :param size: Size of the file, in bytes.
+        :type size: int | None
+
+        :raises EmojiFileTypeError: If the type of the file is not supported.
+        :raises EmojiInvalidNameError: If the name is invalid.
+        :raises EmojiFileTooLargeError: If the file is too large.
+        """
+        if file_type is not None and file_type not in FILE_TYPES:
+            raise EmojiFileTypeError(file_type)
+
+        if emoji_name is not None:
+            pattern = self.config.expression.name_pattern
+            if re.fullmatch(pattern=pattern, string=emoji_name) is None:
+                raise EmojiInvalidNameError(emoji_name, pattern)
+
+        if size is not None:
+            maxsize = self.constraints[guild_id].maxsize
+            if size > maxsize * 1024:
+                raise EmojiFileTooLargeError(size / 1024, maxsize)
+
+    async def run(self, func: Callable[..., T], /, *args, **kwargs) -> T:
+        """
+        Call the function off the event loop if the database can be called from
+        the other threads. Otherwise it's called right away, as the SQLite connection
+        is bound to the thread it's made in. Either way, it waits for the restore
+        in progress first, as the database is locked until it's finished.
+
+        :param func: Method of the manager or the database.
+        :type func: Callable[..., T]
+
+        :return: Whatever the function returns.
+        :rtype: T
+        """
+        await self.backups.available.wait()
+
+        if self.database is not None and self.database.threadsafe:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+        return func(*args, **kwargs)
 
-        self.logger.info('Guild(%d) is now ready for Emoji.', guild_id)
+    def warmup(self, guild_ids: list[int]) -> None:
+        """
+        Prepare the guilds ahead of their first use.
+
+        :param guild_ids: Ids of the guilds.
+        :type guild_ids: list[int]
+        """
+        for guild_id in guild_ids:
+            self.register(guild_id=guild_id)
+
+    @connected
+    def warmup_usage(self, guild_ids: list[int]) -> None:
+        """
+        Load the leaderboards of the guilds ahead of their first ranking.
+
+        :param guild_ids: Ids of the guilds.
+        :type guild_ids: list[int]
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        for guild_id in guild_ids:
+            self.usage.leaderboard(guild_id=guild_id)
 
     def get(self, guild_id: int, emoji_name: str) -> Emoji | None:
         """
@@ -236,7 +397,96 @@ class EmojiManager(metaclass=SingletonMeta):
         :return: Emoji object, None if there's no such.
         :rtype: Emoji | None
         """
-        return self.database.get(guild_id=guild_id, emoji_name=emoji_name)
+        return self._cached(
+            guild_id=guild_id,
+            key=f'get:{self._cache_name(emoji_name)}',
+            load=lambda: self.database.get(guild_id=guild_id, emoji_name=emoji_name)
+        )
+
+    def get_many(self, guild_id: int, emoji_names: list[str]) -> dict[str, Emoji]:
+        """
+        Get Emoji objects of the names, looking the uncached ones up at once.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_names: Names of the Emojis.
+        :type emoji_names: list[str]
+
+        :return: Emoji objects found, by the names as given, in the order of the names.
+        :rtype: dict[str, Emoji]
+        """
+        found: dict[str, Emoji | None] = {}
+        missing = []
+        for emoji_name in emoji_names:
+            cache_name = self._cache_name(emoji_name)
+            if cache_name in found:
+                continue
+
+            found[cache_name] = MISSING
+            if self.cache is not None:
+                found[cache_name] = self.cache.get(guild_id=guild_id, key=f'get:{cache_name}')
+
+            if found[cache_name] is MISSING:
+                missing.append(emoji_name)
+
+        if missing:
+            if self.cache is not None:
+                generation = self.cache.generation(guild_id=guild_id)
+
+            loaded = {self._cache_name(emoji.emoji_name): emoji
+                      for emoji in self.database.get_many(guild_id=guild_id, emoji_names=missing)}
+
+            for emoji_name in missing:
+                cache_name = self._cache_name(emoji_name)
+                found[cache_name] = loaded.get(cache_name)
+                if self.cache is not None:
+                    # Not found ones too, as `get()` does
+                    self.cache.set(guild_id=guild_id,
+                                   key=f'get:{cache_name}',
+                                   value=found[cache_name],
+                                   generation=generation)
+
+        emojis = {}
+        for emoji_name in emoji_names:
+            emoji = found[self._cache_name(emoji_name)]
+            if emoji is not None:
+                emojis[emoji_name] = emoji
+
+        return emojis
+
+    def exists(self, guild_id: int, emoji_name: str) -> bool:
+        """
+        Check if the Emoji exists.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_name: Name of the Emoji.
+        :type emoji_name: str
+
+        :return: True if it exists, False if there's no such.
+        :rtype: bool
+        """
+        return self._cached(
+            guild_id=guild_id,
+            key=f'exists:{self._cache_name(emoji_name)}',
+            load=lambda: self.database.exists(guild_id=guild_id, emoji_name=emoji_name)
+        )
+
+    def count(self, guild_id: int) -> int:
+        """
+        Get the number of Emojis in the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Number of Emojis in the guild.
+        :rtype: int
+        """
+        return self._cached(
+            guild_id=guild_id,
+            key='count',
+            load=lambda: self.database.count(guild_id=guild_id)
+        )
 
     def get_file_loc(self, guild_id: int, emoji: Emoji) -> str | os.PathLike:
         """
@@ -250,7 +500,7 @@ class EmojiManager(metaclass=SingletonMeta):
         :return: Directory, URL or such path like string.
         :rtype: str | os.PathLike
         """
-        return os.path.join(self.storage.get_guild_loc(guild_id=guild_id), emoji.file_name)
+        return self.storage.get(guild_id=guild_id, file_name=emoji.file_name)
 
     @connected
     @check_emoji_name(argname='emoji_name')
@@ -292,27 +542,279 @@ class EmojiManager(metaclass=SingletonMeta):
                           attachment.url,
                           attachment.size,
                           attachment.content_type)
-        # Save image to the storage
-        try:
-            self.storage.save(
-                guild_id=guild_id,
-                file=kwargs['file_byte'],
-                file_name=kwargs['file_name']
-            )
-        except EmojiFileIOError as e:
-            raise EmojiFileIOError(*e.args) from e
 
-        # Save emoji data to the database
-        try:
-            self.database.add(guild_id=guild_id,
-                              emoji_name=emoji_name,
-                              uploader_id=uploader,
-                              file_name=kwargs['file_name'])
-        except EmojiDatabaseError as e:
-            self.storage.delete(guild_id=guild_id, file_name=kwargs['file_name'])
-            raise EmojiDatabaseError(*e.args) from e
+        await self.run(self._save,
+                       guild_id=guild_id,
+                       emoji_name=emoji_name,
+                       uploader=uploader,
+                       file_byte=kwargs['file_byte'],
+                       file_name=kwargs['file_name'])
+
+    @connected
+    @check_emoji_name(argname='emoji_name')
+    @check_emoji_isnew(argname='emoji_name')
+    @check_capacity_limit()
+    @check_file_isnew(argname='url')
+    async def add_url(self,
+                      guild_id: int,
+                      emoji_name: str,
+                      uploader: int,
+                      url: str,
+                      **kwargs) -> None:
+        """
+        Add a Emoji for the guild, with the image downloaded from the URL.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_name: Name of the Emoji.
+        :type emoji_name: str
+        :param uploader: Id of the uploader.
+        :type uploader: int
+        :param url: URL of the Emoji image file.
+        :type url: str
+
+        :raises EmojiInvalidNameError: If Emoji name is not matched with the pattern in config.
+        :raises EmojiNameExistsError: If Emoji name is occupied.
+        :raises EmojiCapacityExceededError: If the guild has no room for the Emoji.
+        :raises EmojiFileDownloadError: If failed to download file.
+        :raises EmojiFileTooLargeError: If the file is too large.
+        :raises EmojiFileTypeError: If the type of the file is not supported.
+        :raises EmojiFileExistsError: If the identical file is already in the storage.
+        :raises EmojiFileSaveError: If failed to save file.
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.logger.info('User(%d) is uploading emoji "%s" from %s', uploader, emoji_name, url)
+
+        await self.run(self._save,
+                       guild_id=guild_id,
+                       emoji_name=emoji_name,
+                       uploader=uploader,
+                       file_byte=kwargs['file_byte'],
+                       file_name=kwargs['file_name'])
+
+    @connected
+    async def import_archive(self,
+                             guild_id: int,
+                             uploader: int,
+                             attachment: Attachment) -> ImportReport:
+        """
+        Add the Emojis in a zip archive for the guild.
+        Each file is an Emoji named after the file, without the extension.
+
+        Files are checked just as they're added one by one, and the ones failed
+        the checks are skipped and reported. The others are extracted, hashed and saved
+        in parallel, up to `archive.concurrency` at once, then added in a single transaction.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param uploader: Id of the uploader.
+        :type uploader: int
+        :param attachment: `discord.Attachment` object of the zip archive.
+        :type attachment: Attachment
+
+        :return: Result of each file in the archive.
+        :rtype: ImportReport
 
-        self.logger.info('Emoji "%s" is saved at "%s"', emoji_name, kwargs['file_name'])
+        :raises EmojiFileDownloadError: If failed to download file.
+        :raises EmojiFileTooLargeError: If the archive is larger than `archive.max_size`.
+        :raises EmojiFileTypeError: If the file is not a zip archive.
+        :raises EmojiDatabaseError: If database operation failed, then nothing is added.
+        """
+        started = time.perf_counter()
+        self.logger.info('User(%d) is importing emojis from "%s"', uploader, attachment.filename)
+        self.register(guild_id=guild_id)
+
+        report = ImportReport()
+
+        # Through the downloader, so the size is limited while it's read
+        content = await EmojiDownloader().download(url=attachment.url,
+                                                   maxsize=self.config.archive.max_size * 1024)
+
+        with io.BytesIO(content) as buffer:
+            try:
+                archive = zipfile.ZipFile(buffer)
+            except zipfile.BadZipFile as e:
+                raise EmojiFileTypeError(os.path.splitext(attachment.filename)[1].lstrip('.')) from e
+
+            with archive:
+                max_entries = self.config.archive.max_entries
+                entries = []
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+
+                    emoji_name, extension = entry_name(info)
+                    if len(entries) >= max_entries:
+                        report.add(info.filename, emoji_name, 'skipped', f'more than {max_entries} files')
+                        continue
+
+                    entries.append((info, info.filename, emoji_name, extension, info.file_size))
+
+                async def read(info: zipfile.ZipInfo, maxsize: int) -> tuple[bytes, str, str] | None:
+                    # Extracting and hashing don't need the event loop
+                    return await asyncio.to_thread(read_entry, archive, info, maxsize)
+
+                candidates = self._import_candidates(guild_id=guild_id,
+                                                     entries=entries,
+                                                     names=set(),
+                                                     report=report)
+                saved = await self._import_files(guild_id=guild_id,
+                                                 candidates=candidates,
+                                                 read=read,
+                                                 report=report)
+
+        await self.run(self._import_commit, guild_id=guild_id, uploader=uploader, saved=saved, report=report)
+
+        report.elapsed = time.perf_counter() - started
+        self.logger.info('%s for guild(%d).', report.summary(), guild_id)
+
+        return report
+
+    @connected
+    async def import_native(self,
+                            guild_id: int,
+                            uploader: int,
+                            emojis: list[GuildEmoji],
+                            progress: Callable[[int, int], Awaitable[None]] | None = None) -> ImportReport:
+        """
+        Add the native Emojis of the guild as Emojis, with the same names.
+
+        They're checked, downloaded and saved just as an archive is imported,
+        in batches of `archive.batch_size` added in a transaction each. A checkpoint is
+        saved after each batch, so an interrupted import resumes from the next batch.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param uploader: Id of the uploader.
+        :type uploader: int
+        :param emojis: Native Emojis of the guild.
+        :type emojis: list[discord.Emoji]
+        :param progress: Called with the number of the Emojis done and the total after each batch.
+        :type progress: Callable[[int, int], Awaitable[None]] | None
+
+        :return: Result of each native Emoji, except the ones done before resuming.
+        :rtype: ImportReport
+
+        :raises EmojiDatabaseError: If database operation failed, the batches before are kept.
+        """
+        started = time.perf_counter()
+        self.register(guild_id=guild_id)
+
+        config = self.config.archive
+        checkpoint = ImportCheckpoint(directory=config.checkpoint_directory, guild_id=guild_id)
+        last_id = checkpoint.load()
+        if last_id > 0:
+            self.logger.info('Resuming the native Emoji import of guild(%d) after %d.', guild_id, last_id)
+
+        pending = sorted((emoji for emoji in emojis if emoji.id > last_id), key=lambda emoji: emoji.id)
+        done = len(emojis) - len(pending)
+
+        report = ImportReport()
+        names = set()
+        for start in range(0, len(pending), config.batch_size):
+            batch = pending[start:start + config.batch_size]
+            entries = [
+                (emoji, f'{emoji.name} ({emoji.id})', emoji.name, '.gif' if emoji.animated else '.png', None)
+                for emoji in batch
+            ]
+
+            candidates = self._import_candidates(guild_id=guild_id, entries=entries, names=names, report=report)
+            saved = await self._import_files(guild_id=guild_id,
+                                             candidates=candidates,
+                                             read=self._read_native,
+                                             report=report)
+            await self.run(self._import_commit,
+                           guild_id=guild_id, uploader=uploader, saved=saved, report=report)
+
+            checkpoint.save(last_id=batch[-1].id)
+            done += len(batch)
+            if progress is not None:
+                await progress(done, len(emojis))
+
+        checkpoint.clear()
+
+        report.elapsed = time.perf_counter() - started
+        self.logger.info('%s from the native Emojis of guild(%d).', report.summary(), guild_id)
+
+        return report
+
+    @connected
+    async def export_archive(self, guild_id: int) -> AsyncIterator[BinaryIO]:
+        """
+        Write every Emoji of the guild into zip archives, split to fit in attachments.
+
+        Each Emoji file is named after the Emoji, so a part can be imported as it is.
+        `manifest.json` in the last part has the details of the Emojis, including
+        the part each of them is in.
+
+        Emojis are read from the database a page at a time, and their files are read and
+        written one at a time off the event loop. The manifest is written as they go,
+        in memory while it's small or in a temporary file, so nothing is held for the
+        whole guild. Each part is yielded as soon as it's finished. The caller must
+        close the parts.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Temporary files of the parts of the archive.
+        :rtype: AsyncIterator[BinaryIO]
+        """
+        writer = ArchiveWriter(part_size=self.config.archive.part_size)
+        exported_at = datetime.now(timezone.utc).isoformat()
+
+        with tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_SIZE) as manifest:
+            # Same document as `json.dumps()` makes, the entries are appended one by one
+            manifest.write(f'{{"guild_id": {guild_id}, "exported_at": {json.dumps(exported_at)}, "emojis": ['.encode('utf8'))
+            separator = b'\n'
+
+            async for emoji, use_count in self._export_rows(guild_id=guild_id):
+                entry = {
+                    'name': emoji.emoji_name,
+                    'file': None,
+                    'part': None,
+                    'uploader_id': emoji.uploader_id,
+                    'created_at': emoji.created_at.isoformat(),
+                    'use_count': use_count
+                }
+
+                part = None
+                try:
+                    content = await asyncio.to_thread(self.storage.read,
+                                                      guild_id=guild_id, file_name=emoji.file_name)
+                except EmojiFileIOError:
+                    self.logger.warning('Emoji "%s" of guild(%d) is exported without its file.',
+                                        emoji.emoji_name, guild_id)
+                else:
+                    entry['file'] = f'{emoji.emoji_name}{os.path.splitext(emoji.file_name)[1]}'
+                    part = await asyncio.to_thread(writer.add, name=entry['file'], content=content)
+                    entry['part'] = writer.index
+
+                manifest.write(separator + json.dumps(entry).encode('utf8'))
+                separator = b',\n'
+
+                if part is not None:
+                    yield part
+
+            manifest.write(b'\n]}\n')
+
+            part = await asyncio.to_thread(writer.add, name='manifest.json', content=manifest, compress=True)
+            if part is not None:
+                yield part
+
+        yield await asyncio.to_thread(writer.close)
+
+    async def _export_rows(self, guild_id: int) -> AsyncIterator[tuple[Emoji, int]]:
+        after = None
+        while True:
+            page = await self.run(self.database.export,
+                                  guild_id=guild_id, after=after, limit=EXPORT_PAGE_SIZE)
+            for row in page:
+                yield row
+
+            if len(page) < EXPORT_PAGE_SIZE:
+                return
+
+            after = page[-1][0].emoji_name
 
     @connected
     @check_emoji_exists(argname='emoji_name')
@@ -336,6 +838,9 @@ class EmojiManager(metaclass=SingletonMeta):
         except EmojiDatabaseError as e:
             raise EmojiDatabaseError(*e.args) from e
 
+        self._invalidate(guild_id=guild_id)
+        self.usage.invalidate(guild_id=guild_id)
+
         # Delete image file
         self.storage.delete(guild_id=guild_id, file_name=emoji.file_name)
 
@@ -359,6 +864,9 @@ class EmojiManager(metaclass=SingletonMeta):
         """
         self.database.rename(guild_id=guild_id, old_name=old_name, new_name=new_name)
 
+        self._invalidate(guild_id=guild_id)
+        self.usage.invalidate(guild_id=guild_id)
+
     @connected
     @check_emoji_exists(argname='emoji_name')
     @check_file_type(argname='attachment')
@@ -390,6 +898,8 @@ class EmojiManager(metaclass=SingletonMeta):
         :raises EmojiFileSaveError: If failed to save file.
         :raises EmojiDatabaseError: If database operation failed.
         """
+        self.register(guild_id=guild_id)
+
         # Save image to the storage
         try:
             self.storage.save(
@@ -400,18 +910,21 @@ class EmojiManager(metaclass=SingletonMeta):
         except EmojiFileIOError as e:
             raise EmojiFileIOError(*e.args) from e
 
-        old_emoji = self.database.get(guild_id=guild_id, emoji_name=emoji_name)
+        old_emoji = await self.run(self.database.get, guild_id=guild_id, emoji_name=emoji_name)
 
         # Replace emoji file_name from the database
         try:
-            self.database.replace(guild_id=guild_id,
-                                  emoji_name=emoji_name,
-                                  uploader_id=uploader,
-                                  file_name=kwargs['file_name'])
+            await self.run(self.database.replace,
+                           guild_id=guild_id,
+                           emoji_name=emoji_name,
+                           uploader_id=uploader,
+                           file_name=kwargs['file_name'])
         except EmojiDatabaseError as e:
             self.storage.delete(guild_id=guild_id, file_name=kwargs['file_name'])
             raise EmojiDatabaseError(*e.args) from e
 
+        self._invalidate(guild_id=guild_id)
+
         # Delete old emoji file
         self.storage.delete(guild_id=guild_id, file_name=old_emoji.file_name)
 
@@ -436,6 +949,41 @@ class EmojiManager(metaclass=SingletonMeta):
         """
         return self.database.list(user_id=user_id, guild_id=guild_id, keyword=keyword)
 
+    @connected
+    def set_constraint(self, guild_id: int, capacity: int, maxsize: int) -> None:
+        """
+        Set the constraint of the guild, overriding the config.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param capacity: Maximum number of the Emojis, -1 for unlimited.
+        :type capacity: int
+        :param maxsize: Maximum size of the Emoji file in KB.
+        :type maxsize: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.constraints.set(guild_id=guild_id, capacity=capacity, maxsize=maxsize)
+        self._invalidate(guild_id=guild_id)
+
+        self.logger.info('Constraint of guild(%d) is set to capacity %d, maxsize %dKB.',
+                         guild_id, capacity, maxsize)
+
+    @connected
+    def reset_constraint(self, guild_id: int) -> None:
+        """
+        Delete the constraint of the guild, so the config applies again.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.constraints.reset(guild_id=guild_id)
+        self._invalidate(guild_id=guild_id)
+
+        self.logger.info('Constraint of guild(%d) is reset.', guild_id)
+
     @connected
     def increase_usecount(self, guild_id: int, user_id: int, emoji_name: str) -> None:
         """
@@ -449,3 +997,292 @@ class EmojiManager(metaclass=SingletonMeta):
         :type emoji_name: str
         """
         self.database.increase_usecount(guild_id=guild_id, user_id=user_id, emoji_name=emoji_name)
+        self.usage.record(guild_id=guild_id, emoji_name=emoji_name)
+
+    @connected
+    def top(self,
+            guild_id: int,
+            period: str,
+            user_id: int | None = None,
+            limit: int = 10) -> list[tuple[str, int | float]]:
+        """
+        Get the ranking of the Emojis in the guild by the usage.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param period: One of `hot`, `day`, `week`, `month` and `all`.
+        :type period: str
+        :param user_id: Id of the user to count the usage of, None for everyone.
+        Not available for `hot`.
+        :type user_id: int | None
+        :param limit: Maximum number of the Emojis.
+        :type limit: int
+
+        :return: List of `(emoji_name, use_count)`, or `(emoji_name, score)` for `hot`.
+        :rtype: list[tuple[str, int | float]]
+
+        :raises ValueError: If there's no such period.
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        if period == 'hot':
+            return self.usage.hot(guild_id=guild_id, limit=limit)
+
+        return self.usage.top(guild_id=guild_id, period=period, user_id=user_id, limit=limit)
+
+    @connected
+    def compact_usage(self) -> None:
+        """
+        Roll the usage history up and delete the expired buckets.
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        self.usage.compact()
+
+    @connected
+    async def backup(self, guild_ids: list[int]) -> BackupReport:
+        """
+        Take a snapshot of the database and the Emoji files of the guilds.
+
+        :param guild_ids: Ids of the guilds to back the files up.
+        :type guild_ids: list[int]
+
+        :return: Report of the snapshot.
+        :rtype: BackupReport
+
+        :raises EmojiDatabaseError: If failed to copy the database.
+        :raises EmojiFileIOError: If failed to read the files.
+        :raises OSError: If failed to write the snapshot.
+        """
+        return await self.backups.backup(guild_ids=guild_ids)
+
+    @connected
+    async def restore(self, name: str) -> BackupReport:
+        """
+        Restore the database and the missing Emoji files from the snapshot.
+
+        :param name: Name of the snapshot.
+        :type name: str
+
+        :return: Report of the restore.
+        :rtype: BackupReport
+
+        :raises ValueError: If there's no such snapshot.
+        :raises EmojiDatabaseError: If failed to restore the database.
+        :raises EmojiFileIOError: If failed to save the files.
+        """
+        report, guild_ids = await self.backups.restore(name=name)
+
+        # Nothing loaded before the restore is valid anymore, whether the guild
+        # is in the snapshot or not. The other processes drop theirs on the invalidation.
+        with self.usage.lock:
+            guild_ids = {*guild_ids,
+                         *self.registered,
+                         *self.constraints.entries,
+                         *self.usage.scores,
+                         *self.usage.leaderboards}
+        if self.cache is not None:
+            guild_ids.update(self.cache.guild_ids())
+
+        for guild_id in guild_ids:
+            self._invalidate(guild_id=guild_id)
+            self.constraints.invalidate(guild_id=guild_id)
+            self.usage.invalidate(guild_id=guild_id)
+
+        return report
+
+    def _save(self, guild_id: int, emoji_name: str, uploader: int, file_byte: bytes, file_name: str) -> None:
+        self.register(guild_id=guild_id)
+
+        # Save image to the storage
+        try:
+            self.storage.save(
+                guild_id=guild_id,
+                file=file_byte,
+                file_name=file_name
+            )
+        except EmojiFileIOError as e:
+            raise EmojiFileIOError(*e.args) from e
+
+        # Save emoji data to the database
+        try:
+            self.database.add(guild_id=guild_id,
+                              emoji_name=emoji_name,
+                              uploader_id=uploader,
+                              file_name=file_name)
+        except EmojiDatabaseError as e:
+            self.storage.delete(guild_id=guild_id, file_name=file_name)
+            raise EmojiDatabaseError(*e.args) from e
+
+        self._invalidate(guild_id=guild_id)
+
+        self.logger.info('Emoji "%s" is saved at "%s"', emoji_name, file_name)
+
+    def _import_candidates(self,
+                           guild_id: int,
+                           entries: list[tuple[Any, str, str, str, int | None]],
+                           names: set[str],
+                           report: ImportReport) -> list[tuple[Any, str, str]]:
+        # Entries are `(source, entry, emoji_name, extension, size)`, the size is None if unknown.
+        # Everything but the content is checked before reading any of them,
+        # the type of the file is told from the content once it's read.
+        constraint = self.constraints[guild_id]
+        remaining = None
+        if constraint.capacity != -1:
+            remaining = max(0, constraint.capacity - self.count(guild_id=guild_id))
+
+        candidates = []
+        for source, entry, emoji_name, extension, size in entries:
+            try:
+                # Checked as the commands check them, an unknown extension is an unknown type
+                self.validate(guild_id=guild_id,
+                              emoji_name=emoji_name,
+                              file_type=ARCHIVE_FILETYPES.get(extension, extension),
+                              size=size)
+            except EmojiFileTypeError:
+                report.add(entry, emoji_name, 'failed', f'{extension or "no extension"} is not supported')
+                continue
+            except EmojiInvalidNameError:
+                report.add(entry, emoji_name, 'failed', 'invalid name')
+                continue
+            except EmojiFileTooLargeError:
+                report.add(entry, emoji_name, 'failed', f'larger than {constraint.maxsize}KB')
+                continue
+
+            if self._cache_name(emoji_name) in names:
+                report.add(entry, emoji_name, 'skipped', 'duplicate name')
+            elif self.exists(guild_id=guild_id, emoji_name=emoji_name):
+                report.add(entry, emoji_name, 'skipped', 'already exists')
+            elif remaining == 0:
+                report.add(entry, emoji_name, 'failed', f'capacity {constraint.capacity} reached')
+            else:
+                names.add(self._cache_name(emoji_name))
+                candidates.append((source, entry, emoji_name))
+                if remaining is not None:
+                    remaining -= 1
+
+        return candidates
+
+    async def _import_files(self,
+                            guild_id: int,
+                            candidates: list[tuple[Any, str, str]],
+                            read: Callable[[Any, int], Awaitable[tuple[bytes, str, str] | None]],
+                            report: ImportReport) -> list[tuple[str, str, str]]:
+        maxsize = self.constraints[guild_id].maxsize * 1024
+        semaphore = asyncio.Semaphore(self.config.archive.concurrency)
+        # Emoji names by the file names, to find the same files among the candidates
+        files: dict[str, str] = {}
+        saved = []
+
+        async def ingest(source: Any, entry: str, emoji_name: str) -> None:
+            async with semaphore:
+                try:
+                    data = await read(source, maxsize)
+                except EmojiFileDownloadError:
+                    report.add(entry, emoji_name, 'failed', 'cannot download the file')
+                    return
+                except EmojiFileTypeError:
+                    report.add(entry, emoji_name, 'failed', 'not a supported image')
+                    return
+
+                if data is None:
+                    report.add(entry, emoji_name, 'failed', f'larger than {maxsize // 1024}KB')
+                    return
+
+                content, file_hash, file_type = data
+                file_name = f'{file_hash}.{file_type}'
+
+                duplicate = files.get(file_name)
+                if duplicate is None:
+                    duplicate = await self.run(self.database.file_exists,
+                                               guild_id=guild_id, file_name=file_name)
+                if duplicate is not None:
+                    report.add(entry, emoji_name, 'skipped', f'same file as {duplicate}')
+                    return
+
+                files[file_name] = emoji_name
+                try:
+                    # Storage doesn't need the event loop
+                    await asyncio.to_thread(self.storage.save,
+                                            guild_id=guild_id, file=content, file_name=file_name)
+                except EmojiFileIOError:
+                    del files[file_name]
+                    report.add(entry, emoji_name, 'failed', 'cannot save the file')
+                    return
+
+                saved.append((entry, emoji_name, file_name))
+                report.bytes += len(content)
+
+        await asyncio.gather(*(ingest(*candidate) for candidate in candidates))
+
+        return saved
+
+    def _import_commit(self,
+                       guild_id: int,
+                       uploader: int,
+                       saved: list[tuple[str, str, str]],
+                       report: ImportReport) -> None:
+        if not saved:
+            return
+
+        try:
+            self.database.add_many(
+                guild_id=guild_id,
+                uploader_id=uploader,
+                entries=[(emoji_name, file_name) for _, emoji_name, file_name in saved]
+            )
+        except EmojiDatabaseError as e:
+            for _, _, file_name in saved:
+                self.storage.delete(guild_id=guild_id, file_name=file_name)
+            raise EmojiDatabaseError(*e.args) from e
+
+        self._invalidate(guild_id=guild_id)
+
+        for entry, emoji_name, _ in saved:
+            report.add(entry=entry, emoji_name=emoji_name, status='imported')
+
+    async def _read_native(self, emoji: GuildEmoji, maxsize: int) -> tuple[bytes, str, str] | None:
+        try:
+            content, file_type = await EmojiDownloader().fetch(url=str(emoji.url), maxsize=maxsize)
+        except EmojiFileTooLargeError:
+            return None
+
+        return content, hashlib.md5(content).hexdigest(), file_type
+
+    def _collect_hit_ratios(self) -> list[tuple[dict[str, str], float]]:
+        ratios = []
+        if isinstance(self.storage, CachedEmojiStorage):
+            ratios.append(({'cache': 'storage'}, self.storage.stats().hit_ratio))
+        if self.cache is not None:
+            ratios.append(({'cache': 'metadata'}, self.cache.hit_ratio))
+
+        return ratios
+
+    def _collect_backup_sizes(self) -> list[tuple[dict[str, str], float]]:
+        report = self.backups.last
+        if report is None:
+            return []
+
+        return [({'part': 'total'}, report.total_bytes), ({'part': 'copied'}, report.copied_bytes)]
+
+    def _cache_name(self, emoji_name: str) -> str:
+        if self.config.expression.ignore_spaces is True:
+            return emoji_name.replace(' ', '')
+
+        return emoji_name
+
+    def _cached(self, guild_id: int, key: str, load: Callable[[], Any]) -> Any:
+        if self.cache is None:
+            return load()
+
+        value = self.cache.get(guild_id=guild_id, key=key)
+        if value is MISSING:
+            # Taken before the load, not to cache a value changed meanwhile
+            generation = self.cache.generation(guild_id=guild_id)
+            value = load()
+            self.cache.set(guild_id=guild_id, key=key, value=value, generation=generation)
+
+        return value
+
+    def _invalidate(self, guild_id: int) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(guild_id=guild_id)
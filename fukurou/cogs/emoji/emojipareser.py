@@ -4,22 +4,70 @@ from fukurou.configs import get_config
 from .config import EmojiConfig
 
 class EmojiParser:
+    """
+    Parser for the Emoji expression.
+
+    The patterns are compiled once from the config, and compiled again by
+    `compile()` whenever the config is reloaded.
+    """
+    pattern: re.Pattern | None = None
+    opening: re.Pattern | None = None
+    closing: re.Pattern | None = None
+    token: re.Pattern | None = None
+
+    @classmethod
+    def compile(cls, config: EmojiConfig) -> None:
+        """
+        Compile the patterns of the expression.
+
+        :param config: Emoji config to compile from.
+        :type config: EmojiConfig
+        """
+        cls.pattern = re.compile(config.expression.pattern)
+        cls.opening = re.compile(f'^{config.expression.opening}')
+        cls.closing = re.compile(f'{config.expression.closing}$')
+        cls.token = re.compile(
+            f'{config.expression.opening}({config.expression.name_pattern}){config.expression.closing}'
+        )
+
     @classmethod
     def match(cls, text: str) -> bool:
-        config: EmojiConfig = get_config(config=EmojiConfig)
-        return re.match(config.expression.pattern, text) is not None
+        if cls.pattern is None:
+            cls.compile(config=get_config(config=EmojiConfig))
+
+        return cls.pattern.match(text) is not None
 
     @classmethod
     def parse(cls, text: str) -> str | None:
         if not EmojiParser.match(text=text):
             return None
 
-        config: EmojiConfig = get_config(config=EmojiConfig)
-        opening = config.expression.opening
-        closing = config.expression.closing
-
         parsed = text
-        parsed = re.sub(f'^{opening}', '', parsed, 1)
-        parsed = re.sub(f'{closing}$', '', parsed, 1)
+        parsed = cls.opening.sub('', parsed, 1)
+        parsed = cls.closing.sub('', parsed, 1)
 
         return parsed
+
+    @classmethod
+    def scan(cls, text: str) -> list[tuple[str, str]]:
+        """
+        Find every Emoji expression in the text, in a single pass from the start.
+        Expressions don't overlap, the closing of one can't be the opening of the next.
+
+        :param text: Text to scan.
+        :type text: str
+
+        :return: List of `(expression, emoji_name)` in the order they first appear,
+        without the duplicates.
+        :rtype: list[tuple[str, str]]
+        """
+        if cls.token is None:
+            cls.compile(config=get_config(config=EmojiConfig))
+
+        # As long as the names can't have the closing in them, as with the default
+        # pattern, a match is never tried past the next closing, so it's linear.
+        tokens = {}
+        for match in cls.token.finditer(text):
+            tokens.setdefault(match.group(1), match.group(0))
+
+        return [(expression, emoji_name) for emoji_name, expression in tokens.items()]
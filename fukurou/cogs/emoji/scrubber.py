@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+
+from fukurou.configs import get_config
+from fukurou.metrics import counter
+from .config import EmojiConfig
+from .database import BaseEmojiDatabase
+from .exceptions import EmojiFileIOError
+from .storage import BaseEmojiStorage
+
+SCRUBBED_FILES = counter(
+    'fukurou_emoji_scrubbed_files_total',
+    'Emoji files and rows checked by the scrubber.',
+    ('result',)
+)
+
+class EmojiScrubber:
+    """
+    Reconciler of the Emoji rows in the database and the files in the storage.
+
+    A file is saved before its row is added, and deleted after its row is, so a
+    failure in between leaves a file that no row refers to. Those orphans are moved
+    to the quarantine once they're older than `scrub.grace_period`, which covers the
+    files of the rows still being added. Rows whose file is missing are dangling,
+    they're only reported since the Emoji has to be added again by hand.
+
+    Guilds are scrubbed one at a time, waiting at least `scrub.interval` seconds
+    after each one and longer for the large ones, so no more than
+    `scrub.files_per_second` files are checked on average.
+    """
+    def __init__(self, database: BaseEmojiDatabase | None, storage: BaseEmojiStorage | None) -> None:
+        self.logger = logging.getLogger('fukurou.emoji.scrubber')
+        self.database = database
+        self.storage = storage
+
+        self.guilds_done = 0
+        self.guilds_total = 0
+        self.files_checked = 0
+        self.quarantined = 0
+        self.dangling: dict[int, list[str]] = {}
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    @property
+    def config(self) -> EmojiConfig.EmojiScrubConfig:
+        return get_config(config=EmojiConfig).scrub
+
+    @property
+    def running(self) -> bool:
+        return self.started is not None and self.finished is None
+
+    async def run(self, guild_ids: list[int]) -> None:
+        """
+        Scrub the guilds in a pass. The counts of the previous pass are reset,
+        except the dangling rows of the guilds not scrubbed again.
+
+        :param guild_ids: Ids of the guilds.
+        :type guild_ids: list[int]
+        """
+        self.guilds_done = 0
+        self.guilds_total = len(guild_ids)
+        self.files_checked = 0
+        self.quarantined = 0
+        self.started = time.time()
+        self.finished = None
+
+        self.logger.info('Emoji scrub started for %d guilds.', self.guilds_total)
+
+        for guild_id in guild_ids:
+            try:
+                checked = await self.scrub(guild_id=guild_id)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error('Failed to scrub the Emojis of guild(%d): %s', guild_id, e.args)
+                checked = 0
+
+            self.guilds_done += 1
+
+            config = self.config
+            await asyncio.sleep(max(config.interval, checked / config.files_per_second))
+
+        self.finished = time.time()
+
+        self.logger.info(
+            'Emoji scrub finished for %d guilds in %.1f seconds: '
+            '%d files checked, %d quarantined, %d dangling rows.',
+            self.guilds_total, self.finished - self.started, self.files_checked,
+            self.quarantined, sum(len(names) for names in self.dangling.values())
+        )
+
+    async def scrub(self, guild_id: int) -> int:
+        """
+        Quarantine the orphan files of the guild and find its dangling rows.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Number of the files and rows checked.
+        :rtype: int
+
+        :raises EmojiDatabaseError: If database operation failed.
+        :raises EmojiFileIOError: If failed to list files.
+        """
+        # Listed before the rows are read, so a file of a row being added is either
+        # listed already or saved after the listing, not yet missing.
+        files = await asyncio.to_thread(self.storage.list_files, guild_id=guild_id)
+        # The database connection may not be shared with the other threads
+        emojis = {emoji.file_name: emoji.emoji_name
+                  for emoji, _ in self.database.export(guild_id=guild_id)}
+
+        missing = [file_name for file_name in emojis if file_name not in files]
+        if missing:
+            # Saved between the listing and the read
+            files = await asyncio.to_thread(self.storage.list_files, guild_id=guild_id)
+            missing = [file_name for file_name in missing if file_name not in files]
+
+        dangling = sorted(emojis[file_name] for file_name in missing)
+        if dangling:
+            self.dangling[guild_id] = dangling
+            self.logger.warning('Guild(%d) has %d Emojis without a file: %s',
+                                guild_id, len(dangling), ', '.join(dangling))
+        else:
+            self.dangling.pop(guild_id, None)
+
+        deadline = time.time() - self.config.grace_period
+        for file_name, modified in files.items():
+            if file_name in emojis:
+                SCRUBBED_FILES.inc(result='ok')
+                continue
+
+            if modified > deadline:
+                SCRUBBED_FILES.inc(result='recent')
+                continue
+
+            try:
+                await asyncio.to_thread(self.storage.quarantine, guild_id=guild_id, file_name=file_name)
+            except EmojiFileIOError:
+                # Most likely deleted in the meantime
+                continue
+
+            SCRUBBED_FILES.inc(result='orphan')
+            self.quarantined += 1
+            self.logger.info('Quarantined the orphan file %s of guild(%d).', file_name, guild_id)
+
+        SCRUBBED_FILES.inc(len(missing), result='dangling')
+
+        checked = len(files) + len(missing)
+        self.files_checked += checked
+
+        return checked
@@ -0,0 +1,355 @@
+from collections import OrderedDict, deque
+import asyncio
+import logging
+import re
+import time
+
+import aiohttp
+import discord
+
+from fukurou.configs import get_config
+from fukurou.metrics import gauge
+from .config import EmojiConfig
+from .data import Emoji
+from .emojimanager import EmojiManager
+from .exceptions import EmojiError
+from .views import EmojiEmbed
+
+WEBHOOK_ROUTE = re.compile(r'/webhooks/(\d+)/')
+
+# A channel without the permission for webhooks is retried after this long, in seconds
+NO_WEBHOOK_TTL = 600
+
+class RateLimitBucket:
+    """
+    Rate limit of a webhook, tracked from the headers of its responses.
+    """
+    def __init__(self) -> None:
+        self.remaining = 1
+        self.reset_at = 0.0
+
+    def update(self, headers) -> None:
+        now = time.monotonic()
+
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            self.remaining = 0
+            self.reset_at = max(self.reset_at, now + float(retry_after))
+            return
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is not None and reset_after is not None:
+            self.remaining = int(remaining)
+            self.reset_at = now + float(reset_after)
+
+    def delay(self) -> float:
+        """
+        Get how long to wait before the next request, in seconds.
+        """
+        if self.remaining > 0:
+            return 0.0
+
+        return max(0.0, self.reset_at - time.monotonic())
+
+class SendJob:
+    def __init__(self, message: discord.Message, emojis: list[Emoji], content: str | None) -> None:
+        self.message = message
+        self.emojis = emojis
+        self.content = content
+        self.file_locs: list[str] = []
+        self.future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+
+class ChannelQueue:
+    """
+    Pending sends of a channel. They are sent one by one, in order.
+    """
+    def __init__(self, channel: discord.abc.Messageable, guild_id: int) -> None:
+        self.channel = channel
+        self.guild_id = guild_id
+        self.jobs: deque[SendJob] = deque()
+        # Either running a job, or waiting in the ready queue or for the rate limit
+        self.scheduled = False
+
+class EmojiSender:
+    """
+    Scheduler of the outgoing Emoji sends.
+
+    Sends are queued per channel and each channel sends one at a time, so the sends
+    never collide on the rate limit of the channel. Channels are picked from the guilds
+    in round-robin, so a noisy guild cannot starve the others, and at most
+    `sender.concurrency` sends run at once.
+
+    A webhook is created once per channel and reused, and its rate limit is tracked
+    from the response headers, so a channel waits for the reset instead of hitting 429.
+    Above `sender.burst_threshold` pending sends in a channel, new ones are dropped,
+    or collapsed into a pending send of the same Emojis, depending on `sender.burst_mode`.
+    """
+    def __init__(self, bot: discord.Bot) -> None:
+        self.bot = bot
+        self.logger = logging.getLogger('fukurou.emoji.sender')
+
+        self.queues: dict[int, ChannelQueue] = {}
+        self.ready: OrderedDict[int, deque[ChannelQueue]] = OrderedDict()
+        self.buckets: dict[int, RateLimitBucket] = {}
+        self.webhooks: dict[int, discord.Webhook] = {}
+        self.no_webhook: dict[int, float] = {}
+
+        self.wakeup: asyncio.Event | None = None
+        self.task: asyncio.Task | None = None
+        self.session: aiohttp.ClientSession | None = None
+
+        gauge(
+            'fukurou_emoji_send_queue_jobs',
+            'Emoji sends waiting in the channel queues.',
+            collect=lambda: [({}, sum(len(queue.jobs) for queue in self.queues.values()))]
+        )
+
+    @property
+    def config(self) -> EmojiConfig.EmojiSenderConfig:
+        return get_config(config=EmojiConfig).sender
+
+    async def send(self,
+                   message: discord.Message,
+                   emojis: list[Emoji],
+                   content: str | None = None) -> str:
+        """
+        Queue the Emojis to be sent in place of the message, and wait until they're sent.
+        They're sent together in a single message.
+
+        :param message: Message with the Emoji expressions.
+        :type message: discord.Message
+        :param emojis: Emojis to send, no more than 10.
+        :type emojis: list[Emoji]
+        :param content: Rest of the message to send with them, if any.
+        :type content: str | None
+
+        :return: How it's handled, one of `webhook`, `embed`, `failed`, `dropped` and `collapsed`.
+        :rtype: str
+        """
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._dispatch())
+
+        queue = self.queues.get(message.channel.id)
+        if queue is None:
+            queue = self.queues[message.channel.id] = ChannelQueue(
+                channel=message.channel,
+                guild_id=message.guild.id
+            )
+
+        if len(queue.jobs) >= self.config.burst_threshold > 0:
+            match self.config.burst_mode:
+                case 'drop':
+                    return 'dropped'
+                case 'collapse':
+                    names = [emoji.emoji_name for emoji in emojis]
+                    if content is None and any(
+                        job.content is None and [emoji.emoji_name for emoji in job.emojis] == names
+                        for job in queue.jobs
+                    ):
+                        return 'collapsed'
+
+        job = SendJob(message=message, emojis=emojis, content=content)
+        queue.jobs.append(job)
+        self._schedule(queue)
+
+        return await job.future
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+        if self.session is not None:
+            await self.session.close()
+
+    def _schedule(self, queue: ChannelQueue) -> None:
+        if queue.scheduled or not queue.jobs:
+            return
+
+        queue.scheduled = True
+
+        webhook = self.webhooks.get(queue.channel.id)
+        bucket = self.buckets.get(webhook.id) if webhook is not None else None
+        delay = bucket.delay() if bucket is not None else 0.0
+
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._enqueue, queue)
+        else:
+            self._enqueue(queue)
+
+    def _enqueue(self, queue: ChannelQueue) -> None:
+        self.ready.setdefault(queue.guild_id, deque()).append(queue)
+        self.wakeup.set()
+
+    async def _next(self) -> ChannelQueue:
+        while not self.ready:
+            self.wakeup.clear()
+            await self.wakeup.wait()
+
+        # Take a channel of the first guild, then move the guild to the back
+        guild_id, channels = next(iter(self.ready.items()))
+        queue = channels.popleft()
+
+        if channels:
+            self.ready.move_to_end(guild_id)
+        else:
+            del self.ready[guild_id]
+
+        return queue
+
+    async def _dispatch(self) -> None:
+        semaphore = asyncio.Semaphore(self.config.concurrency)
+
+        while True:
+            await semaphore.acquire()
+            queue = await self._next()
+
+            task = asyncio.create_task(self._run(queue))
+            task.add_done_callback(lambda _: semaphore.release())
+
+    async def _run(self, queue: ChannelQueue) -> None:
+        job = queue.jobs.popleft()
+
+        try:
+            job.future.set_result(await self._deliver(job))
+        except Exception as e: # pylint: disable=broad-exception-caught
+            job.future.set_exception(e)
+        finally:
+            queue.scheduled = False
+
+            if queue.jobs:
+                self._schedule(queue)
+            else:
+                del self.queues[queue.channel.id]
+
+    async def _deliver(self, job: SendJob) -> str:
+        message = job.message
+
+        try:
+            # Read before the message is deleted, so it's left as it is if a file is missing
+            job.file_locs = await self._file_locs(message=message, emojis=job.emojis)
+            files = self._files(job=job)
+        except (OSError, EmojiError) as e:
+            self.logger.error('Cannot read emoji files of the user(%d): %s', message.author.id, e.args)
+            return 'failed'
+
+        try:
+            await message.delete()
+
+            if await self._send_webhook(job=job, files=files):
+                return 'webhook'
+
+            # Send embedded Emoji when there's no permission to create webhook.
+            await message.channel.send(
+                files=self._files(job=job),
+                embeds=[
+                    EmojiEmbed(
+                        description=job.content if i == 0 else None,
+                        image_url=f'attachment://{emoji.file_name}',
+                        author=message.author
+                    )
+                    for i, emoji in enumerate(job.emojis)
+                ],
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+        except (discord.DiscordException, OSError, EmojiError) as e:
+            self.logger.error('Cannot send emoji to the user(%d): %s', message.author.id, e.args)
+            return 'failed'
+        finally:
+            # Those sent are closed already, this closes the ones not sent
+            for file in files:
+                file.close()
+
+        return 'embed'
+
+    async def _send_webhook(self, job: SendJob, files: list[discord.File]) -> bool:
+        message = job.message
+        channel_id = message.channel.id
+        if self.no_webhook.get(channel_id, 0) > time.monotonic():
+            return False
+
+        # Retry once with a new webhook if the cached one has been deleted
+        for attempt in range(2):
+            if attempt > 0:
+                # Closed by the failed request
+                files = self._files(job=job)
+
+            try:
+                webhook = await self._get_webhook(channel=message.channel)
+                await webhook.send(
+                    content=job.content or discord.utils.MISSING,
+                    username=message.author.display_name,
+                    avatar_url=message.author.display_avatar.url,
+                    files=files,
+                    # The rest of the message has been sent once, it shouldn't mention again
+                    allowed_mentions=discord.AllowedMentions.none()
+                )
+            except discord.NotFound:
+                self.webhooks.pop(channel_id, None)
+                continue
+            except discord.Forbidden:
+                self.no_webhook[channel_id] = time.monotonic() + NO_WEBHOOK_TTL
+                return False
+
+            return True
+
+        return False
+
+    async def _get_webhook(self, channel: discord.TextChannel) -> discord.Webhook:
+        webhook = self.webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+
+        # Must have MANAGE_WEBHOOKS permission!
+        for found in await channel.webhooks():
+            if found.token is not None and found.user is not None and found.user.id == self.bot.user.id:
+                webhook = found
+                break
+        else:
+            webhook = await channel.create_webhook(name=self.config.webhook_name)
+
+        webhook = self.webhooks[channel.id] = await self._bind(webhook)
+        return webhook
+
+    async def _bind(self, webhook: discord.Webhook) -> discord.Webhook:
+        # Webhooks are sent through a session of its own, to read the rate limit headers
+        if self.session is None:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_end.append(self._on_request_end)
+            self.session = aiohttp.ClientSession(trace_configs=[trace])
+
+        return discord.Webhook.partial(id=webhook.id, token=webhook.token, session=self.session)
+
+    async def _on_request_end(self, session, context, params: aiohttp.TraceRequestEndParams) -> None: # pylint: disable=unused-argument
+        match = WEBHOOK_ROUTE.search(params.url.path)
+        if match is None:
+            return
+
+        webhook_id = int(match.group(1))
+        bucket = self.buckets.get(webhook_id)
+        if bucket is None:
+            bucket = self.buckets[webhook_id] = RateLimitBucket()
+
+        bucket.update(params.response.headers)
+
+    async def _file_locs(self, message: discord.Message, emojis: list[Emoji]) -> list[str]:
+        file_locs = []
+        for emoji in emojis:
+            # A cache miss reads the backend, or waits for another thread reading it
+            file_locs.append(await asyncio.to_thread(EmojiManager().get_file_loc,
+                                                     guild_id=message.guild.id, emoji=emoji))
+
+        return file_locs
+
+    def _files(self, job: SendJob) -> list[discord.File]:
+        files = []
+        try:
+            for file_loc, emoji in zip(job.file_locs, job.emojis):
+                files.append(discord.File(fp=file_loc, filename=emoji.file_name))
+        except OSError:
+            for file in files:
+                file.close()
+            raise
+
+        return files
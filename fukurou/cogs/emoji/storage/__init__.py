@@ -1,7 +1,10 @@
 from .base import BaseEmojiStorage
+from .cached import CacheStats, CachedEmojiStorage
 from .factory import get_emoji_storage
 
 __all__ = [
     'BaseEmojiStorage',
+    'CacheStats',
+    'CachedEmojiStorage',
     'get_emoji_storage'
 ]
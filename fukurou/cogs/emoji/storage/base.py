@@ -1,19 +1,46 @@
 from abc import ABC, abstractmethod
+from functools import wraps
 from os import PathLike
 import logging
+import time
 
 from fukurou.configs import get_config
+from fukurou.metrics import histogram
 from fukurou.cogs.emoji.config import EmojiConfig
 
+IO_SECONDS = histogram(
+    'fukurou_emoji_storage_io_seconds',
+    'Latency of the Emoji storage operations.',
+    ('backend', 'method')
+)
+
+def timed_io(func):
+    """
+    Observe the latency of the storage operation.
+    It can be used as a decorator `@timed_io` to the method.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            IO_SECONDS.observe(time.perf_counter() - started,
+                               backend=type(self).__name__, method=func.__name__)
+    return wrapper
+
 class BaseEmojiStorage(ABC):
     """
     Abstract class for interacting with the Emoji storage.
     """
     def __init__(self) -> None:
         self.logger = logging.getLogger('fukurou.emoji.storage')
-        self.config: EmojiConfig = get_config(config=EmojiConfig)
         self._setup()
 
+    @property
+    def config(self) -> EmojiConfig:
+        return get_config(config=EmojiConfig)
+
     @abstractmethod
     def _setup(self) -> None:
         """
@@ -62,6 +89,23 @@ class BaseEmojiStorage(ABC):
         """
         raise NotImplementedError("BaseEmojiStorage.get() is not implemented!")
 
+    @abstractmethod
+    def read(self, guild_id: int, file_name: str, **kwargs) -> bytes:
+        """
+        Read the content of the image.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param file_name: Name of the image file.
+        :type file_name: str
+
+        :return: Content of the image, in bytes.
+        :rtype: bytes
+
+        :raises EmojiFileIOError: If failed to read file.
+        """
+        raise NotImplementedError("BaseEmojiStorage.read() is not implemented!")
+
     @abstractmethod
     def save(self, guild_id: int, file: bytes, file_name: str, **kwargs) -> None:
         """
@@ -87,4 +131,32 @@ class BaseEmojiStorage(ABC):
         :type file_name: str
         """
         raise NotImplementedError("BaseEmojiStorage.delete() is not implemented!")
-    
\ No newline at end of file
+
+    @abstractmethod
+    def list_files(self, guild_id: int) -> dict[str, float]:
+        """
+        Get the files of the guild in the storage.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Modified time of the files in epoch seconds, by their names.
+        :rtype: dict[str, float]
+
+        :raises EmojiFileIOError: If failed to list files.
+        """
+        raise NotImplementedError("BaseEmojiStorage.list_files() is not implemented!")
+
+    @abstractmethod
+    def quarantine(self, guild_id: int, file_name: str) -> None:
+        """
+        Move the file out of the guild's storage, to be inspected or deleted by hand.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param file_name: Name of the image file.
+        :type file_name: str
+
+        :raises EmojiFileIOError: If failed to move file.
+        """
+        raise NotImplementedError("BaseEmojiStorage.quarantine() is not implemented!")
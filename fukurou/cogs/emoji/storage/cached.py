@@ -0,0 +1,267 @@
+import os
+from os import PathLike
+from collections import OrderedDict
+import threading
+
+from fukurou.cogs.emoji.exceptions import EmojiFileIOError
+from .base import BaseEmojiStorage, timed_io
+
+class CacheStats:
+    """
+    Snapshot of the cache statistics.
+    """
+    def __init__(self,
+                 hits: int,
+                 misses: int,
+                 evictions: int,
+                 entries: int,
+                 size: int,
+                 max_size: int) -> None:
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.entries = entries
+        self.size = size
+        self.max_size = max_size
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.entries} files, {self.size/1024:.1f}/{self.max_size/1024:.1f}KB, '
+            f'hit ratio {self.hit_ratio:.2%} ({self.hits}/{self.hits + self.misses}), '
+            f'{self.evictions} evictions'
+        )
+
+class _Flight:
+    """
+    A fetch in progress. Followers wait on `event` until the leader finishes.
+    """
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.error: BaseException | None = None
+
+class CachedEmojiStorage(BaseEmojiStorage):
+    """
+    Storage decorator keeping a bounded local disk cache in front of another storage.
+
+    Files are evicted in LRU order once the total size of the cache exceeds
+    `storage.cache.max_size` (in KB). Concurrent fetches of the same file are
+    deduplicated, so only one of them reaches the backend.
+
+    Emoji files are named after their content hash, so a replaced Emoji always
+    gets a new file name. The old one is dropped from the cache by `delete()`.
+    """
+    def __init__(self, backend: BaseEmojiStorage) -> None:
+        self.backend = backend
+        self.entries: OrderedDict[tuple[int, str], int] = OrderedDict()
+        self.lock = threading.Lock()
+        self.inflight: dict[tuple[int, str], _Flight] = {}
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        super().__init__()
+
+    def _setup(self):
+        cache_config = self.config.storage.cache
+        self.directory = os.path.abspath(cache_config.directory)
+        self.max_size = cache_config.max_size * 1024
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            self.logger.error('Error occured while setting up Emoji cache: %s', e.strerror)
+            return
+
+        # Rebuild the index from the previous run, least recently used first
+        found = []
+        for guild_dir in os.scandir(self.directory):
+            if not guild_dir.is_dir() or not guild_dir.name.isdigit():
+                continue
+
+            for file in os.scandir(guild_dir.path):
+                if not file.is_file() or file.name.endswith('.tmp'):
+                    continue
+
+                stat = file.stat()
+                found.append((stat.st_atime, int(guild_dir.name), file.name, stat.st_size))
+
+        for _, guild_id, file_name, size in sorted(found):
+            self.entries[(guild_id, file_name)] = size
+            self.size += size
+
+        self._evict()
+
+        self.logger.info('An Emoji cache is located at: %s (%s)', self.directory, self.stats())
+
+    def get_guild_loc(self, guild_id: int) -> str | PathLike:
+        return os.path.join(self.directory, str(guild_id))
+
+    def register(self, guild_id: int) -> None:
+        self.backend.register(guild_id=guild_id)
+
+        try:
+            os.makedirs(self.get_guild_loc(guild_id=guild_id), exist_ok=True)
+        except OSError as e:
+            self.logger.error('Error occured while registering Emoji cache for guild(%d): %s',
+                              guild_id, e.strerror)
+
+    @timed_io
+    def get(self, guild_id: int, file_name: str, **kwargs) -> str | PathLike:
+        self._fetch(guild_id=guild_id, file_name=file_name)
+        return self._path(guild_id=guild_id, file_name=file_name)
+
+    @timed_io
+    def read(self, guild_id: int, file_name: str, **kwargs) -> bytes:
+        file_path = self.get(guild_id=guild_id, file_name=file_name)
+
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        except OSError as e:
+            self.logger.error('Error occured while reading cached file.', exc_info=1)
+            raise EmojiFileIOError('r', *e.args) from e
+
+    @timed_io
+    def save(self, guild_id: int, file: bytes, file_name: str, **kwargs) -> None:
+        self.backend.save(guild_id=guild_id, file=file, file_name=file_name, **kwargs)
+
+        # Write through, a new Emoji is likely to be used soon
+        try:
+            self._store(guild_id=guild_id, file=file, file_name=file_name)
+        except OSError:
+            self.logger.warning('Cannot write file to the Emoji cache.', exc_info=1)
+
+    @timed_io
+    def delete(self, guild_id: int, file_name: str, **kwargs) -> None:
+        self.invalidate(guild_id=guild_id, file_name=file_name)
+        self.backend.delete(guild_id=guild_id, file_name=file_name, **kwargs)
+
+    def list_files(self, guild_id: int) -> dict[str, float]:
+        return self.backend.list_files(guild_id=guild_id)
+
+    def quarantine(self, guild_id: int, file_name: str) -> None:
+        self.invalidate(guild_id=guild_id, file_name=file_name)
+        self.backend.quarantine(guild_id=guild_id, file_name=file_name)
+
+    def invalidate(self, guild_id: int, file_name: str) -> None:
+        """
+        Drop the file from the cache. The backend is left untouched.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param file_name: Name of the image file.
+        :type file_name: str
+        """
+        with self.lock:
+            size = self.entries.pop((guild_id, file_name), None)
+            if size is None:
+                return
+
+            self.size -= size
+
+        self._remove(guild_id=guild_id, file_name=file_name)
+
+    def stats(self) -> CacheStats:
+        """
+        Get the statistics of the cache.
+
+        :return: Snapshot of the cache statistics.
+        :rtype: CacheStats
+        """
+        with self.lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self.entries),
+                size=self.size,
+                max_size=self.max_size
+            )
+
+    def _path(self, guild_id: int, file_name: str) -> str:
+        return os.path.join(self.get_guild_loc(guild_id=guild_id), file_name)
+
+    def _fetch(self, guild_id: int, file_name: str) -> None:
+        key = (guild_id, file_name)
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return
+
+            self.misses += 1
+
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                # Raised as the leader did, whatever it is
+                raise flight.error
+            return
+
+        try:
+            file = self.backend.read(guild_id=guild_id, file_name=file_name)
+            self._store(guild_id=guild_id, file=file, file_name=file_name)
+        except OSError as e:
+            flight.error = EmojiFileIOError('r', *e.args)
+            raise flight.error from e
+        except BaseException as e:
+            # Followers must not take the missing file in the cache for a fetched one
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            flight.event.set()
+
+    def _store(self, guild_id: int, file: bytes, file_name: str) -> None:
+        guild_dir = self.get_guild_loc(guild_id=guild_id)
+        file_path = self._path(guild_id=guild_id, file_name=file_name)
+        temp_path = f'{file_path}.{threading.get_ident()}.tmp'
+
+        os.makedirs(guild_dir, exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(file)
+        os.replace(temp_path, file_path)
+
+        with self.lock:
+            self.size += len(file) - self.entries.pop((guild_id, file_name), 0)
+            self.entries[(guild_id, file_name)] = len(file)
+
+        self._evict()
+
+    def _evict(self) -> None:
+        evicted = []
+        with self.lock:
+            # Always keep the most recent entry, even if it exceeds the budget alone
+            while self.size > self.max_size and len(self.entries) > 1:
+                key, size = self.entries.popitem(last=False)
+                self.size -= size
+                self.evictions += 1
+                evicted.append(key)
+
+        for guild_id, file_name in evicted:
+            self._remove(guild_id=guild_id, file_name=file_name)
+
+        if evicted:
+            self.logger.debug('Evicted %d files from the Emoji cache (%s)', len(evicted), self.stats())
+
+    def _remove(self, guild_id: int, file_name: str) -> None:
+        try:
+            os.remove(self._path(guild_id=guild_id, file_name=file_name))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.logger.warning('Cannot remove file from the Emoji cache.', exc_info=1)
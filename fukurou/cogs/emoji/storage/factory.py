@@ -1,12 +1,15 @@
 from .base import BaseEmojiStorage
+from .cached import CachedEmojiStorage
 from .local import LocalEmojiStorage
 
-def get_emoji_storage(sttype: str) -> BaseEmojiStorage:
+def get_emoji_storage(sttype: str, cached: bool = False) -> BaseEmojiStorage:
     """
     Get an image storage controller for the Emoji.
 
     :param sttype: Type of the storage in string.
     :type sttype: str
+    :param cached: If it's set to True, the storage will be wrapped with a local disk cache.
+    :type cached: bool
 
     :return: Image storage IO controller.
     :rtype: BaseEmojiStorage
@@ -15,6 +18,11 @@ def get_emoji_storage(sttype: str) -> BaseEmojiStorage:
     """
     match sttype:
         case 'local':
-            return LocalEmojiStorage()
+            storage = LocalEmojiStorage()
+        case _:
+            raise ValueError('There is no such storage', sttype)
 
-    raise ValueError('There is no such storage', sttype)
+    if cached is True:
+        return CachedEmojiStorage(backend=storage)
+
+    return storage
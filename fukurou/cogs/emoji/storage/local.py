@@ -2,7 +2,7 @@ import os
 from os import PathLike
 
 from fukurou.cogs.emoji.exceptions import EmojiFileIOError
-from .base import BaseEmojiStorage
+from .base import BaseEmojiStorage, timed_io
 
 class LocalEmojiStorage(BaseEmojiStorage):
     def _setup(self):
@@ -29,7 +29,7 @@ class LocalEmojiStorage(BaseEmojiStorage):
             os.makedirs(guild_dir)
             self.logger.info('Registered a new Emoji storage for guild(%d).', guild_id)
         except FileExistsError:
-            self.logger.info('Found a registered Emoji storage for guild(%d).', guild_id)
+            self.logger.debug('Found a registered Emoji storage for guild(%d).', guild_id)
         except OSError as e:
             self.logger.error('Error occured while registering Emoji storage for guild(%d): %s',
                               guild_id, e.strerror)
@@ -38,6 +38,18 @@ class LocalEmojiStorage(BaseEmojiStorage):
         guild_dir = self.get_guild_loc(guild_id=guild_id)
         return os.path.join(guild_dir, file_name)
 
+    @timed_io
+    def read(self, guild_id: int, file_name: str, **kwargs) -> bytes:
+        file_path = self.get(guild_id=guild_id, file_name=file_name)
+
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        except OSError as e:
+            self.logger.error('Error occured while reading file.', exc_info=1)
+            raise EmojiFileIOError('r', *e.args) from e
+
+    @timed_io
     def save(self, guild_id: int, file: bytes, file_name: str, **kwargs) -> None:
         file_path = self.get(guild_id=guild_id, file_name=file_name)
 
@@ -51,6 +63,7 @@ class LocalEmojiStorage(BaseEmojiStorage):
 
         return file_name
 
+    @timed_io
     def delete(self, guild_id: int, file_name: str, **kwargs) -> None:
         file_path = self.get(guild_id=guild_id, file_name=file_name)
 
@@ -61,3 +74,32 @@ class LocalEmojiStorage(BaseEmojiStorage):
         except OSError as e:
             self.logger.error('Error occured while removing file.', exc_info=1)
             raise EmojiFileIOError('w', *e.args) from e
+
+    @timed_io
+    def list_files(self, guild_id: int) -> dict[str, float]:
+        files = {}
+
+        try:
+            for file in os.scandir(self.get_guild_loc(guild_id=guild_id)):
+                if file.is_file():
+                    files[file.name] = file.stat().st_mtime
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.error('Error occured while listing files.', exc_info=1)
+            raise EmojiFileIOError('r', *e.args) from e
+
+        return files
+
+    @timed_io
+    def quarantine(self, guild_id: int, file_name: str) -> None:
+        # Kept apart from the guild directories, which are named after the ids
+        quarantine_dir = os.path.join(self.directory, 'quarantine', str(guild_id))
+
+        try:
+            os.makedirs(quarantine_dir, exist_ok=True)
+            os.replace(self.get(guild_id=guild_id, file_name=file_name),
+                       os.path.join(quarantine_dir, file_name))
+        except OSError as e:
+            self.logger.error('Error occured while quarantining file.', exc_info=1)
+            raise EmojiFileIOError('w', *e.args) from e
@@ -0,0 +1,290 @@
+import heapq
+import logging
+import threading
+import time
+
+from fukurou.configs import get_config
+from .config import EmojiConfig
+from .database import BaseEmojiDatabase
+
+# Length of the periods of `/emoji top`, in seconds. None is the all time.
+PERIODS = {
+    'day': 86400,
+    'week': 604800,
+    'month': 2592000,
+    'all': None
+}
+
+class HotScore:
+    """
+    Exponentially decayed use count of an Emoji, as of `updated`.
+    """
+    __slots__ = ('score', 'updated')
+
+    def __init__(self, score: float, updated: float) -> None:
+        self.score = score
+        self.updated = updated
+
+    def decayed(self, now: float, half_life: float) -> float:
+        return self.score * 2 ** (-(now - self.updated) / half_life)
+
+class Leaderboard:
+    """
+    All-time use counts of the most used Emojis in a guild, at most `size` of them.
+
+    Counts are kept in a map with a min-heap over them, so the least used one is found
+    in O(log n). The heap is not updated in place, a count pushes a new entry and the
+    outdated ones are skipped, until the heap is rebuilt when it has twice as many.
+
+    When it's full, a new Emoji takes the place of the least used one and inherits
+    its count, as in the Space-Saving algorithm. The inherited count is kept as the
+    error of the entry, its count is overestimated by no more than that.
+    Counts without an error are exact.
+    """
+    __slots__ = ('size', 'counts', 'errors', 'heap')
+
+    def __init__(self, size: int, entries: list[tuple[str, int]]) -> None:
+        self.size = size
+        self.counts: dict[str, int] = dict(entries[:size])
+        # Only the entries with an error
+        self.errors: dict[str, int] = {}
+        self.heap: list[tuple[int, str]] = []
+        self._rebuild()
+
+    def increase(self, emoji_name: str) -> None:
+        count = self.counts.get(emoji_name)
+        if count is None and len(self.counts) >= self.size:
+            count = self.errors[emoji_name] = self._evict()
+
+        count = self.counts[emoji_name] = (count or 0) + 1
+        heapq.heappush(self.heap, (count, emoji_name))
+
+        if len(self.heap) > 2 * len(self.counts):
+            self._rebuild()
+
+    def top(self, limit: int) -> list[tuple[str, int]]:
+        # Ties in the order of the names, as the database does
+        return heapq.nsmallest(limit, self.counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def exact(self, entries: list[tuple[str, int]]) -> bool:
+        """
+        Check if the counts of the entries from `top()` are all exact.
+        """
+        return not any(emoji_name in self.errors for emoji_name, _ in entries)
+
+    def _evict(self) -> int:
+        while True:
+            count, emoji_name = heapq.heappop(self.heap)
+            if self.counts.get(emoji_name) == count:
+                del self.counts[emoji_name]
+                self.errors.pop(emoji_name, None)
+                return count
+
+    def _rebuild(self) -> None:
+        self.heap = [(count, emoji_name) for emoji_name, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+class EmojiUsage:
+    """
+    Rankings of the Emojis by the usage.
+
+    Rankings over a period are counted from the usage history in the database.
+    The hot score halves every `usage.hot_half_life` seconds and is kept in memory
+    per guild, so a use only decays the score of that Emoji and adds one to it.
+    Scores of a guild are loaded from the history on its first ranking, since then
+    this process keeps them up to date.
+
+    The all-time ranking of the guild is answered from a `Leaderboard`, loaded
+    at warm-up or on the first ranking, and increased on each use without any query.
+    It's loaded again when a count in the ranking is not exact.
+
+    Rankings may be asked from the other threads, so the scores and the leaderboards
+    are changed under `lock`. They're loaded from the database outside of it.
+    """
+    def __init__(self, database: BaseEmojiDatabase | None) -> None:
+        self.logger = logging.getLogger('fukurou.emoji')
+        self.database = database
+        self.scores: dict[int, dict[str, HotScore]] = {}
+        self.leaderboards: dict[int, Leaderboard] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def config(self) -> EmojiConfig.EmojiUsageConfig:
+        return get_config(config=EmojiConfig).usage
+
+    def record(self, guild_id: int, emoji_name: str) -> None:
+        """
+        Add a use of the Emoji to the leaderboard and the hot score.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param emoji_name: Name of the Emoji, as it's stored.
+        :type emoji_name: str
+        """
+        with self.lock:
+            leaderboard = self.leaderboards.get(guild_id)
+            if leaderboard is not None:
+                leaderboard.increase(emoji_name=emoji_name)
+
+            scores = self.scores.get(guild_id)
+            if scores is None:
+                # Not loaded yet, the history has this use already
+                return
+
+            now = time.time()
+            entry = scores.get(emoji_name)
+            if entry is None:
+                scores[emoji_name] = HotScore(score=1.0, updated=now)
+                return
+
+            entry.score = entry.decayed(now=now, half_life=self.config.hot_half_life) + 1
+            entry.updated = now
+
+    def hot(self, guild_id: int, limit: int = 10) -> list[tuple[str, float]]:
+        """
+        Get the Emojis of the highest hot score in the guild.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param limit: Maximum number of the Emojis.
+        :type limit: int
+
+        :return: List of `(emoji_name, score)`, the hottest first.
+        :rtype: list[tuple[str, float]]
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        if guild_id not in self.scores:
+            loaded = self._load(guild_id=guild_id)
+            with self.lock:
+                self.scores.setdefault(guild_id, loaded)
+
+        now = time.time()
+        half_life = self.config.hot_half_life
+
+        with self.lock:
+            # Dropped by `invalidate()` since it's loaded
+            scores = self.scores.get(guild_id, {})
+
+            return heapq.nlargest(
+                limit,
+                ((name, entry.decayed(now=now, half_life=half_life)) for name, entry in scores.items()),
+                key=lambda item: item[1]
+            )
+
+    def top(self,
+            guild_id: int,
+            period: str,
+            user_id: int | None = None,
+            limit: int = 10) -> list[tuple[str, int]]:
+        """
+        Get the most used Emojis in the guild over the period.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        :param period: One of `day`, `week`, `month` and `all`.
+        :type period: str
+        :param user_id: Id of the user to count the usage of, None for everyone.
+        :type user_id: int | None
+        :param limit: Maximum number of the Emojis.
+        :type limit: int
+
+        :return: List of `(emoji_name, use_count)`, the most used first.
+        :rtype: list[tuple[str, int]]
+
+        :raises ValueError: If there's no such period.
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        if period not in PERIODS:
+            raise ValueError('There is no such period', period)
+
+        since = None
+        if PERIODS[period] is not None:
+            since = int(time.time()) - PERIODS[period]
+        elif user_id is None and limit <= self.config.leaderboard_size:
+            leaderboard = self.leaderboard(guild_id=guild_id)
+            with self.lock:
+                top = leaderboard.top(limit=limit)
+                if leaderboard.exact(entries=top):
+                    return top
+
+                # Some counts are inherited from evicted Emojis, load the exact ones again
+                if self.leaderboards.get(guild_id) is leaderboard:
+                    del self.leaderboards[guild_id]
+
+            leaderboard = self.leaderboard(guild_id=guild_id)
+            with self.lock:
+                return leaderboard.top(limit=limit)
+
+        return self.database.top_usage(guild_id=guild_id, since=since, user_id=user_id, limit=limit)
+
+    def leaderboard(self, guild_id: int) -> Leaderboard:
+        """
+        Get the all-time leaderboard of the guild, loaded from the database if it's not yet.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+
+        :return: Leaderboard of the guild.
+        :rtype: Leaderboard
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        leaderboard = self.leaderboards.get(guild_id)
+        if leaderboard is None:
+            size = self.config.leaderboard_size
+            loaded = Leaderboard(
+                size=size,
+                entries=self.database.top_usage(guild_id=guild_id, since=None, limit=size)
+            )
+            with self.lock:
+                leaderboard = self.leaderboards.setdefault(guild_id, loaded)
+
+        return leaderboard
+
+    def invalidate(self, guild_id: int) -> None:
+        """
+        Drop the hot scores and the leaderboard of the guild,
+        they are loaded again on the next ranking.
+
+        :param guild_id: Id of the guild.
+        :type guild_id: int
+        """
+        with self.lock:
+            self.scores.pop(guild_id, None)
+            self.leaderboards.pop(guild_id, None)
+
+    def compact(self) -> None:
+        """
+        Roll the usage history up and delete the expired buckets, as configured in `usage`.
+
+        :raises EmojiDatabaseError: If database operation failed.
+        """
+        config = self.config
+        now = int(time.time())
+
+        self.database.compact_usage(
+            hourly_before=now - config.hourly_retention,
+            daily_before=now - config.daily_retention,
+            monthly_before=now - config.monthly_retention if config.monthly_retention > 0 else None
+        )
+
+    def _load(self, guild_id: int) -> dict[str, HotScore]:
+        now = time.time()
+        half_life = self.config.hot_half_life
+
+        # Uses older than 10 half-lives are worth less than a thousandth of one
+        since = int(now - half_life * 10)
+
+        scores = {}
+        for emoji_name, bucket, use_count in self.database.usage_history(guild_id=guild_id,
+                                                                           since=since):
+            entry = scores.get(emoji_name)
+            if entry is None:
+                entry = scores[emoji_name] = HotScore(score=0.0, updated=now)
+
+            entry.score += use_count * 2 ** (-(now - bucket) / half_life)
+
+        self.logger.debug('Hot scores of guild(%d) are loaded for %d Emojis.', guild_id, len(scores))
+
+        return scores
@@ -11,6 +11,10 @@ class BotConfig(BaseConfig):
         self.token: str = None
         self.extensions: list[str] = None
         self.logging: self.LoggingConfig = None
+        self.sharding: self.ShardingConfig = None
+        self.command_sync: self.CommandSyncConfig = None
+        self.config_watch_interval: float = None
+        self.metrics: self.MetricsConfig = None
 
         super().__init__(defcon_dir=__file__)
 
@@ -24,6 +28,21 @@ class BotConfig(BaseConfig):
         # Logging
         self.logging = json_obj['logging']
 
+        # Sharding
+        self.sharding = self.ShardingConfig(json_obj.get('sharding', {}))
+
+        # Application command sync
+        self.command_sync = self.CommandSyncConfig(json_obj.get('command_sync', {}))
+
+        # Reload configs on change, 0 to disable
+        self.config_watch_interval = json_obj.get('config_watch_interval', 0)
+
+        # Prometheus metrics endpoint
+        self.metrics = self.MetricsConfig(json_obj.get('metrics', {}))
+
+    def validate(self) -> None:
+        self.sharding.validate()
+
     class LoggingConfig:
         def __init__(self, json_obj: dict[Any]):
             self.directory = json_obj['directory']
@@ -36,3 +55,39 @@ class BotConfig(BaseConfig):
                 self.file_date = json_obj['file_date']
                 self.log_msg = json_obj['log_msg']
                 self.log_date = json_obj['log_date']
+
+    class ShardingConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled: bool = json_obj.get('enabled', False)
+            self.shard_count: int | None = json_obj.get('shard_count', None)
+            self.shard_ids: list[int] | None = json_obj.get('shard_ids', None)
+            self.processes: int = json_obj.get('processes', 1)
+            self.restart_delay: float = json_obj.get('restart_delay', 5)
+            self.max_restart_delay: float = json_obj.get('max_restart_delay', 300)
+            self.latency_report_interval: float = json_obj.get('latency_report_interval', 60)
+
+        def validate(self) -> None:
+            if self.shard_ids is None:
+                return
+
+            # Discord cannot tell the total from a part of the shards
+            if self.shard_count is None:
+                raise ValueError('sharding.shard_count is required with sharding.shard_ids',
+                                 self.shard_ids)
+
+            for shard_id in self.shard_ids:
+                if not 0 <= shard_id < self.shard_count:
+                    raise ValueError('sharding.shard_ids must be less than sharding.shard_count',
+                                     shard_id, self.shard_count)
+
+    class CommandSyncConfig:
+        def __init__(self, json_obj: dict[Any]):
+            # `auto`: sync if changed, `always`: sync on every start, `never`: do not sync
+            self.mode: str = json_obj.get('mode', 'auto')
+            self.hash_file: str = json_obj.get('hash_file', 'configs/.command_hash')
+
+    class MetricsConfig:
+        def __init__(self, json_obj: dict[Any]):
+            self.enabled: bool = json_obj.get('enabled', False)
+            self.host: str = json_obj.get('host', '0.0.0.0')
+            self.port: int = json_obj.get('port', 8000)
@@ -1,3 +1,10 @@
 from .baseconfig import BaseConfig
-from .exceptions import NewConfigInterrupt
-from .service import ConfigService, Config, add_config, get_config
+from .exceptions import ConfigReloadError, NewConfigInterrupt
+from .service import (
+    ConfigService,
+    Config,
+    add_config,
+    get_config,
+    reload_config,
+    add_config_listener
+)
@@ -29,3 +29,10 @@ class BaseConfig(ABC):
     @abstractmethod
     def map(self, json_obj: dict[Any]) -> None:
         raise NotImplementedError
+
+    def validate(self) -> None:
+        """
+        Validate the mapped values. It's called after `map()`.
+
+        :raises ValueError: If some value is invalid.
+        """
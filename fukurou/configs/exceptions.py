@@ -3,3 +3,12 @@ class NewConfigInterrupt(BaseException):
     Raised when a new config has been created.
     """
     pass
+
+class ConfigReloadError(Exception):
+    """
+    Raised when a config cannot be reloaded. The previous config is kept.
+
+    `*args` contains:
+    - `[0]`: Name of the config file.
+    - `[1]`: Reason of the failure.
+    """
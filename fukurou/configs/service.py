@@ -1,12 +1,13 @@
 import os
+import asyncio
 import logging
 import json
 import shutil
-from typing import Type, NewType
+from typing import Callable, Type, NewType
 
 from fukurou.patterns import SingletonMeta
 from .baseconfig import BaseConfig
-from .exceptions import NewConfigInterrupt
+from .exceptions import ConfigReloadError, NewConfigInterrupt
 
 FUKUROU_CONFIG_DIR = 'configs/'
 
@@ -15,6 +16,8 @@ Config = NewType('Config', BaseConfig)
 class ConfigService(metaclass=SingletonMeta):
     def __init__(self):
         self.configs: dict[Type[Config], Config] = {}
+        self.mtimes: dict[Type[Config], int] = {}
+        self.listeners: dict[Type[Config], list[Callable[[Config], None]]] = {}
         self.logger = logging.getLogger('fukurou.configs')
 
     def add(self, config: Type[Config], interrupt_new: bool = False) -> None:
@@ -54,11 +57,7 @@ class ConfigService(metaclass=SingletonMeta):
 
         def read():
             os.makedirs(FUKUROU_CONFIG_DIR, exist_ok=True)
-
-            with open(path, mode='r', encoding='utf8') as file:
-                content = file.read()
-
-            conf_obj.map(json.loads(content))
+            self.mtimes[config] = self._read(conf_obj=conf_obj, path=path)
 
         try:
             read()
@@ -74,6 +73,92 @@ class ConfigService(metaclass=SingletonMeta):
         # Register to a config map
         self.configs[config] = conf_obj
 
+    def reload(self, config: Type[Config]) -> None:
+        """
+        Read the config file again and replace the loaded config.
+
+        The new config is swapped in only if it's read, mapped and validated
+        without any error. Otherwise the previous config is kept.
+        The listeners of the config are notified with the new config.
+
+        :param config: The type of the config. It must be added in advance.
+        :type config: Type[Config]
+
+        :raises ConfigReloadError: If the config cannot be reloaded.
+        """
+        if config not in self.configs:
+            raise ConfigReloadError(config.__name__, 'Config is not added.')
+
+        conf_obj = config()
+        path = os.path.join(FUKUROU_CONFIG_DIR, conf_obj.file_name)
+
+        try:
+            mtime = self._read(conf_obj=conf_obj, path=path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.error("Cannot reload config '%s': %r", conf_obj.file_name, e)
+            raise ConfigReloadError(conf_obj.file_name, repr(e)) from e
+
+        # Single assignment, readers see either the old or the new config
+        self.configs[config] = conf_obj
+        self.mtimes[config] = mtime
+
+        self.logger.info("Config '%s' has been reloaded.", conf_obj.file_name)
+
+        for listener in self.listeners.get(config, []):
+            try:
+                listener(conf_obj)
+            except Exception: # pylint: disable=broad-exception-caught
+                self.logger.error('Error occured in the config listener.', exc_info=1)
+
+    def add_listener(self, config: Type[Config], listener: Callable[[Config], None]) -> None:
+        """
+        Add a listener called with the new config whenever the config is reloaded.
+        Use it to rebuild the state precomputed from the config.
+
+        :param config: The type of the config.
+        :type config: Type[Config]
+        :param listener: Callback function.
+        :type listener: Callable[[Config], None]
+        """
+        self.listeners.setdefault(config, []).append(listener)
+
+    async def watch(self, interval: float) -> None:
+        """
+        Reload the configs whenever their files are modified.
+
+        :param interval: Interval between the checks, in seconds.
+        :type interval: float
+        """
+        while True:
+            await asyncio.sleep(interval)
+
+            for config, conf_obj in list(self.configs.items()):
+                path = os.path.join(FUKUROU_CONFIG_DIR, conf_obj.file_name)
+
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+
+                if mtime == self.mtimes.get(config):
+                    continue
+
+                try:
+                    self.reload(config=config)
+                except ConfigReloadError:
+                    # Do not retry until the file is modified again
+                    self.mtimes[config] = mtime
+
+    def _read(self, conf_obj: Config, path: str) -> int:
+        with open(path, mode='r', encoding='utf8') as file:
+            mtime = os.fstat(file.fileno()).st_mtime_ns
+            content = file.read()
+
+        conf_obj.map(json.loads(content))
+        conf_obj.validate()
+
+        return mtime
+
     def get(self, config: Type[Config]) -> Config | None:
         """
         Get config object.
@@ -99,3 +184,15 @@ def get_config(config: Type[Config]) -> Config | None:
     Alias of `ConfigService().get()`
     """
     return ConfigService().get(config=config)
+
+def reload_config(config: Type[Config]) -> None:
+    """
+    Alias of `ConfigService().reload()`
+    """
+    return ConfigService().reload(config=config)
+
+def add_config_listener(config: Type[Config], listener: Callable[[Config], None]) -> None:
+    """
+    Alias of `ConfigService().add_listener()`
+    """
+    return ConfigService().add_listener(config=config, listener=listener)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import logging.config
+import multiprocessing
+import signal
+import time
+
+from discord.http import HTTPClient
+
+from .configs import add_config, get_config
+from .config import BotConfig
+
+# Worker is considered healthy once it stays alive this long, in seconds
+STABLE_UPTIME = 60
+
+def run_worker(index: int, shard_ids: list[int], shard_count: int, sync_mode: str) -> None:
+    """
+    Entry point of the worker process. Run a bot owning `shard_ids`.
+
+    :param index: Index of the worker.
+    :type index: int
+    :param shard_ids: Ids of the shards to run.
+    :type shard_ids: list[int]
+    :param shard_count: Total number of the shards.
+    :type shard_count: int
+    :param sync_mode: Mode of the application command sync.
+    :type sync_mode: str
+    """
+    # Deferred, so the launcher process does not load the extensions
+    from .bot import FukurouShardedBot
+
+    # Configs are not shared with the launcher process
+    add_config(config=BotConfig)
+    config: BotConfig = get_config(config=BotConfig)
+    config.command_sync.mode = sync_mode
+
+    # Every worker exposes its own metrics
+    config.metrics.port += index
+
+    logging.config.dictConfig(config.logging)
+
+    FukurouShardedBot(config=config, shard_ids=shard_ids, shard_count=shard_count).run()
+
+class ShardWorker:
+    """
+    A worker process with its restart state.
+    """
+    def __init__(self, index: int, shard_ids: list[int]) -> None:
+        self.index = index
+        self.shard_ids = shard_ids
+        self.process: multiprocessing.Process | None = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.restarts = 0
+
+    def __str__(self) -> str:
+        return f'Worker({self.index}) [shards {self.shard_ids[0]}-{self.shard_ids[-1]}]'
+
+class ShardLauncher:
+    """
+    Start worker processes each owning a range of the shards, and supervise them.
+
+    A worker that exits is restarted after `sharding.restart_delay` seconds,
+    doubling on each consecutive failure up to `sharding.max_restart_delay`.
+    """
+    def __init__(self, config: BotConfig) -> None:
+        self.config = config
+        self.logger = logging.getLogger('fukurou.launcher')
+        self.context = multiprocessing.get_context('spawn')
+        self.workers: list[ShardWorker] = []
+        self.stopping = False
+
+    def get_shard_count(self) -> int:
+        """
+        Get the total number of the shards.
+        It's taken from `sharding.shard_count`, or recommended by Discord if it's not set.
+
+        :return: Total number of the shards.
+        :rtype: int
+        """
+        if self.config.sharding.shard_count is not None:
+            return self.config.sharding.shard_count
+
+        async def fetch() -> int:
+            http = HTTPClient()
+            try:
+                await http.static_login(self.config.token)
+                shard_count, _ = await http.get_bot_gateway()
+            finally:
+                await http.close()
+
+            return shard_count
+
+        shard_count = asyncio.run(fetch())
+        self.logger.info('Discord recommends %d shards.', shard_count)
+
+        return shard_count
+
+    def split_shards(self, shard_count: int) -> list[list[int]]:
+        """
+        Split the shards into contiguous ranges, one for each worker.
+
+        :param shard_count: Total number of the shards.
+        :type shard_count: int
+
+        :return: List of the shard ranges.
+        :rtype: list[list[int]]
+        """
+        shard_ids = self.config.sharding.shard_ids
+        if shard_ids is None:
+            shard_ids = list(range(shard_count))
+
+        processes = max(1, min(self.config.sharding.processes, len(shard_ids)))
+        size, extra = divmod(len(shard_ids), processes)
+
+        ranges, start = [], 0
+        for i in range(processes):
+            end = start + size + (1 if i < extra else 0)
+            ranges.append(shard_ids[start:end])
+            start = end
+
+        return ranges
+
+    def run(self) -> None:
+        """
+        Start the workers and supervise them until the launcher is interrupted.
+        """
+        shard_count = self.get_shard_count()
+
+        for index, shard_ids in enumerate(self.split_shards(shard_count=shard_count)):
+            self.workers.append(ShardWorker(index=index, shard_ids=shard_ids))
+
+        self.logger.info('Launching %d workers for %d shards.', len(self.workers), shard_count)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        for worker in self.workers:
+            self._start(worker=worker, shard_count=shard_count)
+
+        while not self.stopping:
+            self._supervise(shard_count=shard_count)
+            time.sleep(1)
+
+        self._shutdown()
+
+    def _start(self, worker: ShardWorker, shard_count: int) -> None:
+        # Commands are global, a single worker is enough to sync them
+        sync_mode = self.config.command_sync.mode if worker.index == 0 else 'never'
+
+        worker.process = self.context.Process(
+            target=run_worker,
+            args=(worker.index, worker.shard_ids, shard_count, sync_mode),
+            name=f'fukurou-worker-{worker.index}'
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+
+        self.logger.info('%s has been started (pid %d).', worker, worker.process.pid)
+
+    def _supervise(self, shard_count: int) -> None:
+        now = time.monotonic()
+
+        for worker in self.workers:
+            if worker.process.is_alive():
+                if worker.restarts > 0 and now - worker.started_at > STABLE_UPTIME:
+                    worker.restarts = 0
+                continue
+
+            if worker.restart_at == 0:
+                delay = min(
+                    self.config.sharding.restart_delay * 2 ** worker.restarts,
+                    self.config.sharding.max_restart_delay
+                )
+                worker.restart_at = now + delay
+
+                self.logger.warning('%s has exited with code %s, restarting in %.0f seconds.',
+                                    worker, worker.process.exitcode, delay)
+            elif now >= worker.restart_at:
+                worker.restart_at = 0
+                worker.restarts += 1
+                self._start(worker=worker, shard_count=shard_count)
+
+    def _stop(self, signum, frame) -> None: # pylint: disable=unused-argument
+        self.stopping = True
+
+    def _shutdown(self) -> None:
+        self.logger.info('Shutting down %d workers.', len(self.workers))
+
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+        for worker in self.workers:
+            worker.process.join(timeout=30)
+            if worker.process.is_alive():
+                worker.process.kill()
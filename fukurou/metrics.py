@@ -0,0 +1,271 @@
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from .patterns import SingletonMeta
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Collector = Callable[[], Iterable[tuple[dict[str, str], float]]]
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+        pairs.append(f'{key}="{value}"')
+
+    return '{' + ','.join(pairs) + '}'
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+
+    return repr(float(value))
+
+class Metric:
+    """
+    Base of the metrics, holding values per label set.
+    """
+    kind = 'untyped'
+
+    def __init__(self, name: str, description: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self.lock:
+            items = list(self.values.items())
+
+        for key, value in items:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    """
+    Value that only goes up.
+    """
+    kind = 'counter'
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+class Gauge(Metric):
+    """
+    Value that can go up and down. If `collect` is given, values are taken from it on scrape.
+    """
+    kind = 'gauge'
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 labelnames: tuple[str, ...] = (),
+                 collect: Collector | None = None) -> None:
+        super().__init__(name=name, description=description, labelnames=labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        if self.collect is None:
+            yield from super().samples()
+            return
+
+        for labels, value in self.collect():
+            yield self.name, labels, value
+
+class Histogram(Metric):
+    """
+    Distribution of observed values, counted in cumulative buckets.
+    """
+    kind = 'histogram'
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name=name, description=description, labelnames=labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self.lock:
+            counts = self.counts.get(key)
+            if counts is None:
+                counts = self.counts[key] = [0] * len(self.buckets)
+                self.sums[key] = 0.0
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+
+            self.sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the time spent within the context, in seconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self.lock:
+            items = [(key, list(counts), self.sums[key]) for key, counts in self.counts.items()]
+
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': format_value(bound)}, cumulative
+
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+class MetricsRegistry(metaclass=SingletonMeta):
+    """
+    Registry of the metrics, rendered in the Prometheus text format.
+    This class is Singleton.
+    """
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Register the metric. If a metric with the same name is registered, it's returned instead.
+
+        :param metric: Metric to register.
+        :type metric: Metric
+
+        :return: Registered metric.
+        :rtype: Metric
+        """
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        :return: Rendered metrics.
+        :rtype: str
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+def counter(name: str, description: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """
+    Get or register a counter.
+    """
+    return MetricsRegistry().register(Counter(name, description, labelnames))
+
+def gauge(name: str,
+          description: str,
+          labelnames: tuple[str, ...] = (),
+          collect: Collector | None = None) -> Gauge:
+    """
+    Get or register a gauge.
+    """
+    return MetricsRegistry().register(Gauge(name, description, labelnames, collect))
+
+def histogram(name: str,
+              description: str,
+              labelnames: tuple[str, ...] = (),
+              buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    """
+    Get or register a histogram.
+    """
+    return MetricsRegistry().register(Histogram(name, description, labelnames, buckets))
+
+class MetricsServer:
+    """
+    Minimal HTTP server exposing the metrics at `/metrics`.
+    It runs on the event loop of the bot, so scrapes never block in a thread.
+    """
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.server: asyncio.AbstractServer | None = None
+        self.logger = logging.getLogger('fukurou.metrics')
+
+    async def start(self) -> None:
+        """
+        Start listening on the host and the port.
+        """
+        try:
+            self.server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        except OSError as e:
+            self.logger.error('Cannot start metrics server on %s:%d: %s',
+                              self.host, self.port, e.strerror)
+            return
+
+        self.logger.info('Metrics are exposed at http://%s:%d/metrics', self.host, self.port)
+
+    async def close(self) -> None:
+        """
+        Stop listening.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request.decode('latin-1').split()
+
+            # Drain headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', MetricsRegistry().render().encode()
+            else:
+                status, body = '404 Not Found', b'Not Found\n'
+
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from typing import Iterator
+import logging
+import time
+
+from .patterns import SingletonMeta
+
+class StartupProfiler(metaclass=SingletonMeta):
+    """
+    Record timings of the startup phases, from the process start to the first ready.
+    This class is Singleton.
+    """
+    def __init__(self) -> None:
+        self.logger = logging.getLogger('fukurou.profiler')
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float, float]] = []
+        self.reported = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Measure the phase running within the context.
+        Phases can be nested, or started from a coroutine.
+
+        :param name: Name of the phase.
+        :type name: str
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.phases.append((name, started - self.started, ended - started))
+
+    def mark(self, name: str) -> None:
+        """
+        Record a point in time, as a phase started from the process start.
+
+        :param name: Name of the point.
+        :type name: str
+        """
+        self.phases.append((name, 0.0, time.perf_counter() - self.started))
+
+    def report(self) -> str:
+        """
+        Log the breakdown of the phases. It's logged only once.
+
+        :return: Breakdown of the phases.
+        :rtype: str
+        """
+        lines = ['Startup profile:']
+        for name, offset, elapsed in sorted(self.phases, key=lambda p: p[1] + p[2]):
+            lines.append(f'  {offset*1000:9.1f}ms +{elapsed*1000:9.1f}ms  {name}')
+
+        breakdown = '\n'.join(lines)
+
+        if not self.reported:
+            self.reported = True
+            self.logger.info(breakdown)
+
+        return breakdown
@@ -0,0 +1,58 @@
+# pylint: disable=C0114,C0115,C0116
+from typing import Any
+import logging
+import discord
+from discord.ext import commands
+
+from .configs import ConfigService, ConfigReloadError, reload_config
+
+def get_config_names(ctx: discord.AutocompleteContext) -> list[str]: # pylint: disable=unused-argument
+    return [conf_obj.file_name for conf_obj in ConfigService().configs.values()]
+
+class SystemCog(commands.Cog):
+    system_commands = discord.SlashCommandGroup(
+        name='system',
+        description='Command group for the owner of the bot.'
+    )
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger('fukurou.system')
+
+    @system_commands.command(
+        name='reload',
+        description='Reload a config file without restarting the bot.'
+    )
+    @discord.commands.option(
+        input_type=str,
+        name='config',
+        description='Name of the config file.',
+        required=True,
+        autocomplete=discord.utils.basic_autocomplete(get_config_names)
+    )
+    @commands.is_owner()
+    async def reload(self, ctx: discord.ApplicationContext, config: str):
+        for conf_type, conf_obj in ConfigService().configs.items():
+            if conf_obj.file_name != config:
+                continue
+
+            try:
+                reload_config(config=conf_type)
+            except ConfigReloadError as e:
+                await ctx.respond(f'Cannot reload `{config}`: {e.args[1]}', ephemeral=True)
+                return
+
+            await ctx.respond(f'`{config}` has been reloaded!', ephemeral=True)
+            return
+
+        await ctx.respond(f'There is no config named `{config}`!', ephemeral=True)
+
+    async def cog_command_error(self, ctx: discord.ApplicationContext, error: Any):
+        if isinstance(error, discord.CheckFailure):
+            message = "Sorry, but you don't have permission to run this command!"
+        else:
+            self.logger.error('Error occured while running system command.', exc_info=error)
+            message = 'Unknown error has occured!'
+
+        # Sent as a followup if the interaction is already responded
+        await ctx.respond(message, ephemeral=True)
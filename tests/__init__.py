@@ -0,0 +1,23 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+from fukurou.configs import add_config, get_config
+from fukurou.cogs.emoji.config import EmojiConfig
+
+def load_emoji_config() -> EmojiConfig:
+    """
+    Load the default Emoji config in a temporary working directory, once per run.
+    Configs, databases and images of the tests are all written there.
+    """
+    config = get_config(config=EmojiConfig)
+    if config is not None:
+        return config
+
+    directory = tempfile.mkdtemp(prefix='fukurou-tests-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    os.chdir(directory)
+
+    add_config(EmojiConfig)
+    return get_config(config=EmojiConfig)
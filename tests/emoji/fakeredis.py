@@ -0,0 +1,159 @@
+import threading
+
+import redis
+
+class FakeRedisServer:
+    """
+    In-process stand-in for a Redis server, with the commands the Emoji cache uses.
+
+    Messages are delivered to the subscribers as soon as they're published,
+    so the tests don't have to wait for them.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.data: dict[str, object] = {}
+        self.versions: dict[str, int] = {}
+        self.subscribers: dict[str, list] = {}
+
+    def client(self, *args, **kwargs) -> 'FakeRedis':
+        return FakeRedis(server=self)
+
+    def touch(self, key: str) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def execute(self, command: str, *args):
+        with self.lock:
+            return getattr(self, f'_{command}')(*args)
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def _hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value.encode() if isinstance(value, str) else value
+        self.touch(key)
+        return 1
+
+    def _expire(self, key, seconds):
+        return int(key in self.data)
+
+    def _delete(self, key):
+        self.touch(key)
+        return int(self.data.pop(key, None) is not None)
+
+    def _incr(self, key):
+        value = int(self.data.get(key, b'0')) + 1
+        self.data[key] = str(value).encode()
+        self.touch(key)
+        return value
+
+    def _publish(self, channel, message):
+        handlers = list(self.subscribers.get(channel, []))
+        for handler in handlers:
+            handler({'type': 'message', 'channel': channel.encode(), 'data': message.encode()})
+        return len(handlers)
+
+class FakeRedis:
+    def __init__(self, server: FakeRedisServer) -> None:
+        self.server = server
+
+    def get(self, key):
+        return self.server.execute('get', key)
+
+    def hget(self, key, field):
+        return self.server.execute('hget', key, field)
+
+    def pipeline(self) -> 'FakePipeline':
+        return FakePipeline(server=self.server)
+
+    def pubsub(self, **kwargs) -> 'FakePubSub':
+        return FakePubSub(server=self.server)
+
+    def close(self) -> None:
+        pass
+
+class FakePipeline:
+    """
+    Transactional pipeline. Commands run right away after `watch()` until `multi()`,
+    and `execute()` fails with `WatchError` if a watched key has been modified.
+    """
+    def __init__(self, server: FakeRedisServer) -> None:
+        self.server = server
+        self.watched: dict[str, int] = {}
+        self.immediate = False
+        self.commands: list[tuple] = []
+
+    def __enter__(self) -> 'FakePipeline':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.watched.clear()
+        self.commands.clear()
+
+    def __getattr__(self, command: str):
+        def call(*args):
+            if self.immediate:
+                return self.server.execute(command, *args)
+
+            self.commands.append((command, args))
+            return self
+
+        return call
+
+    def watch(self, *keys) -> None:
+        self.immediate = True
+        with self.server.lock:
+            for key in keys:
+                self.watched[key] = self.server.versions.get(key, 0)
+
+    def multi(self) -> None:
+        self.immediate = False
+
+    def execute(self) -> list:
+        with self.server.lock:
+            for key, version in self.watched.items():
+                if self.server.versions.get(key, 0) != version:
+                    raise redis.WatchError('Watched variable changed.')
+
+            return [self.server.execute(command, *args) for command, args in self.commands]
+
+class FakePubSub:
+    """
+    Subscription with its worker thread. `disconnect()` drops the subscription
+    and calls the exception handler, as the worker does on a lost connection.
+    """
+    def __init__(self, server: FakeRedisServer) -> None:
+        self.server = server
+        self.handlers: dict[str, object] = {}
+        self.exception_handler = None
+        self.connected = False
+        # The worker reconnects through the connection of the subscription
+        self.connection = self
+
+    def subscribe(self, **handlers) -> None:
+        with self.server.lock:
+            for channel, handler in handlers.items():
+                self.handlers[channel] = handler
+                self.server.subscribers.setdefault(channel, []).append(handler)
+            self.connected = True
+
+    def run_in_thread(self, exception_handler=None, **kwargs) -> 'FakePubSub':
+        self.exception_handler = exception_handler
+        return self
+
+    def connect(self) -> None:
+        if not self.connected:
+            self.subscribe(**self.handlers)
+
+    def disconnect(self) -> None:
+        self.stop()
+        self.exception_handler(redis.ConnectionError('Connection closed by server.'), self, self)
+
+    def stop(self) -> None:
+        with self.server.lock:
+            if self.connected:
+                for channel, handler in self.handlers.items():
+                    self.server.subscribers[channel].remove(handler)
+            self.connected = False
@@ -0,0 +1,61 @@
+import io
+import tempfile
+import unittest
+import zipfile
+
+from fukurou.cogs.emoji.archive import ArchiveWriter, read_entry
+from fukurou.cogs.emoji.exceptions import EmojiFileTypeError
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 56
+
+class EmojiArchiveTest(unittest.TestCase):
+    def setUp(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('smile.jpg', PNG)
+            archive.writestr('wink.png', b'<html></html>')
+
+        self.archive = zipfile.ZipFile(buffer)
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_type_from_content(self):
+        content, _, file_type = read_entry(self.archive, self.archive.getinfo('smile.jpg'), 1024)
+
+        self.assertEqual(content, PNG)
+        self.assertEqual(file_type, 'png')
+
+    def test_unsupported_content(self):
+        with self.assertRaises(EmojiFileTypeError):
+            read_entry(self.archive, self.archive.getinfo('wink.png'), 1024)
+
+    def test_larger_than_maxsize(self):
+        self.assertIsNone(read_entry(self.archive, self.archive.getinfo('smile.jpg'), 16))
+
+class EmojiArchiveWriterTest(unittest.TestCase):
+    def test_parts(self):
+        writer = ArchiveWriter(part_size=200)
+
+        self.assertIsNone(writer.add(name='smile.png', content=PNG))
+        first = writer.add(name='wink.png', content=PNG)
+
+        with zipfile.ZipFile(first) as archive:
+            self.assertEqual(archive.namelist(), ['smile.png'])
+        first.close()
+
+        with zipfile.ZipFile(writer.close()) as archive:
+            self.assertEqual(archive.read('wink.png'), PNG)
+
+    def test_add_file(self):
+        writer = ArchiveWriter(part_size=1024 * 1024)
+
+        with tempfile.SpooledTemporaryFile(max_size=16) as f:
+            f.write(b'{"emojis": []}\n' * 100)
+            writer.add(name='manifest.json', content=f, compress=True)
+
+        with zipfile.ZipFile(writer.close()) as archive:
+            info = archive.getinfo('manifest.json')
+            self.assertEqual(archive.read(info), b'{"emojis": []}\n' * 100)
+            self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+
@@ -0,0 +1,134 @@
+import unittest
+from unittest import mock
+import redis
+
+from fukurou.cogs.emoji.cache import MISSING
+from fukurou.cogs.emoji.cache.memory import MemoryEmojiCache
+from fukurou.cogs.emoji.cache.rediscache import RedisEmojiCache
+from tests import load_emoji_config
+from .fakeredis import FakePipeline, FakeRedisServer
+
+GUILD_ID = 1234
+
+class EmojiRedisCacheTest(unittest.TestCase):
+    """
+    Two `RedisEmojiCache` instances on a fake Redis server stand for two bot processes.
+    """
+    def setUp(self):
+        load_emoji_config()
+
+        self.server = FakeRedisServer()
+        with mock.patch('redis.Redis.from_url', self.server.client):
+            self.first = RedisEmojiCache()
+            self.second = RedisEmojiCache()
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+
+    def put(self, cache: RedisEmojiCache, key: str, value):
+        cache.set(guild_id=GUILD_ID, key=key, value=value, generation=cache.generation(guild_id=GUILD_ID))
+
+    def test_shared_entries(self):
+        self.put(self.first, 'get:smile', 'first')
+
+        self.assertEqual(self.second.get(guild_id=GUILD_ID, key='get:smile'), 'first')
+
+    def test_invalidate_each_other(self):
+        self.put(self.first, 'get:smile', 'first')
+        self.assertEqual(self.second.get(guild_id=GUILD_ID, key='get:smile'), 'first')
+
+        self.first.invalidate(guild_id=GUILD_ID)
+        self.assertIs(self.second.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+
+        self.put(self.second, 'get:smile', 'second')
+        self.assertEqual(self.first.get(guild_id=GUILD_ID, key='get:smile'), 'second')
+
+        self.second.invalidate(guild_id=GUILD_ID)
+        self.assertIs(self.first.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+
+    def test_listeners_of_other_process(self):
+        invalidated = []
+        self.second.add_listener(invalidated.append)
+
+        self.first.invalidate(guild_id=GUILD_ID)
+
+        self.assertEqual(invalidated, [GUILD_ID])
+
+    def test_stale_value_not_stored(self):
+        # The first one misses and loads the value from the database...
+        self.assertIs(self.first.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+        generation = self.first.generation(guild_id=GUILD_ID)
+
+        # ...while the second one commits a change and invalidates
+        self.second.invalidate(guild_id=GUILD_ID)
+
+        self.first.set(guild_id=GUILD_ID, key='get:smile', value='stale', generation=generation)
+
+        self.assertIs(self.first.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+        self.assertIs(self.second.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+
+    def test_invalidated_during_store(self):
+        generation = self.first.generation(guild_id=GUILD_ID)
+
+        # Invalidated between the WATCH and the EXEC
+        multi = FakePipeline.multi
+        def invalidate_on_multi(pipe):
+            if pipe.watched:
+                self.second.invalidate(guild_id=GUILD_ID)
+            multi(pipe)
+
+        with mock.patch.object(FakePipeline, 'multi', invalidate_on_multi):
+            self.first.set(guild_id=GUILD_ID, key='get:smile', value='stale', generation=generation)
+
+        self.assertIs(self.second.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+
+    def test_subscription_lost(self):
+        self.put(self.second, 'get:smile', 'first')
+        invalidated = []
+        self.second.add_listener(invalidated.append)
+
+        def outage(_):
+            # Not delivered to the second one, which loads the value meanwhile
+            self.first.invalidate(guild_id=GUILD_ID)
+            self.put(self.second, 'get:smile', 'second')
+
+        with mock.patch('fukurou.cogs.emoji.cache.rediscache.time.sleep', outage):
+            self.second.worker.disconnect()
+
+        # Dropped when it's lost and again once it's back
+        self.assertEqual(invalidated, [GUILD_ID, GUILD_ID])
+        self.assertNotIn(GUILD_ID, self.second.local)
+
+        self.first.invalidate(guild_id=GUILD_ID)
+        self.assertEqual(invalidated, [GUILD_ID, GUILD_ID, GUILD_ID])
+
+    def test_connection_failure(self):
+        def refuse(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+
+        with mock.patch('redis.Redis.from_url', refuse):
+            cache = RedisEmojiCache()
+
+        self.assertIsNone(cache.client)
+        self.assertIs(cache.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
+        cache.close()
+
+class EmojiMemoryCacheTest(unittest.TestCase):
+    def setUp(self):
+        load_emoji_config()
+
+        self.first = MemoryEmojiCache()
+        self.second = MemoryEmojiCache()
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+
+    def test_stale_value_not_stored(self):
+        generation = self.second.generation(guild_id=GUILD_ID)
+
+        self.first.invalidate(guild_id=GUILD_ID)
+        self.second.set(guild_id=GUILD_ID, key='get:smile', value='stale', generation=generation)
+
+        self.assertIs(self.second.get(guild_id=GUILD_ID, key='get:smile'), MISSING)
@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from aiohttp import web
+
+from fukurou.cogs.emoji.downloader import EmojiDownloader, PublicResolver, check_url, public_address
+from fukurou.cogs.emoji.exceptions import EmojiFileDownloadError
+from tests import load_emoji_config
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 56
+
+class EmojiDownloaderAddressTest(unittest.TestCase):
+    def test_public_address(self):
+        for host in ('8.8.8.8', '2606:4700::1111'):
+            self.assertTrue(public_address(host), host)
+
+        for host in ('127.0.0.1', '10.0.0.1', '172.16.0.1', '192.168.0.1', '169.254.169.254',
+                     '100.64.0.1', '0.0.0.0', '::1', 'fe80::1%eth0', '::ffff:127.0.0.1', '224.0.0.1'):
+            self.assertFalse(public_address(host), host)
+
+    def test_check_url(self):
+        check_url('https://cdn.discordapp.com/emojis/1.png')
+        check_url('http://8.8.8.8/emoji.png')
+
+        for url in ('ftp://example.com/emoji.png', 'file:///etc/passwd', 'http:///emoji.png',
+                    'http://127.0.0.1/emoji.png', 'http://[::1]/emoji.png', 'http://10.0.0.1:8080/'):
+            with self.assertRaises(EmojiFileDownloadError, msg=url):
+                check_url(url)
+
+class EmojiDownloaderTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Downloads from a local server. Its host name resolves to a loopback address,
+    so the resolver is told to let `localhost` through where the test needs it.
+    """
+    async def asyncSetUp(self):
+        load_emoji_config()
+
+        async def image(_):
+            return web.Response(body=PNG)
+
+        async def redirect_image(_):
+            raise web.HTTPFound('/image')
+
+        async def redirect_loopback(request):
+            raise web.HTTPFound(f'http://127.0.0.1:{request.url.port}/image')
+
+        async def redirect_loop(_):
+            raise web.HTTPFound('/loop')
+
+        app = web.Application()
+        app.router.add_get('/image', image)
+        app.router.add_get('/redirect', redirect_image)
+        app.router.add_get('/loopback', redirect_loopback)
+        app.router.add_get('/loop', redirect_loop)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base = f'http://localhost:{self.runner.addresses[0][1]}'
+
+        self.downloader = EmojiDownloader()
+        self.resolve = PublicResolver.resolve
+
+    async def asyncTearDown(self):
+        await self.downloader.close()
+        await self.runner.cleanup()
+
+    def allow_localhost(self):
+        resolve = self.resolve
+
+        async def allowing(resolver, host, port=0, family=0):
+            if host == 'localhost':
+                return await resolver.resolver.resolve(host, port, family)
+            return await resolve(resolver, host, port, family)
+
+        return mock.patch.object(PublicResolver, 'resolve', allowing)
+
+    async def test_blocked_host_name(self):
+        with self.assertRaises(EmojiFileDownloadError) as cm:
+            await self.downloader.fetch(url=f'{self.base}/image', maxsize=1024)
+
+        self.assertEqual(cm.exception.args, ('Blocked address', 'localhost'))
+
+    async def test_fetch(self):
+        with self.allow_localhost():
+            content, file_type = await self.downloader.fetch(url=f'{self.base}/redirect', maxsize=1024)
+
+        self.assertEqual(content, PNG)
+        self.assertEqual(file_type, 'png')
+
+    async def test_redirect_to_blocked_address(self):
+        with self.allow_localhost(), self.assertRaises(EmojiFileDownloadError) as cm:
+            await self.downloader.fetch(url=f'{self.base}/loopback', maxsize=1024)
+
+        self.assertEqual(cm.exception.args, ('Blocked address', '127.0.0.1'))
+
+    async def test_too_many_redirects(self):
+        with self.allow_localhost(), self.assertRaises(EmojiFileDownloadError) as cm:
+            await self.downloader.fetch(url=f'{self.base}/loop', maxsize=1024)
+
+        self.assertEqual(cm.exception.args[0], 'Too many redirects')
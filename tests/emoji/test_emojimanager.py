@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import types
+import unittest
+
+from fukurou.cogs.emoji.emojimanager import EmojiManager
+from fukurou.cogs.emoji.exceptions import EmojiFileTooLargeError, EmojiFileTypeError, EmojiInvalidNameError
+from tests import load_emoji_config
+
+GUILD_ID = 1234
+
+class EmojiValidateTest(unittest.TestCase):
+    """
+    `validate()` needs only the config and the constraints of the manager.
+    """
+    def setUp(self):
+        self.manager = types.SimpleNamespace(
+            config=load_emoji_config(),
+            constraints={GUILD_ID: types.SimpleNamespace(capacity=-1, maxsize=256)}
+        )
+
+    def validate(self, **kwargs):
+        EmojiManager.validate(self.manager, guild_id=GUILD_ID, **kwargs)
+
+    def test_valid(self):
+        self.validate(emoji_name='smile face_1', file_type='png', size=256 * 1024)
+
+    def test_name_matched_as_a_whole(self):
+        for emoji_name in ('smile!', 'smile\n', ''):
+            with self.assertRaises(EmojiInvalidNameError, msg=emoji_name):
+                self.validate(emoji_name=emoji_name)
+
+    def test_file_type(self):
+        for file_type in ('svg+xml', '.txt', ''):
+            with self.assertRaises(EmojiFileTypeError, msg=file_type):
+                self.validate(file_type=file_type)
+
+    def test_size(self):
+        with self.assertRaises(EmojiFileTooLargeError):
+            self.validate(size=256 * 1024 + 1)
+
+class EmojiRunTest(unittest.IsolatedAsyncioTestCase):
+    def manager(self, threadsafe: bool) -> types.SimpleNamespace:
+        available = asyncio.Event()
+        available.set()
+
+        return types.SimpleNamespace(database=types.SimpleNamespace(threadsafe=threadsafe),
+                                     backups=types.SimpleNamespace(available=available))
+
+    async def test_thread(self):
+        self.assertEqual(await EmojiManager.run(self.manager(threadsafe=False), threading.get_ident),
+                         threading.get_ident())
+        self.assertNotEqual(await EmojiManager.run(self.manager(threadsafe=True), threading.get_ident),
+                            threading.get_ident())
+
+    async def test_wait_for_restore(self):
+        manager = self.manager(threadsafe=False)
+        manager.backups.available.clear()
+
+        task = asyncio.create_task(EmojiManager.run(manager, lambda: 'done'))
+        await asyncio.sleep(0.01)
+        self.assertFalse(task.done())
+
+        manager.backups.available.set()
+        self.assertEqual(await task, 'done')
@@ -0,0 +1,137 @@
+import os
+import time
+import unittest
+import uuid
+
+from tests import load_emoji_config
+from fukurou.cogs.emoji.database.base import DAY, HOUR
+
+POSTGRES_DSN = os.environ.get('FUKUROU_TEST_POSTGRES_DSN')
+
+@unittest.skipIf(POSTGRES_DSN is None, 'FUKUROU_TEST_POSTGRES_DSN is not set')
+class EmojiPostgresTest(unittest.TestCase):
+    """
+    Runs against the PostgreSQL at `FUKUROU_TEST_POSTGRES_DSN`, skipped if it's not set.
+    """
+    @classmethod
+    def setUpClass(cls):
+        from fukurou.cogs.emoji.database.postgres import EmojiPostgres
+
+        config = load_emoji_config()
+        config.database.dsn = POSTGRES_DSN
+
+        cls.database = EmojiPostgres()
+        if cls.database.pool is None:
+            raise unittest.SkipTest('Cannot connect to the PostgreSQL at FUKUROU_TEST_POSTGRES_DSN')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database.pool.close()
+
+    def setUp(self):
+        # The database may be shared, each test works in a guild of its own
+        self.guild_id = uuid.uuid4().int >> 65
+
+    def tearDown(self):
+        with self.database.pool.connection() as conn:
+            for table in ('emoji_use_history', 'emoji_use', 'emoji'):
+                conn.execute(f'DELETE FROM {table} WHERE guild_id=%s', (self.guild_id,))
+
+    def add(self, *names: str, uploader_id: int = 10) -> None:
+        for name in names:
+            self.database.add(guild_id=self.guild_id, uploader_id=uploader_id,
+                              emoji_name=name, file_name=f'{name}.png')
+
+    def use(self, name: str, user_id: int, times: int = 1) -> None:
+        for _ in range(times):
+            self.database.increase_usecount(guild_id=self.guild_id, user_id=user_id, emoji_name=name)
+
+    def test_list_aggregates_use_counts(self):
+        self.add('kek', 'pepe', 'unused')
+        self.use('kek', user_id=1, times=3)
+        self.use('kek', user_id=2, times=2)
+        self.use('pepe', user_id=2)
+
+        items = {item.emoji_name: item for item in self.database.list(user_id=1, guild_id=self.guild_id)}
+
+        self.assertEqual(set(items), {'kek', 'pepe', 'unused'})
+        self.assertEqual((items['kek'].user_use_count, items['kek'].guild_use_count), (3, 5))
+        self.assertEqual((items['pepe'].user_use_count, items['pepe'].guild_use_count), (0, 1))
+        self.assertEqual((items['unused'].user_use_count, items['unused'].guild_use_count), (0, 0))
+
+    def test_list_escapes_wildcards(self):
+        self.add('a_b', 'axb')
+
+        items = self.database.list(user_id=1, guild_id=self.guild_id, keyword='_')
+
+        self.assertEqual([item.emoji_name for item in items], ['a_b'])
+
+    def test_export_in_pages(self):
+        self.add('c', 'a', 'd', 'b')
+        self.use('b', user_id=1, times=2)
+
+        first = self.database.export(guild_id=self.guild_id, limit=3)
+        rest = self.database.export(guild_id=self.guild_id, after=first[-1][0].emoji_name, limit=3)
+
+        self.assertEqual([(emoji.emoji_name, count) for emoji, count in first], [('a', 0), ('b', 2), ('c', 0)])
+        self.assertEqual([emoji.emoji_name for emoji, _ in rest], ['d'])
+
+    def test_increase_usecount_upserts(self):
+        self.add('kek')
+        self.use('kek', user_id=1)
+        self.use('kek', user_id=1)
+        self.use('missing', user_id=1)
+
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=None), [('kek', 2)])
+
+    def test_add_many_is_atomic(self):
+        self.database.add_many(guild_id=self.guild_id, uploader_id=10,
+                               entries=[('a', 'a.png'), ('b', 'b.png')])
+        self.assertEqual(self.database.count(guild_id=self.guild_id), 2)
+
+        with self.assertRaises(Exception):
+            self.database.add_many(guild_id=self.guild_id, uploader_id=10,
+                                   entries=[('c', 'c.png'), ('a', 'a2.png')])
+
+        self.assertEqual(self.database.count(guild_id=self.guild_id), 2)
+        self.assertIsNone(self.database.get(guild_id=self.guild_id, emoji_name='c'))
+
+    def test_top_usage(self):
+        self.add('a', 'b', 'c')
+        self.use('a', user_id=1, times=2)
+        self.use('b', user_id=2, times=2)
+        self.use('c', user_id=1, times=3)
+
+        since = int(time.time()) - DAY
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=since, limit=2),
+                         [('c', 3), ('a', 2)])
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=None, user_id=2),
+                         [('b', 2)])
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=int(time.time()) + HOUR),
+                         [])
+
+    def test_compact_usage_rolls_hours_into_days(self):
+        self.add('kek')
+        self.use('kek', user_id=1, times=2)
+        self.use('kek', user_id=2)
+
+        now = int(time.time())
+        self.database.compact_usage(hourly_before=now + HOUR, daily_before=0, monthly_before=None)
+
+        history = self.database.usage_history(guild_id=self.guild_id, since=0)
+        self.assertEqual(history, [('kek', now - now % DAY, 3)])
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=now - now % DAY),
+                         [('kek', 3)])
+
+    def test_compact_usage_expires_months(self):
+        self.add('kek')
+        self.use('kek', user_id=1)
+
+        now = int(time.time())
+        self.database.compact_usage(hourly_before=now + HOUR,
+                                    daily_before=now + DAY,
+                                    monthly_before=now + DAY)
+
+        self.assertEqual(self.database.usage_history(guild_id=self.guild_id, since=0), [])
+        # Lifetime counts are kept
+        self.assertEqual(self.database.top_usage(guild_id=self.guild_id, since=None), [('kek', 1)])
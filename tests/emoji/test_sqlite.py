@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from fukurou.cogs.emoji.database.sqlite import EmojiSqlite
+from tests import load_emoji_config
+
+GUILD_ID = 1234
+
+class EmojiSqliteBackupTest(unittest.TestCase):
+    def setUp(self):
+        config = load_emoji_config()
+
+        self.directory = tempfile.mkdtemp(dir='.')
+        config.database.path = os.path.join(self.directory, 'emoji.db')
+
+        self.database = EmojiSqlite()
+        self.database.add_many(guild_id=GUILD_ID,
+                               uploader_id=1,
+                               entries=[(f'emoji{i}', f'{i:032x}.png') for i in range(20000)])
+
+    def tearDown(self):
+        self.database.conn.close()
+
+    def test_write_during_backup(self):
+        path = os.path.join(self.directory, 'backup.db')
+        errors = []
+        connect = sqlite3.connect
+
+        def slow_connect(*args, **kwargs):
+            # Keeps the read transaction of the backup open for a while
+            conn = connect(*args, **kwargs)
+            conn.set_progress_handler(lambda: time.sleep(0.001), 1000)
+            return conn
+
+        def backup():
+            try:
+                with mock.patch('sqlite3.connect', slow_connect):
+                    self.database.backup(path=path)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                errors.append(e)
+
+        # Written from this thread while the backup is taken in another, as the bot does
+        worker = threading.Thread(target=backup)
+        worker.start()
+
+        written = 0
+        slowest = 0.0
+        deadline = time.monotonic() + 10
+        while worker.is_alive() and time.monotonic() < deadline:
+            started = time.monotonic()
+            self.database.add(guild_id=GUILD_ID, uploader_id=1,
+                              emoji_name=f'new{written}', file_name=f'new{written}.png')
+            slowest = max(slowest, time.monotonic() - started)
+            written += 1
+
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive(), 'backup is not finished')
+        self.assertEqual(errors, [])
+
+        # Not waiting for the backup to finish
+        self.assertGreater(written, 1)
+        self.assertLess(slowest, 0.1)
+
+        with sqlite3.connect(path) as snapshot:
+            self.assertEqual(snapshot.execute('PRAGMA integrity_check').fetchone(), ('ok',))
+            count = snapshot.execute('SELECT COUNT(1) FROM emoji').fetchone()[0]
+
+        self.assertGreaterEqual(count, 20000)
+        self.assertLessEqual(count, 20000 + written)
+
+    def test_restore(self):
+        path = os.path.join(self.directory, 'backup.db')
+        self.database.backup(path=path)
+
+        self.database.add(guild_id=GUILD_ID, uploader_id=1, emoji_name='new', file_name='new.png')
+        self.database.restore(path=path)
+
+        self.assertEqual(self.database.count(guild_id=GUILD_ID), 20000)
+
+class EmojiSqliteExportTest(unittest.TestCase):
+    def setUp(self):
+        config = load_emoji_config()
+
+        self.directory = tempfile.mkdtemp(dir='.')
+        config.database.path = os.path.join(self.directory, 'emoji.db')
+
+        self.database = EmojiSqlite()
+        self.database.add_many(guild_id=GUILD_ID,
+                               uploader_id=1,
+                               entries=[(name, f'{name}.png') for name in ('c', 'a', 'd', 'b')])
+        self.database.increase_usecount(guild_id=GUILD_ID, user_id=1, emoji_name='b')
+
+    def tearDown(self):
+        self.database.conn.close()
+
+    def test_export_in_pages(self):
+        first = self.database.export(guild_id=GUILD_ID, limit=3)
+        rest = self.database.export(guild_id=GUILD_ID, after=first[-1][0].emoji_name, limit=3)
+
+        self.assertEqual([(emoji.emoji_name, count) for emoji, count in first], [('a', 0), ('b', 1), ('c', 0)])
+        self.assertEqual([emoji.emoji_name for emoji, _ in rest], ['d'])
+        self.assertEqual(len(self.database.export(guild_id=GUILD_ID)), 4)
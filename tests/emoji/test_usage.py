@@ -0,0 +1,33 @@
+import unittest
+
+from fukurou.cogs.emoji.usage import Leaderboard
+
+class EmojiLeaderboardTest(unittest.TestCase):
+    def test_counts_exact_within_size(self):
+        leaderboard = Leaderboard(size=3, entries=[('smile', 3), ('wink', 1)])
+        leaderboard.increase(emoji_name='wink')
+        leaderboard.increase(emoji_name='cry')
+
+        top = leaderboard.top(limit=3)
+
+        self.assertEqual(top, [('smile', 3), ('wink', 2), ('cry', 1)])
+        self.assertTrue(leaderboard.exact(entries=top))
+
+    def test_inherited_count_not_exact(self):
+        leaderboard = Leaderboard(size=2, entries=[('smile', 3), ('wink', 2)])
+        leaderboard.increase(emoji_name='cry')
+
+        top = leaderboard.top(limit=2)
+
+        # Takes the place of `wink` with its count
+        self.assertEqual(top, [('cry', 3), ('smile', 3)])
+        self.assertFalse(leaderboard.exact(entries=top))
+        self.assertTrue(leaderboard.exact(entries=top[1:]))
+
+    def test_evicted_error_dropped(self):
+        leaderboard = Leaderboard(size=1, entries=[('smile', 1)])
+        leaderboard.increase(emoji_name='cry')
+        leaderboard.increase(emoji_name='wink')
+
+        self.assertNotIn('cry', leaderboard.errors)
+        self.assertEqual(leaderboard.errors, {'wink': 2})